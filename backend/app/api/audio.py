@@ -2,25 +2,31 @@
 from typing import Optional, List
 from fastapi import APIRouter, Depends, Query, BackgroundTasks
 from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from pathlib import Path
 
-from app.core.database import get_db
+from app.core import profiling, tracing
+from app.core.database import get_async_db
 from app.core.config import settings
-from app.core.response import success_response
+from app.core.response import success_response, error_response
 from app.core.exceptions import NotFoundException
-from app.models.dialogue import Dialogue
+from app.models.dialogue import Dialogue, DialogueStatus
 from app.models.character import Character
 from app.models.chapter import Chapter
 from app.models.audio_export import AudioExport
 from app.schemas.audio import (
     AudioGenerateRequest,
     AudioBatchGenerateRequest,
+    AudioPrefetchRequest,
     AudioExportRequest,
     AudioGenerateResponse
 )
 from app.services.audio_service import AudioService
 from app.services.tts_factory import TTSFactory
+from app.services.speech_rate import SpeechRateEstimator
+from app.services.prefetch import PrefetchService
+from app.services.tts_scheduler import INTERACTIVE
 
 router = APIRouter()
 
@@ -58,29 +64,31 @@ async def get_available_voices(
 async def generate_single_audio(
     request: AudioGenerateRequest,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     生成单条对话的音频
     """
     # 获取对话
-    dialogue = db.query(Dialogue).filter(Dialogue.id == request.dialogue_id).first()
+    dialogue = await db.get(Dialogue, request.dialogue_id)
     if not dialogue:
         raise NotFoundException(message=f"对话 ID {request.dialogue_id} 不存在")
     
     # 获取角色（如果有）
     character = None
     if dialogue.character_id:
-        character = db.query(Character).filter(
-            Character.id == dialogue.character_id
-        ).first()
+        character = await db.get(Character, dialogue.character_id)
+    
+    # 预生成中的同一对话由本请求接管
+    PrefetchService.cancel_dialogues([dialogue.id])
     
     # 生成音频
-    dialogue.status = "generating"
-    db.commit()
+    dialogue.status = DialogueStatus.GENERATING
+    await db.commit()
     
     try:
-        result = await audio_service.generate_dialogue_audio(dialogue, character, db)
+        # 试听请求优先调度，不等待熔断中的引擎恢复，可发对冲请求
+        result = await audio_service.generate_dialogue_audio(dialogue, character, db, priority=INTERACTIVE)
         
         if result.success:
             return success_response(
@@ -93,26 +101,18 @@ async def generate_single_audio(
                 message="音频生成成功"
             )
         else:
-            return success_response(
-                data={"error": result.error_message},
-                message="音频生成失败",
-                code=500
-            )
+            return error_response(message=f"音频生成失败: {result.error_message}", code=500)
     except Exception as e:
-        dialogue.status = "failed"
-        db.commit()
-        return success_response(
-            data={"error": str(e)},
-            message="音频生成异常",
-            code=500
-        )
+        dialogue.status = DialogueStatus.ERROR
+        await db.commit()
+        return error_response(message=f"音频生成异常: {str(e)}", code=500)
 
 
 @router.post("/batch-generate", response_model=dict)
 async def batch_generate_audio(
     request: AudioBatchGenerateRequest,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     批量生成对话音频
@@ -123,36 +123,88 @@ async def batch_generate_audio(
             message="参数错误"
         )
     
-    # 在后台任务中执行批量生成
+    # 预估本批次的音频总时长（按音色语速统计）
+    estimator = await db.run_sync(SpeechRateEstimator)
+    rows = (await db.execute(
+        select(Dialogue.content, Character.voice_config).outerjoin(
+            Character, Character.id == Dialogue.character_id
+        ).where(Dialogue.id.in_(request.dialogue_ids))
+    )).all()
+    estimated_duration = round(sum(
+        estimator.estimate(row.content, AudioService.build_tts_config(row.voice_config))
+        for row in rows
+    ), 3)
+    
+    # 在后台任务中执行批量生成（请求结束后会话即关闭，各条对话使用独立会话）
+    # 后台任务的 span 挂在本请求的追踪下；本请求要求剖析时后台任务同样剖析
+    trace_context = tracing.current_context()
+    
     async def batch_task():
-        await audio_service.batch_generate(
-            dialogue_ids=request.dialogue_ids,
-            db=db
-        )
+        with tracing.span("job.batch_generate", {"job.dialogues": len(request.dialogue_ids)},
+                          parent=trace_context, root=True), profiling.job("batch_generate"):
+            await audio_service.batch_generate(dialogue_ids=request.dialogue_ids)
     
     background_tasks.add_task(batch_task)
     
     return success_response(
         data={
             "total": len(request.dialogue_ids),
+            "estimated_duration": estimated_duration,
             "status": "processing"
         },
         message=f"已启动批量生成任务，共 {len(request.dialogue_ids)} 条对话"
     )
 
 
+@router.post("/prefetch", response_model=dict)
+async def prefetch_audio(
+    request: AudioPrefetchRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    预生成当前对话之后的待生成对话（低优先级，批量任务和单条生成优先）
+    编辑/试听页面切换对话时调用；同一会话再次调用时取消不再需要的预生成
+    """
+    chapter = await db.get(Chapter, request.chapter_id)
+    if not chapter:
+        raise NotFoundException(message=f"章节 ID {request.chapter_id} 不存在")
+    
+    dialogue_ids = await PrefetchService.schedule(
+        session_id=request.session_id,
+        chapter_id=request.chapter_id,
+        db=db,
+        dialogue_id=request.dialogue_id,
+        count=request.count
+    )
+    
+    return success_response(
+        data={"dialogue_ids": dialogue_ids},
+        message=f"已预生成 {len(dialogue_ids)} 条对话"
+    )
+
+
+@router.delete("/prefetch/{session_id}", response_model=dict)
+async def cancel_prefetch(session_id: str):
+    """取消会话的预生成（离开编辑/试听页面时调用）"""
+    cancelled = PrefetchService.cancel_session(session_id)
+    return success_response(
+        data={"cancelled": cancelled},
+        message=f"已取消 {cancelled} 条预生成"
+    )
+
+
 @router.post("/export/chapter", response_model=dict)
 async def export_chapter_audio(
     chapter_id: int = Query(..., description="章节ID"),
     format: str = Query("mp3", description="导出格式"),
     quality: str = Query("high", description="音质"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     导出整章音频
     """
     # 检查章节是否存在
-    chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
+    chapter = await db.get(Chapter, chapter_id)
     if not chapter:
         raise NotFoundException(message=f"章节 ID {chapter_id} 不存在")
     
@@ -165,11 +217,7 @@ async def export_chapter_audio(
     )
     
     if not output_path:
-        return success_response(
-            data={"error": "该章节没有已生成的音频"},
-            message="导出失败",
-            code=400
-        )
+        return error_response(message="导出失败: 该章节没有已生成的音频", code=400)
     
     return success_response(
         data={
@@ -184,7 +232,7 @@ async def export_chapter_audio(
 @router.post("/export/project", response_model=dict)
 async def export_project_audio(
     request: AudioExportRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     导出项目音频
@@ -199,11 +247,7 @@ async def export_project_audio(
     )
     
     if not export_record:
-        return success_response(
-            data={"error": "没有可导出的音频"},
-            message="导出失败",
-            code=400
-        )
+        return error_response(message="导出失败: 没有可导出的音频", code=400)
     
     return success_response(
         data={
@@ -219,12 +263,12 @@ async def export_project_audio(
 @router.get("/download/{export_id}", response_model=None)
 async def download_audio(
     export_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     下载导出的音频文件
     """
-    export_record = db.query(AudioExport).filter(AudioExport.id == export_id).first()
+    export_record = await db.get(AudioExport, export_id)
     if not export_record:
         raise NotFoundException(message=f"导出记录 ID {export_id} 不存在")
     
@@ -242,17 +286,17 @@ async def download_audio(
 @router.get("/exports", response_model=dict)
 async def list_exports(
     project_id: Optional[int] = Query(None, description="项目ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     获取导出记录列表
     """
-    query = db.query(AudioExport)
+    query = select(AudioExport)
     
     if project_id:
-        query = query.filter(AudioExport.project_id == project_id)
+        query = query.where(AudioExport.project_id == project_id)
     
-    exports = query.order_by(AudioExport.created_at.desc()).all()
+    exports = (await db.execute(query.order_by(AudioExport.created_at.desc()))).scalars().all()
     
     items = []
     for export in exports:
@@ -274,12 +318,12 @@ async def list_exports(
 @router.delete("/exports/{export_id}", response_model=dict)
 async def delete_export(
     export_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     删除导出记录和文件
     """
-    export_record = db.query(AudioExport).filter(AudioExport.id == export_id).first()
+    export_record = await db.get(AudioExport, export_id)
     if not export_record:
         raise NotFoundException(message=f"导出记录 ID {export_id} 不存在")
     
@@ -289,8 +333,8 @@ async def delete_export(
         file_path.unlink()
     
     # 删除记录
-    db.delete(export_record)
-    db.commit()
+    await db.delete(export_record)
+    await db.commit()
     
     return success_response(message="删除导出记录成功")
 
@@ -1,19 +1,32 @@
 """章节管理API"""
 from typing import Optional
-from fastapi import APIRouter, Depends, UploadFile, File, Form, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from sqlalchemy.orm import undefer
 from pathlib import Path
 import shutil
 import os
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.config import settings
-from app.core.response import success_response
+from app.core.response import success_response, list_columns, rows_to_dicts
 from app.core.exceptions import NotFoundException, FileUploadException
-from app.models.chapter import Chapter
+from app.models.chapter import Chapter, ChapterStatus
 from app.models.project import Project
+from app.models.dialogue import Dialogue
+from app.models.statistics import ChapterStats
 from app.schemas.chapter import ChapterCreate, ChapterUpdate, ChapterInDB, ChapterListItem
 from app.services.text_parser import TextParser
+from app.services.dialogue_sync import DialogueSyncService
+from app.services.parse_cache import ParseCache
+from app.services.bulk_insert import BulkInsertService
+from app.services.speech_rate import SpeechRateEstimator
+from app.services.statistics import StatsService
+from app.services.response_cache import ResponseCache, CHAPTER_LIST
+from app.services.bulk_delete import CascadeDeleteService
+from app.services.storage_gc import StorageGC
+from app.services.prefetch import PrefetchService
 
 router = APIRouter()
 
@@ -23,14 +36,14 @@ async def upload_text_file(
     project_id: int = Form(..., description="项目ID"),
     file: UploadFile = File(..., description="文本文件"),
     auto_split: bool = Form(True, description="是否自动分割章节"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     上传文本文件并自动分割章节
     支持: TXT, DOCX, PDF
     """
     # 检查项目是否存在
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise NotFoundException(message=f"项目 ID {project_id} 不存在")
     
@@ -66,27 +79,30 @@ async def upload_text_file(
             'word_count': len(text_content)
         }]
     
-    # 保存章节到数据库
-    created_chapters = []
-    for chapter_data in chapters_data:
-        new_chapter = Chapter(
-            project_id=project_id,
-            title=chapter_data['title'],
-            content=chapter_data['content'],
-            order_index=chapter_data['order_index'],
-            word_count=chapter_data['word_count']
-        )
-        db.add(new_chapter)
-        created_chapters.append(new_chapter)
-    
-    # 更新项目的章节数量
-    project.chapters_count = len(created_chapters)
-    
-    db.commit()
-    
-    # 刷新数据
-    for chapter in created_chapters:
-        db.refresh(chapter)
+    # 批量保存章节到数据库（响应直接由插入数据构造，无需逐行刷新）
+    rows = [
+        {
+            "project_id": project_id,
+            "title": chapter_data['title'],
+            "content": chapter_data['content'],
+            "order_index": chapter_data['order_index'],
+            "word_count": chapter_data['word_count'],
+            "status": ChapterStatus.PENDING,
+            "duration": 0,
+        }
+        for chapter_data in chapters_data
+    ]
+    
+    def insert_chapters(sync_db):
+        created = BulkInsertService.insert_rows(sync_db, Chapter, Chapter.project_id, project_id, rows)
+        # 批量插入绕过ORM事件，需显式计入项目章节数并使章节列表缓存失效
+        StatsService.chapters_inserted(sync_db, project_id, [c["id"] for c in created])
+        ResponseCache.touch(sync_db, CHAPTER_LIST, project_id)
+        return created
+    
+    created_chapters = await db.run_sync(insert_chapters)
+    
+    await db.commit()
     
     return success_response(
         data={
@@ -100,26 +116,28 @@ async def upload_text_file(
 
 @router.get("/", response_model=dict)
 async def list_chapters(
+    request: Request,
     project_id: int = Query(..., description="项目ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """获取项目的章节列表"""
-    chapters = db.query(Chapter).filter(
-        Chapter.project_id == project_id
-    ).order_by(Chapter.order_index).all()
+    """获取项目的章节列表（响应按版本缓存，支持 ETag）"""
+    cached = ResponseCache.lookup(request, CHAPTER_LIST, project_id)
+    if cached.response:
+        return cached.response
     
-    items = [ChapterListItem.model_validate(c) for c in chapters]
+    rows = (await db.execute(
+        select(*list_columns(ChapterListItem, Chapter)).where(
+            Chapter.project_id == project_id
+        ).order_by(Chapter.order_index)
+    )).all()
     
-    return success_response(
-        data={"items": [item.model_dump() for item in items]},
-        message="获取章节列表成功"
-    )
+    return cached.store({"items": rows_to_dicts(rows)}, "获取章节列表成功")
 
 
 @router.get("/{chapter_id}", response_model=dict)
-async def get_chapter(chapter_id: int, db: Session = Depends(get_db)):
+async def get_chapter(chapter_id: int, db: AsyncSession = Depends(get_async_db)):
     """获取章节详情"""
-    chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
+    chapter = await db.get(Chapter, chapter_id, options=[undefer(Chapter.content)])
     if not chapter:
         raise NotFoundException(message=f"章节 ID {chapter_id} 不存在")
     
@@ -129,53 +147,101 @@ async def get_chapter(chapter_id: int, db: Session = Depends(get_db)):
     )
 
 
+@router.get("/{chapter_id}/estimate", response_model=dict)
+async def estimate_chapter_duration(chapter_id: int, db: AsyncSession = Depends(get_async_db)):
+    """预估章节音频时长（已生成部分取实际时长，其余按音色语速统计预估）"""
+    chapter = await db.get(Chapter, chapter_id)
+    if not chapter:
+        raise NotFoundException(message=f"章节 ID {chapter_id} 不存在")
+    
+    def estimate_chapter(sync_db):
+        return SpeechRateEstimator(sync_db).estimate_chapters([chapter_id], sync_db)[chapter_id]
+    
+    estimate = await db.run_sync(estimate_chapter)
+    
+    return success_response(
+        data={"chapter_id": chapter_id, **estimate},
+        message="预估章节时长成功"
+    )
+
+
+@router.get("/{chapter_id}/statistics", response_model=dict)
+async def get_chapter_statistics(chapter_id: int, db: AsyncSession = Depends(get_async_db)):
+    """获取章节统计信息（读取增量维护的统计行）"""
+    stats = await db.get(ChapterStats, chapter_id)
+    if not stats:
+        raise NotFoundException(message=f"章节 ID {chapter_id} 不存在")
+    
+    return success_response(
+        data={
+            "chapter_id": stats.chapter_id,
+            "project_id": stats.project_id,
+            "dialogue_count": stats.dialogue_count,
+            "pending_count": stats.pending_count,
+            "generating_count": stats.generating_count,
+            "completed_count": stats.completed_count,
+            "error_count": stats.error_count,
+            "synthesized_duration": round(stats.synthesized_duration, 3),
+        },
+        message="获取章节统计成功"
+    )
+
+
 @router.put("/{chapter_id}", response_model=dict)
 async def update_chapter(
     chapter_id: int,
     chapter_data: ChapterUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """更新章节信息"""
-    chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
+    chapter = await db.get(Chapter, chapter_id, options=[undefer(Chapter.content)])
     if not chapter:
         raise NotFoundException(message=f"章节 ID {chapter_id} 不存在")
     
     # 更新字段
     update_data = chapter_data.model_dump(exclude_unset=True)
+    content_changed = 'content' in update_data and update_data['content'] != chapter.content
     for field, value in update_data.items():
         setattr(chapter, field, value)
     
     # 更新字数
     if 'content' in update_data:
-        chapter.word_count = len(update_data['content'])
-    
-    db.commit()
-    db.refresh(chapter)
-    
-    return success_response(
-        data=ChapterInDB.model_validate(chapter).model_dump(),
-        message="更新章节成功"
-    )
+        chapter.word_count = len(update_data['content'] or '')
+    
+    # 内容变化且已拆分过对话时，增量同步对话（未变化的对话保留已生成的音频）
+    dialogue_changes = None
+    if content_changed:
+        has_dialogues = (await db.execute(
+            select(Dialogue.id).where(Dialogue.chapter_id == chapter_id).limit(1)
+        )).first() is not None
+        if has_dialogues:
+            segments = await ParseCache.get_dialogues(chapter.content or "", db)
+            dialogue_changes = await db.run_sync(
+                lambda sync_db: DialogueSyncService.resegment_chapter(chapter, segments, sync_db)
+            )
+    
+    await db.commit()
+    await db.refresh(chapter)
+    
+    data = ChapterInDB.model_validate(chapter).model_dump()
+    if dialogue_changes is not None:
+        data["dialogue_changes"] = dialogue_changes
+    
+    return success_response(data=data, message="更新章节成功")
 
 
 @router.delete("/{chapter_id}", response_model=dict)
-async def delete_chapter(chapter_id: int, db: Session = Depends(get_db)):
+async def delete_chapter(chapter_id: int, db: AsyncSession = Depends(get_async_db)):
     """删除章节"""
-    chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
+    chapter = await db.get(Chapter, chapter_id)
     if not chapter:
         raise NotFoundException(message=f"章节 ID {chapter_id} 不存在")
     
-    project_id = chapter.project_id
-    db.delete(chapter)
-    
-    # 更新项目的章节数量
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if project:
-        project.chapters_count = db.query(Chapter).filter(
-            Chapter.project_id == project_id
-        ).count()
-    
-    db.commit()
+    # 集合式删除章节及其对话（同时更新统计和列表缓存），音频文件提交后异步回收
+    await db.run_sync(CascadeDeleteService.delete_chapter, chapter_id, chapter.project_id)
+    await db.commit()
+    StorageGC.schedule(chapter_ids=[chapter_id])
+    PrefetchService.cancel_chapters([chapter_id])
     
     return success_response(message="删除章节成功")
 
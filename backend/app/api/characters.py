@@ -1,11 +1,11 @@
 """角色管理API"""
 from typing import Optional
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
 
-from app.core.database import get_db
-from app.core.response import success_response
+from app.core.database import get_async_db
+from app.core.response import success_response, list_columns, rows_to_dicts
 from app.core.exceptions import NotFoundException
 from app.models.character import Character
 from app.models.project import Project
@@ -13,6 +13,8 @@ from app.models.chapter import Chapter
 from app.models.dialogue import Dialogue
 from app.schemas.character import CharacterCreate, CharacterUpdate, CharacterInDB, CharacterListItem
 from app.services.text_parser import TextParser
+from app.services.parse_cache import ParseCache
+from app.services.response_cache import ResponseCache, CHARACTER_LIST
 
 router = APIRouter()
 
@@ -20,19 +22,21 @@ router = APIRouter()
 @router.post("/extract", response_model=dict)
 async def extract_characters(
     project_id: int = Query(..., description="项目ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     自动提取项目中的所有角色
     从章节内容中识别对话角色
     """
     # 检查项目是否存在
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise NotFoundException(message=f"项目 ID {project_id} 不存在")
     
     # 获取项目的所有章节
-    chapters = db.query(Chapter).filter(Chapter.project_id == project_id).all()
+    chapters = (await db.execute(
+        select(Chapter.id, Chapter.content).where(Chapter.project_id == project_id)
+    )).all()
     
     if not chapters:
         return success_response(
@@ -40,18 +44,17 @@ async def extract_characters(
             message="该项目暂无章节，无法提取角色"
         )
     
-    # 提取所有角色
+    # 提取所有角色（解析结果按内容哈希缓存，未命中的章节并行解析）
+    contents = {chapter.id: chapter.content for chapter in chapters if chapter.content}
+    parsed = await ParseCache.get_many(contents, db)
     all_characters = set()
-    for chapter in chapters:
-        if chapter.content:
-            dialogues = TextParser.extract_dialogues(chapter.content)
-            characters = TextParser.extract_characters(dialogues)
-            all_characters.update(characters)
+    for dialogues in parsed.values():
+        all_characters.update(TextParser.extract_characters(dialogues))
     
     # 保存角色到数据库（避免重复）
-    existing_characters = db.query(Character).filter(
-        Character.project_id == project_id
-    ).all()
+    existing_characters = (await db.execute(
+        select(Character).where(Character.project_id == project_id)
+    )).scalars().all()
     existing_names = {c.name for c in existing_characters}
     
     new_characters = []
@@ -71,14 +74,12 @@ async def extract_characters(
             db.add(new_char)
             new_characters.append(new_char)
     
-    # 更新项目的角色数量
-    project.characters_count = len(existing_characters) + len(new_characters)
-    
-    db.commit()
+    # 项目角色数由统计服务在提交时计入
+    await db.commit()
     
     # 刷新数据
     for char in new_characters:
-        db.refresh(char)
+        await db.refresh(char)
     
     return success_response(
         data={
@@ -93,26 +94,26 @@ async def extract_characters(
 
 @router.get("/", response_model=dict)
 async def list_characters(
+    request: Request,
     project_id: int = Query(..., description="项目ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """获取项目的角色列表"""
-    characters = db.query(Character).filter(
-        Character.project_id == project_id
-    ).all()
+    """获取项目的角色列表（响应按版本缓存，支持 ETag）"""
+    cached = ResponseCache.lookup(request, CHARACTER_LIST, project_id)
+    if cached.response:
+        return cached.response
     
-    items = [CharacterListItem.model_validate(c) for c in characters]
+    rows = (await db.execute(
+        select(*list_columns(CharacterListItem, Character)).where(Character.project_id == project_id)
+    )).all()
     
-    return success_response(
-        data={"items": [item.model_dump() for item in items]},
-        message="获取角色列表成功"
-    )
+    return cached.store({"items": rows_to_dicts(rows)}, "获取角色列表成功")
 
 
 @router.get("/{character_id}", response_model=dict)
-async def get_character(character_id: int, db: Session = Depends(get_db)):
+async def get_character(character_id: int, db: AsyncSession = Depends(get_async_db)):
     """获取角色详情"""
-    character = db.query(Character).filter(Character.id == character_id).first()
+    character = await db.get(Character, character_id)
     if not character:
         raise NotFoundException(message=f"角色 ID {character_id} 不存在")
     
@@ -125,11 +126,11 @@ async def get_character(character_id: int, db: Session = Depends(get_db)):
 @router.post("/", response_model=dict)
 async def create_character(
     character_data: CharacterCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """创建新角色"""
     # 检查项目是否存在
-    project = db.query(Project).filter(Project.id == character_data.project_id).first()
+    project = await db.get(Project, character_data.project_id)
     if not project:
         raise NotFoundException(message=f"项目 ID {character_data.project_id} 不存在")
     
@@ -138,16 +139,11 @@ async def create_character(
     if 'voice_config' in data_dict and data_dict['voice_config']:
         data_dict['voice_config'] = data_dict['voice_config']
     
+    # 项目角色数由统计服务在提交时计入
     new_character = Character(**data_dict)
     db.add(new_character)
-    
-    # 更新项目角色数量
-    project.characters_count = db.query(Character).filter(
-        Character.project_id == character_data.project_id
-    ).count() + 1
-    
-    db.commit()
-    db.refresh(new_character)
+    await db.commit()
+    await db.refresh(new_character)
     
     return success_response(
         data=CharacterInDB.model_validate(new_character).model_dump(),
@@ -159,10 +155,10 @@ async def create_character(
 async def update_character(
     character_id: int,
     character_data: CharacterUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """更新角色信息（包括声音配置）"""
-    character = db.query(Character).filter(Character.id == character_id).first()
+    character = await db.get(Character, character_id)
     if not character:
         raise NotFoundException(message=f"角色 ID {character_id} 不存在")
     
@@ -171,8 +167,8 @@ async def update_character(
     for field, value in update_data.items():
         setattr(character, field, value)
     
-    db.commit()
-    db.refresh(character)
+    await db.commit()
+    await db.refresh(character)
     
     return success_response(
         data=CharacterInDB.model_validate(character).model_dump(),
@@ -181,47 +177,29 @@ async def update_character(
 
 
 @router.delete("/{character_id}", response_model=dict)
-async def delete_character(character_id: int, db: Session = Depends(get_db)):
+async def delete_character(character_id: int, db: AsyncSession = Depends(get_async_db)):
     """删除角色"""
-    character = db.query(Character).filter(Character.id == character_id).first()
+    character = await db.get(Character, character_id)
     if not character:
         raise NotFoundException(message=f"角色 ID {character_id} 不存在")
     
-    project_id = character.project_id
-    db.delete(character)
-    
-    # 更新项目角色数量
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if project:
-        project.characters_count = db.query(Character).filter(
-            Character.project_id == project_id
-        ).count()
-    
-    db.commit()
+    await db.delete(character)
+    await db.commit()
     
     return success_response(message="删除角色成功")
 
 
 @router.get("/{character_id}/statistics", response_model=dict)
-async def get_character_statistics(character_id: int, db: Session = Depends(get_db)):
-    """获取角色统计信息"""
-    character = db.query(Character).filter(Character.id == character_id).first()
+async def get_character_statistics(character_id: int, db: AsyncSession = Depends(get_async_db)):
+    """获取角色统计信息（对话数和时长由统计服务增量维护，只读）"""
+    character = await db.get(Character, character_id)
     if not character:
         raise NotFoundException(message=f"角色 ID {character_id} 不存在")
     
-    # 统计对话数量
-    dialogue_count = db.query(func.count(Dialogue.id)).filter(
-        Dialogue.character_id == character_id
-    ).scalar()
-    
-    # 更新角色的对话数量
-    character.dialogue_count = dialogue_count
-    db.commit()
-    
     statistics = {
         "character_id": character.id,
         "character_name": character.name,
-        "dialogue_count": dialogue_count,
+        "dialogue_count": character.dialogue_count,
         "total_duration": character.total_duration,
         "voice_config": character.voice_config
     }
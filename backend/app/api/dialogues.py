@@ -1,12 +1,14 @@
 """对话编辑API"""
 from typing import Optional, List
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import undefer
 
-from app.core.database import get_db
-from app.core.response import success_response
+from app.core.database import get_async_db
+from app.core.response import success_response, list_columns, rows_to_dicts
 from app.core.exceptions import NotFoundException
-from app.models.dialogue import Dialogue
+from app.models.dialogue import Dialogue, DialogueType, DialogueStatus
 from app.models.character import Character
 from app.models.chapter import Chapter
 from app.schemas.dialogue import (
@@ -16,42 +18,79 @@ from app.schemas.dialogue import (
     DialogueInDB,
     DialogueListItem
 )
+from app.services.dialogue_sync import DialogueSyncService
+from app.services.parse_cache import ParseCache
+from app.services.bulk_insert import BulkInsertService
+from app.services.bulk_update import BulkUpdateService
+from app.services.statistics import StatsService
+from app.services.prefetch import PrefetchService
+from app.services.response_cache import ResponseCache, DIALOGUE_LIST, CHARACTER_LIST
 
 router = APIRouter()
 
 
 @router.get("/", response_model=dict)
 async def list_dialogues(
+    request: Request,
     chapter_id: int = Query(..., description="章节ID"),
-    db: Session = Depends(get_db)
+    after_order_index: Optional[int] = Query(None, description="游标：上一页最后一条的order_index"),
+    after_id: Optional[int] = Query(None, description="游标：上一页最后一条的ID（order_index相同时区分先后）"),
+    limit: Optional[int] = Query(None, ge=1, le=5000, description="每页数量（不传则返回全部）"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """获取章节的对话列表"""
-    dialogues = db.query(Dialogue).filter(
-        Dialogue.chapter_id == chapter_id
-    ).order_by(Dialogue.order_index).all()
-    
-    # 关联角色名称
-    items = []
-    for dialogue in dialogues:
-        item_dict = DialogueListItem.model_validate(dialogue).model_dump()
-        if dialogue.character_id:
-            character = db.query(Character).filter(
-                Character.id == dialogue.character_id
-            ).first()
-            if character:
-                item_dict['character_name'] = character.name
-        items.append(item_dict)
+    """
+    获取章节的对话列表
+    角色名称通过关联查询一次取回；传入limit时按 (order_index, id) 游标分页
+    响应按章节版本缓存，支持 ETag
+    """
+    cached = ResponseCache.lookup(request, DIALOGUE_LIST, chapter_id, (after_order_index, after_id, limit))
+    if cached.response:
+        return cached.response
     
-    return success_response(
-        data={"items": items},
-        message="获取对话列表成功"
+    # 直接查询列表项字段的行元组，不构造ORM对象和逐行Pydantic校验
+    query = select(
+        *list_columns(DialogueListItem, Dialogue, character_name=Character.name)
+    ).outerjoin(
+        Character, Character.id == Dialogue.character_id
+    ).where(
+        Dialogue.chapter_id == chapter_id
     )
+    
+    # 游标分页：只取游标之后的数据，避免OFFSET扫描
+    if after_order_index is not None:
+        if after_id is not None:
+            # 行值比较可直接定位到 (chapter_id, order_index) 索引位置
+            query = query.where(
+                tuple_(Dialogue.order_index, Dialogue.id) > tuple_(after_order_index, after_id)
+            )
+        else:
+            query = query.where(Dialogue.order_index > after_order_index)
+    
+    query = query.order_by(Dialogue.order_index, Dialogue.id)
+    
+    # 多取一条用于判断是否还有下一页
+    if limit:
+        query = query.limit(limit + 1)
+    rows = (await db.execute(query)).all()
+    has_more = bool(limit) and len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+    
+    data = {"items": rows_to_dicts(rows)}
+    if limit:
+        last = rows[-1] if rows else None
+        data["has_more"] = has_more
+        data["next_cursor"] = (
+            {"after_order_index": last.order_index, "after_id": last.id} if has_more else None
+        )
+    
+    return cached.store(data, "获取对话列表成功")
 
 
 @router.get("/{dialogue_id}", response_model=dict)
-async def get_dialogue(dialogue_id: int, db: Session = Depends(get_db)):
+async def get_dialogue(dialogue_id: int, db: AsyncSession = Depends(get_async_db)):
     """获取对话详情"""
-    dialogue = db.query(Dialogue).filter(Dialogue.id == dialogue_id).first()
+    dialogue = await db.get(Dialogue, dialogue_id)
     if not dialogue:
         raise NotFoundException(message=f"对话 ID {dialogue_id} 不存在")
     
@@ -64,26 +103,24 @@ async def get_dialogue(dialogue_id: int, db: Session = Depends(get_db)):
 @router.post("/", response_model=dict)
 async def create_dialogue(
     dialogue_data: DialogueCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """创建新对话段落"""
     # 检查章节是否存在
-    chapter = db.query(Chapter).filter(Chapter.id == dialogue_data.chapter_id).first()
+    chapter = await db.get(Chapter, dialogue_data.chapter_id)
     if not chapter:
         raise NotFoundException(message=f"章节 ID {dialogue_data.chapter_id} 不存在")
     
     # 检查角色是否存在（如果指定了）
     if dialogue_data.character_id:
-        character = db.query(Character).filter(
-            Character.id == dialogue_data.character_id
-        ).first()
+        character = await db.get(Character, dialogue_data.character_id)
         if not character:
             raise NotFoundException(message=f"角色 ID {dialogue_data.character_id} 不存在")
     
     new_dialogue = Dialogue(**dialogue_data.model_dump())
     db.add(new_dialogue)
-    db.commit()
-    db.refresh(new_dialogue)
+    await db.commit()
+    await db.refresh(new_dialogue)
     
     return success_response(
         data=DialogueInDB.model_validate(new_dialogue).model_dump(),
@@ -94,12 +131,12 @@ async def create_dialogue(
 @router.post("/batch", response_model=dict)
 async def create_dialogues_batch(
     chapter_id: int = Query(..., description="章节ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     批量创建对话（从章节内容自动提取）
     """
-    chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
+    chapter = await db.get(Chapter, chapter_id, options=[undefer(Chapter.content)])
     if not chapter:
         raise NotFoundException(message=f"章节 ID {chapter_id} 不存在")
     
@@ -109,38 +146,72 @@ async def create_dialogues_batch(
             message="章节内容为空，无法提取对话"
         )
     
-    # 使用文本解析器提取对话
-    from app.services.text_parser import TextParser
-    dialogues_data = TextParser.extract_dialogues(chapter.content)
+    # 已有对话时增量同步，避免重复创建并保留已生成的音频
+    has_dialogues = (await db.execute(
+        select(Dialogue.id).where(Dialogue.chapter_id == chapter_id).limit(1)
+    )).first() is not None
+    if has_dialogues:
+        segments = await ParseCache.get_dialogues(chapter.content, db)
+        changes = await db.run_sync(
+            lambda sync_db: DialogueSyncService.resegment_chapter(chapter, segments, sync_db)
+        )
+        await db.commit()
+        PrefetchService.cancel_chapters([chapter_id])
+        # populate_existing 重新载入被服务端更新过的时间戳
+        dialogues = (await db.execute(
+            select(Dialogue).where(
+                Dialogue.chapter_id == chapter_id
+            ).order_by(Dialogue.order_index).execution_options(populate_existing=True)
+        )).scalars().all()
+        return success_response(
+            data={
+                "count": len(dialogues),
+                "changes": changes,
+                "dialogues": [DialogueInDB.model_validate(d).model_dump() for d in dialogues]
+            },
+            message=(
+                f"增量同步对话：新增 {changes['inserted']} 条，"
+                f"修改 {changes['updated']} 条，删除 {changes['deleted']} 条"
+            )
+        )
+    
+    # 使用文本解析器提取对话（与角色提取共用解析缓存）
+    dialogues_data = await ParseCache.get_dialogues(chapter.content, db)
     
     # 获取角色映射（角色名 -> 角色ID）
-    characters = db.query(Character).filter(
-        Character.project_id == chapter.project_id
-    ).all()
+    characters = (await db.execute(
+        select(Character.id, Character.name).where(Character.project_id == chapter.project_id)
+    )).all()
     character_map = {c.name: c.id for c in characters}
     
-    # 批量创建对话
-    created_dialogues = []
-    for dialogue_data in dialogues_data:
-        character_id = None
-        if dialogue_data.get('character'):
-            character_id = character_map.get(dialogue_data['character'])
-        
-        new_dialogue = Dialogue(
-            chapter_id=chapter_id,
-            character_id=character_id,
-            type=dialogue_data['type'],
-            content=dialogue_data['content'],
-            order_index=dialogue_data['order_index']
-        )
-        db.add(new_dialogue)
-        created_dialogues.append(new_dialogue)
+    # 批量创建对话（响应直接由插入数据构造，无需逐行刷新）
+    rows = [
+        {
+            "chapter_id": chapter_id,
+            "character_id": character_map.get(dialogue_data.get('character')),
+            "type": DialogueType(dialogue_data['type']),
+            "content": dialogue_data['content'],
+            "order_index": dialogue_data['order_index'],
+            "start_time": 0.0,
+            "end_time": 0.0,
+            "duration": 0.0,
+            "audio_path": None,
+            "status": DialogueStatus.PENDING,
+        }
+        for dialogue_data in dialogues_data
+    ]
+    
+    def insert_dialogues(sync_db):
+        created = BulkInsertService.insert_rows(sync_db, Dialogue, Dialogue.chapter_id, chapter_id, rows)
+        # 批量插入绕过ORM事件，需显式计入统计并使列表缓存失效
+        StatsService.dialogues_inserted(sync_db, created)
+        ResponseCache.touch(sync_db, DIALOGUE_LIST, chapter_id)
+        ResponseCache.touch(sync_db, CHARACTER_LIST, chapter.project_id)
+        return created
     
-    db.commit()
+    created_dialogues = await db.run_sync(insert_dialogues)
     
-    # 刷新数据
-    for dialogue in created_dialogues:
-        db.refresh(dialogue)
+    await db.commit()
     
     return success_response(
         data={
@@ -155,10 +226,10 @@ async def create_dialogues_batch(
 async def update_dialogue(
     dialogue_id: int,
     dialogue_data: DialogueUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """更新对话内容"""
-    dialogue = db.query(Dialogue).filter(Dialogue.id == dialogue_id).first()
+    dialogue = await db.get(Dialogue, dialogue_id)
     if not dialogue:
         raise NotFoundException(message=f"对话 ID {dialogue_id} 不存在")
     
@@ -167,8 +238,10 @@ async def update_dialogue(
     for field, value in update_data.items():
         setattr(dialogue, field, value)
     
-    db.commit()
-    db.refresh(dialogue)
+    await db.commit()
+    # 正在预生成的旧文本/旧角色音频作废
+    PrefetchService.cancel_dialogues([dialogue_id])
+    await db.refresh(dialogue)
     
     return success_response(
         data=DialogueInDB.model_validate(dialogue).model_dump(),
@@ -179,41 +252,60 @@ async def update_dialogue(
 @router.put("/batch/update", response_model=dict)
 async def update_dialogues_batch(
     batch_data: DialogueBatchUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """批量更新对话"""
+    """
+    批量更新对话（分配角色、修改状态、重置音频以便重新生成）
+    以集合式 UPDATE 执行，不加载对话数据
+    """
     if not batch_data.dialogue_ids:
         return success_response(data={"updated_count": 0}, message="未指定要更新的对话")
     
-    # 查询要更新的对话
-    dialogues = db.query(Dialogue).filter(
-        Dialogue.id.in_(batch_data.dialogue_ids)
-    ).all()
+    values = {}
+    if batch_data.character_id is not None:
+        values["character_id"] = batch_data.character_id
+    if batch_data.status is not None:
+        values["status"] = batch_data.status
+    if batch_data.reset_audio:
+        # 清除已生成的音频信息，状态回到待生成（旧音频文件由清理任务回收）
+        values.update(
+            status=DialogueStatus.PENDING,
+            audio_path=None,
+            start_time=0.0,
+            end_time=0.0,
+            duration=0.0
+        )
+    if not values:
+        return success_response(data={"updated_count": 0}, message="未指定要更新的字段")
     
-    # 批量更新
-    for dialogue in dialogues:
-        if batch_data.character_id is not None:
-            dialogue.character_id = batch_data.character_id
-        if batch_data.status is not None:
-            dialogue.status = batch_data.status
+    def update_dialogues(sync_db):
+        # 批量更新绕过ORM事件：先按旧值计算统计增量，更新后再写入
+        delta = StatsService.dialogue_update_delta(sync_db, batch_data.dialogue_ids, values)
+        ResponseCache.touch_dialogues(sync_db, batch_data.dialogue_ids)
+        updated = BulkUpdateService.update_by_ids(sync_db, Dialogue, batch_data.dialogue_ids, values)
+        delta.apply(sync_db)
+        return updated
     
-    db.commit()
+    updated_count = await db.run_sync(update_dialogues)
+    await db.commit()
+    PrefetchService.cancel_dialogues(batch_data.dialogue_ids)
     
     return success_response(
-        data={"updated_count": len(dialogues)},
-        message=f"成功更新 {len(dialogues)} 条对话"
+        data={"updated_count": updated_count},
+        message=f"成功更新 {updated_count} 条对话"
     )
 
 
 @router.delete("/{dialogue_id}", response_model=dict)
-async def delete_dialogue(dialogue_id: int, db: Session = Depends(get_db)):
+async def delete_dialogue(dialogue_id: int, db: AsyncSession = Depends(get_async_db)):
     """删除对话"""
-    dialogue = db.query(Dialogue).filter(Dialogue.id == dialogue_id).first()
+    dialogue = await db.get(Dialogue, dialogue_id)
     if not dialogue:
         raise NotFoundException(message=f"对话 ID {dialogue_id} 不存在")
     
-    db.delete(dialogue)
-    db.commit()
+    await db.delete(dialogue)
+    await db.commit()
+    PrefetchService.cancel_dialogues([dialogue_id])
     
     return success_response(message="删除对话成功")
 
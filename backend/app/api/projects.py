@@ -1,68 +1,122 @@
 """项目管理API"""
 from typing import Optional
+from datetime import datetime
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, or_, tuple_
+from sqlalchemy.dialects.mysql import match
 
-from app.core.database import get_db
-from app.core.response import success_response, PageResponse
+from app.core.database import get_async_db
+from app.core.config import settings
+from app.core.response import success_response, fast_success_response, list_columns, rows_to_dicts
 from app.core.exceptions import NotFoundException
-from app.models.project import Project
+from app.models.project import Project, ProjectStatus
+from app.models.chapter import Chapter
+from app.models.statistics import ProjectStats
 from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectInDB, ProjectListItem
+from app.services.speech_rate import SpeechRateEstimator
+from app.services.count_cache import CountCache
+from app.services.bulk_delete import CascadeDeleteService
+from app.services.storage_gc import StorageGC
+from app.services.prefetch import PrefetchService
+from app.services.statistics import StatsService  # noqa: F401  注册统计维护事件
 
 router = APIRouter()
 
 
 @router.get("/", response_model=dict)
 async def list_projects(
-    page: int = Query(1, ge=1, description="页码"),
+    page: int = Query(1, ge=1, description="页码（游标分页时忽略）"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
     keyword: Optional[str] = Query(None, description="搜索关键词"),
-    status: Optional[str] = Query(None, description="项目状态筛选"),
-    db: Session = Depends(get_db)
+    status: Optional[ProjectStatus] = Query(None, description="项目状态筛选"),
+    after_updated_at: Optional[datetime] = Query(None, description="游标：上一页最后一条的updated_at"),
+    after_id: Optional[int] = Query(None, description="游标：上一页最后一条的ID"),
+    with_total: bool = Query(True, description="是否返回总数（游标翻页时可关闭以省去COUNT）"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """获取项目列表（分页、搜索）"""
-    query = db.query(Project)
+    """
+    获取项目列表（分页、搜索）
+    按 (updated_at, id) 倒序；传入 after_updated_at + after_id 时按游标取下一页，避免深分页的OFFSET扫描。
+    总数按筛选条件短时缓存，MySQL 下关键词搜索走 name/description 全文索引
+    """
+    query = select(*list_columns(ProjectListItem, Project))
+    
+    dialect_name = db.get_bind().dialect.name
     
     # 关键词搜索
     if keyword:
-        query = query.filter(
-            or_(
-                Project.name.contains(keyword),
-                Project.description.contains(keyword)
-            )
-        )
+        query = query.where(_keyword_filter(keyword, dialect_name))
     
     # 状态筛选
     if status:
-        query = query.filter(Project.status == status)
-    
-    # 按更新时间倒序排列
-    query = query.order_by(Project.updated_at.desc())
-    
-    # 计算总数
-    total = query.count()
-    
-    # 分页
-    offset = (page - 1) * page_size
-    projects = query.offset(offset).limit(page_size).all()
+        query = query.where(Project.status == status)
+    
+    # 计算总数（同一筛选条件短时间内复用）
+    total = None
+    if with_total:
+        count_key = (keyword, status)
+        total = CountCache.get("projects", count_key)
+        if total is None:
+            total = await db.scalar(
+                select(func.count()).select_from(query.with_only_columns(Project.id).subquery())
+            )
+            CountCache.set("projects", count_key, total)
+    
+    # 游标分页：只取游标之后的数据
+    cursor_mode = after_updated_at is not None and after_id is not None
+    if cursor_mode:
+        # SQLite 中 CURRENT_TIMESTAMP 写入的时间不带小数秒，而绑定参数带小数秒，按文本比较前统一格式
+        cursor_time = func.datetime(after_updated_at) if dialect_name == "sqlite" else after_updated_at
+        # 行值比较可直接定位到索引位置（展开为 OR 条件时 SQLite 会退化为扫描）
+        query = query.where(tuple_(Project.updated_at, Project.id) < tuple_(cursor_time, after_id))
+    else:
+        query = query.offset((page - 1) * page_size)
+    
+    # 按更新时间倒序排列（ID 保证相同更新时间下顺序稳定），多取一条判断是否还有下一页
+    query = query.order_by(Project.updated_at.desc(), Project.id.desc()).limit(page_size + 1)
+    rows = (await db.execute(query)).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    
+    # 构造响应（与 PageResponse 结构相同，行元组直接序列化）
+    page_data = {
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "items": rows_to_dicts(rows),
+        "has_more": has_more,
+        "next_cursor": (
+            {"after_updated_at": rows[-1].updated_at.isoformat(), "after_id": rows[-1].id}
+            if has_more else None
+        ),
+    }
     
-    # 构造响应
-    items = [ProjectListItem.model_validate(p) for p in projects]
-    page_data = PageResponse(
-        total=total,
-        page=page,
-        page_size=page_size,
-        items=items
+    return fast_success_response(data=page_data, message="获取项目列表成功")
+
+
+def _keyword_filter(keyword: str, dialect_name: str):
+    """
+    关键词搜索条件
+    MySQL 使用 ngram 全文索引做短语匹配；关键词短于 ngram 长度或其他数据库时回退为 LIKE
+    """
+    phrase = keyword.replace('"', ' ').strip()
+    if (
+        settings.PROJECT_SEARCH_FULLTEXT
+        and dialect_name == "mysql"
+        and len(phrase) >= settings.PROJECT_SEARCH_NGRAM_SIZE
+    ):
+        return match(Project.name, Project.description, against=f'"{phrase}"').in_boolean_mode()
+    return or_(
+        Project.name.contains(keyword, autoescape=True),
+        Project.description.contains(keyword, autoescape=True)
     )
-    
-    return success_response(data=page_data.model_dump(), message="获取项目列表成功")
 
 
 @router.get("/{project_id}", response_model=dict)
-async def get_project(project_id: int, db: Session = Depends(get_db)):
+async def get_project(project_id: int, db: AsyncSession = Depends(get_async_db)):
     """获取项目详情"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise NotFoundException(message=f"项目 ID {project_id} 不存在")
     
@@ -75,13 +129,14 @@ async def get_project(project_id: int, db: Session = Depends(get_db)):
 @router.post("/", response_model=dict)
 async def create_project(
     project_data: ProjectCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """创建新项目"""
     new_project = Project(**project_data.model_dump())
     db.add(new_project)
-    db.commit()
-    db.refresh(new_project)
+    await db.commit()
+    await db.refresh(new_project)
+    CountCache.invalidate("projects")
     
     return success_response(
         data=ProjectInDB.model_validate(new_project).model_dump(),
@@ -93,10 +148,10 @@ async def create_project(
 async def update_project(
     project_id: int,
     project_data: ProjectUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """更新项目信息"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise NotFoundException(message=f"项目 ID {project_id} 不存在")
     
@@ -105,8 +160,9 @@ async def update_project(
     for field, value in update_data.items():
         setattr(project, field, value)
     
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    await db.refresh(project)
+    CountCache.invalidate("projects")
     
     return success_response(
         data=ProjectInDB.model_validate(project).model_dump(),
@@ -115,25 +171,67 @@ async def update_project(
 
 
 @router.delete("/{project_id}", response_model=dict)
-async def delete_project(project_id: int, db: Session = Depends(get_db)):
+async def delete_project(project_id: int, db: AsyncSession = Depends(get_async_db)):
     """删除项目"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise NotFoundException(message=f"项目 ID {project_id} 不存在")
     
-    db.delete(project)
-    db.commit()
+    # 集合式删除项目下的数据，磁盘文件提交后异步回收
+    chapter_ids = await db.run_sync(CascadeDeleteService.delete_project, project_id)
+    await db.commit()
+    CountCache.invalidate("projects")
+    StorageGC.schedule(project_ids=[project_id], chapter_ids=chapter_ids)
+    PrefetchService.cancel_chapters(chapter_ids)
     
     return success_response(message="删除项目成功")
 
 
-@router.get("/{project_id}/statistics", response_model=dict)
-async def get_project_statistics(project_id: int, db: Session = Depends(get_db)):
-    """获取项目统计信息"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+@router.get("/{project_id}/estimate", response_model=dict)
+async def estimate_project_duration(project_id: int, db: AsyncSession = Depends(get_async_db)):
+    """预估项目音频总时长（按章节汇总）"""
+    project = await db.get(Project, project_id)
     if not project:
         raise NotFoundException(message=f"项目 ID {project_id} 不存在")
     
+    chapter_ids = (await db.execute(
+        select(Chapter.id).where(
+            Chapter.project_id == project_id
+        ).order_by(Chapter.order_index)
+    )).scalars().all()
+    
+    def estimate(sync_db):
+        return SpeechRateEstimator(sync_db).estimate_chapters(chapter_ids, sync_db)
+    
+    chapters = await db.run_sync(estimate)
+    
+    totals = {
+        key: round(sum(item[key] for item in chapters.values()), 3)
+        for key in ("estimated_duration", "synthesized_duration", "pending_duration")
+    }
+    
+    return success_response(
+        data={
+            "project_id": project_id,
+            **totals,
+            "chapters": [{"chapter_id": cid, **chapters[cid]} for cid in chapter_ids]
+        },
+        message="预估项目时长成功"
+    )
+
+
+@router.get("/{project_id}/statistics", response_model=dict)
+async def get_project_statistics(project_id: int, db: AsyncSession = Depends(get_async_db)):
+    """获取项目统计信息（读取增量维护的统计行）"""
+    row = (await db.execute(
+        select(Project, ProjectStats).outerjoin(
+            ProjectStats, ProjectStats.project_id == Project.id
+        ).where(Project.id == project_id)
+    )).first()
+    if not row:
+        raise NotFoundException(message=f"项目 ID {project_id} 不存在")
+    project, stats = row
+    
     # 构造统计数据
     statistics = {
         "project_id": project.id,
@@ -141,6 +239,11 @@ async def get_project_statistics(project_id: int, db: Session = Depends(get_db))
         "chapters_count": project.chapters_count,
         "characters_count": project.characters_count,
         "total_duration": project.total_duration,
+        "dialogue_count": stats.dialogue_count if stats else 0,
+        "pending_count": stats.pending_count if stats else 0,
+        "generating_count": stats.generating_count if stats else 0,
+        "completed_count": stats.completed_count if stats else 0,
+        "error_count": stats.error_count if stats else 0,
         "status": project.status,
         "created_at": project.created_at,
         "updated_at": project.updated_at,
@@ -1,11 +1,34 @@
 """数据库连接和会话管理"""
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from contextlib import asynccontextmanager
+from typing import Generator, AsyncGenerator
+import asyncio
+import os
+import weakref
 
 from app.core.config import settings
 
+# 同步驱动URL前缀 -> 异步驱动URL前缀
+ASYNC_DRIVERS = {
+    "mysql+pymysql://": "mysql+aiomysql://",
+    "mysql://": "mysql+aiomysql://",
+    "sqlite://": "sqlite+aiosqlite://",
+}
+
+
+def get_async_database_url() -> str:
+    """获取异步数据库URL（未显式配置时由 DATABASE_URL 推导）"""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    for sync_prefix, async_prefix in ASYNC_DRIVERS.items():
+        if settings.DATABASE_URL.startswith(sync_prefix):
+            return async_prefix + settings.DATABASE_URL[len(sync_prefix):]
+    return settings.DATABASE_URL
+
 # 创建数据库引擎
 engine = create_engine(
     settings.DATABASE_URL,
@@ -18,6 +41,34 @@ engine = create_engine(
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 创建异步数据库引擎（API路由使用，查询不阻塞事件循环）
+# aiosqlite 默认不复用连接（每次新建连接和工作线程），文件数据库同样使用连接池
+_async_url = get_async_database_url()
+async_engine = create_async_engine(
+    _async_url,
+    echo=settings.DEBUG,
+    **({} if ":memory:" in _async_url else {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_pre_ping": True,
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+    })
+)
+
+# 创建异步会话工厂（提交后不过期对象，避免在异步上下文中触发隐式加载）
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# SQLite 同一时间只允许一个写事务，本进程的写事务按事件循环排队（见 write_lock）
+_write_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+# Alembic 配置文件（backend/alembic.ini）
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "alembic.ini")
+
 # 声明基类
 Base = declarative_base()
 
@@ -31,7 +82,43 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+@asynccontextmanager
+async def write_lock():
+    """
+    SQLite 下串行化本进程中并发的写事务（在事务的第一条写语句之前进入，提交后退出），
+    避免并发会话互相阻塞导致 "database is locked"；其它数据库使用行锁，不加锁
+    """
+    if async_engine.dialect.name != "sqlite":
+        yield
+        return
+    loop = asyncio.get_running_loop()
+    lock = _write_locks.get(loop)
+    if lock is None:
+        lock = _write_locks[loop] = asyncio.Lock()
+    async with lock:
+        yield
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """获取异步数据库会话的依赖项"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
-    """初始化数据库（创建所有表）"""
+    """初始化数据库（创建所有表，并将已有数据库迁移到最新版本）"""
     Base.metadata.create_all(bind=engine)
+    if settings.DATABASE_AUTO_MIGRATE:
+        run_migrations()
+
+
+def run_migrations(revision: str = "head"):
+    """执行 Alembic 迁移（与命令行 alembic upgrade 相同）"""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
 
@@ -0,0 +1,377 @@
+"""运行指标（Prometheus 文本格式）"""
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+import asyncio
+import math
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+# Prometheus 文本格式的 Content-Type（Response 会补充 charset）
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# 默认耗时分桶（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    """指标基类：按标签值保存子序列"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            # 无标签的指标从 0 开始导出
+            self.labels()
+        REGISTRY.register(self)
+
+    def labels(self, *values, **kwargs):
+        """取标签值对应的子序列（按位置或名称传入）"""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple("" if value is None else str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples(),
+        ]
+
+    def _label_text(self, values: LabelValues, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Value:
+    """单个数值（加法在 GIL 下不是原子操作，使用锁）"""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    """只增计数器"""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{self._label_text(key)} {_format(child.value)}"
+            for key, child in list(self._children.items())
+        ]
+
+
+class Gauge(Counter):
+    """可增可减的瞬时值"""
+
+    kind = "gauge"
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            if index < len(self.counts):
+                self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+
+class Histogram(_Metric):
+    """分桶直方图（累计分桶在导出时计算，记录时只增加一个桶）"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = self._label_text(key, 'le="%s"' % _format(bound))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = self._label_text(key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {_format(total)}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {count}")
+        return lines
+
+
+class _Timer:
+    """with 块耗时（秒）记入直方图"""
+
+    def __init__(self, histogram: _HistogramValue):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        self.histogram.observe(self.elapsed)
+
+
+class Registry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if value.is_integer():
+            return str(int(value))
+    return repr(value)
+
+
+REGISTRY = Registry()
+
+# HTTP
+HTTP_REQUESTS = Counter(
+    "asr_http_requests_total", "HTTP 请求数", ("method", "route", "status")
+)
+HTTP_LATENCY = Histogram(
+    "asr_http_request_duration_seconds", "HTTP 请求耗时（秒）", ("method", "route")
+)
+DB_QUERIES = Histogram(
+    "asr_db_queries_per_request", "每个请求执行的SQL语句数", ("route",),
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233, 500, 1000)
+)
+
+# TTS
+TTS_LATENCY = Histogram(
+    "asr_tts_synthesis_seconds", "TTS 合成耗时（秒）", ("engine", "voice", "outcome")
+)
+TTS_CHARS_PER_SECOND = Histogram(
+    "asr_tts_chars_per_second", "TTS 合成速度（每秒合成的字数）", ("engine",),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+)
+TTS_CHARS = Counter("asr_tts_characters_total", "提交 TTS 合成的字数", ("engine",))
+TTS_AUDIO_SECONDS = Counter("asr_tts_audio_seconds_total", "合成的音频时长（秒）", ("engine",))
+TTS_RETRIES = Counter(
+    "asr_tts_retries_total", "TTS 合成重试次数（reason: rate_limited/error）", ("engine", "reason")
+)
+TTS_RATE_LIMIT = Gauge("asr_tts_rate_limit", "TTS 引擎当前的自适应限速（每秒请求数，0表示不限速）", ("engine",))
+TTS_CIRCUIT_STATE = Gauge("asr_tts_circuit_state", "TTS 引擎熔断状态（0关闭 1半开 2打开）", ("engine",))
+TTS_FAILOVERS = Counter(
+    "asr_tts_failovers_total", "合成失败后切换到等效音色的次数", ("from_engine", "to_engine")
+)
+TTS_HEDGES = Counter(
+    "asr_tts_hedged_requests_total", "对冲请求次数（outcome: launched/won）", ("engine", "outcome")
+)
+TTS_QUEUE_WAIT = Histogram(
+    "asr_tts_queue_wait_seconds", "合成请求等待调度名额的时间（秒）", ("priority",)
+)
+TTS_SCHEDULER_ACTIVE = Gauge("asr_tts_scheduler_active", "占用合成名额的请求数", ("priority",))
+TTS_SCHEDULER_QUEUED = Gauge("asr_tts_scheduler_queued", "等待合成名额的请求数", ("priority",))
+SYNTHESIS_DEDUPED = Counter(
+    "asr_synthesis_deduplicated_total", "沿用并发请求结果而未重复合成的次数（scope: process/lease）", ("scope",)
+)
+PREFETCH = Counter(
+    "asr_prefetch_total", "试听预生成的对话数（outcome: scheduled/completed/skipped/cancelled/failed）", ("outcome",)
+)
+
+# 批量生成队列
+BATCH_QUEUE_DEPTH = Gauge("asr_batch_queue_depth", "批量生成任务中尚未处理的对话数")
+BATCH_JOBS = Gauge("asr_batch_jobs_active", "正在执行的批量生成任务数")
+
+# 导出
+EXPORT_LATENCY = Histogram(
+    "asr_export_duration_seconds", "音频导出耗时（秒）", ("kind", "format"),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+)
+EXPORT_BYTES = Histogram(
+    "asr_export_bytes", "导出文件大小（字节）", ("kind", "format"),
+    buckets=tuple(2 ** power for power in range(16, 34, 2))
+)
+
+# 缓存
+CACHE_REQUESTS = Counter(
+    "asr_cache_requests_total", "缓存查询次数（result: hit/miss/not_modified）", ("cache", "result")
+)
+
+# 事件循环
+EVENT_LOOP_LAG = Histogram(
+    "asr_event_loop_lag_seconds", "事件循环调度延迟（秒）",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+# 当前请求执行的SQL语句数（由中间件设置，未在请求中时为 None）
+_query_count: ContextVar[Optional[List[int]]] = ContextVar("metrics_query_count", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_count.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+class MetricsMiddleware:
+    """
+    记录每个请求的耗时、状态码和SQL语句数（纯 ASGI 中间件，不包装请求/响应对象）
+    按路由模板（如 /api/dialogues/{dialogue_id}）聚合，未匹配路由的请求记为 unmatched
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+        queries = [0]
+        recorded = [False]
+        start = time.perf_counter()
+
+        def record():
+            # 响应体发送完毕时记录，不计入之后执行的后台任务
+            if recorded[0]:
+                return
+            recorded[0] = True
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, route, status[0]).inc()
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - start)
+            DB_QUERIES.labels(route).observe(queries[0])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                record()
+
+        token = _query_count.set(queries)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _query_count.reset(token)
+            record()
+
+
+class EventLoopMonitor:
+    """定时休眠并测量实际唤醒时间与预期的差值，即事件循环被阻塞的时长"""
+
+    _task: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def start(cls):
+        if settings.METRICS_ENABLED and settings.METRICS_LOOP_LAG_INTERVAL > 0:
+            cls._task = asyncio.create_task(cls._run(settings.METRICS_LOOP_LAG_INTERVAL))
+
+    @classmethod
+    async def stop(cls):
+        if cls._task is not None:
+            cls._task.cancel()
+            await asyncio.gather(cls._task, return_exceptions=True)
+            cls._task = None
+
+    @staticmethod
+    async def _run(interval: float):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            EVENT_LOOP_LAG.observe(max(loop.time() - start - interval, 0.0))
@@ -0,0 +1,317 @@
+"""按需性能剖析（单个请求或后台任务）"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import parse_qs
+import asyncio
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+# 触发剖析的请求头 / 查询参数
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY = "profile"
+# 响应头返回剖析结果的文件名前缀
+PROFILE_ID_HEADER = b"x-profile-id"
+
+# SQL 日志中参数的最大长度
+_MAX_PARAMETERS_LENGTH = 200
+# 摘要中列出的函数数
+_SUMMARY_LINES = 40
+
+# 同一时间只进行一次剖析（cProfile 按线程生效，并发剖析会互相覆盖；采样结果也会混在一起）
+_lock = threading.Lock()
+
+# 当前剖析（SQL 语句记入其日志）
+_active: ContextVar[Optional["Profile"]] = ContextVar("profile_active", default=None)
+# 当前请求要求剖析（请求的后台任务沿用）
+_requested: ContextVar[bool] = ContextVar("profile_requested", default=False)
+
+
+def profiles_dir() -> str:
+    return settings.PROFILING_PATH or os.path.join(settings.STORAGE_PATH, "profiles")
+
+
+class _Sampler:
+    """
+    采样剖析器：后台线程定时读取各线程的调用栈并按栈计数
+    可同时看到事件循环线程和 asyncio.to_thread 工作线程（如音频合并）中的耗时
+    """
+
+    def __init__(self, interval: float):
+        self.interval = max(interval, 0.001)
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """折叠栈格式（flamegraph.pl / speedscope 可直接打开）"""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> str:
+        """按自身/累计采样数排列的函数"""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            # 去掉开头的线程名和行号
+            functions = [item.rsplit(":", 1)[0] for item in stack[1:]]
+            if functions:
+                own[functions[-1]] += count
+            for function in set(functions):
+                total[function] += count
+
+        lines = [f"采样间隔 {self.interval * 1000:g}ms，共 {self.samples} 次采样", "", "自身耗时（采样数）:"]
+        lines += [f"{count:8d}  {function}" for function, count in own.most_common(_SUMMARY_LINES)]
+        lines += ["", "累计耗时（采样数）:"]
+        lines += [f"{count:8d}  {function}" for function, count in total.most_common(_SUMMARY_LINES)]
+        return "\n".join(lines)
+
+
+class Profile:
+    """
+    一次剖析：cProfile（确定性，仅当前线程）或采样（所有线程），外加期间执行的SQL语句日志
+    结果保存在 profiles_dir() 下，同一前缀的文件:
+        .prof / .collapsed  剖析数据（cProfile 可用 snakeviz 打开，采样为折叠栈）
+        .txt                摘要（耗时最多的函数、SQL 统计）
+        .sql.jsonl          SQL 语句日志，每行一条
+    """
+
+    def __init__(self, name: str, mode: Optional[str] = None):
+        self.mode = mode or settings.PROFILING_MODE
+        slug = re.sub(r"[^0-9A-Za-z_.-]+", "_", name).strip("_")[:80]
+        self.id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{slug}-{uuid.uuid4().hex[:6]}"
+        self.name = name
+        self.statements: List[Dict] = []
+        self.elapsed = 0.0
+        self.running = False
+        self._profiler = None
+        self._start = 0.0
+
+    def start(self) -> bool:
+        """开始剖析（已有剖析在进行时返回 False）"""
+        if not _lock.acquire(blocking=False):
+            return False
+        if self.mode == "sample":
+            self._profiler = _Sampler(settings.PROFILING_SAMPLE_INTERVAL)
+            self._profiler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._start = time.perf_counter()
+        self.running = True
+        return True
+
+    def stop(self):
+        """结束剖析（可重复调用）"""
+        if not self.running:
+            return
+        self.running = False
+        self.elapsed = time.perf_counter() - self._start
+        if isinstance(self._profiler, _Sampler):
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+        _lock.release()
+
+    def save(self) -> str:
+        """保存剖析结果，返回文件路径前缀"""
+        directory = profiles_dir()
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.id)
+
+        if isinstance(self._profiler, _Sampler):
+            with open(base + ".collapsed", "w", encoding="utf-8") as f:
+                f.write(self._profiler.collapsed())
+            detail = self._profiler.summary()
+        else:
+            self._profiler.dump_stats(base + ".prof")
+            buffer = io.StringIO()
+            pstats.Stats(self._profiler, stream=buffer).sort_stats("cumulative").print_stats(_SUMMARY_LINES)
+            detail = buffer.getvalue()
+
+        with open(base + ".sql.jsonl", "w", encoding="utf-8") as f:
+            for statement in self.statements:
+                f.write(json.dumps(statement, ensure_ascii=False) + "\n")
+
+        sql_ms = sum(statement["duration_ms"] for statement in self.statements)
+        slowest = sorted(self.statements, key=lambda item: item["duration_ms"], reverse=True)[:5]
+        lines = [
+            f"{self.name}",
+            f"模式: {self.mode}  耗时: {self.elapsed * 1000:.2f}ms",
+            f"SQL: {len(self.statements)} 条，共 {sql_ms:.2f}ms",
+        ]
+        lines += [f"  {item['duration_ms']:8.2f}ms  {' '.join(item['statement'].split())[:120]}" for item in slowest]
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n\n" + detail)
+        return base
+
+
+@contextmanager
+def profile(name: str, mode: Optional[str] = None) -> Iterator[Optional[Profile]]:
+    """
+    剖析 with 块并保存结果（已有剖析在进行时不剖析，返回 None）
+    块内的 await 期间事件循环执行的其它任务同样计入
+    """
+    item = Profile(name, mode)
+    if not item.start():
+        print(f"⚠️ 已有剖析在进行，跳过: {name}")
+        yield None
+        return
+    token = _active.set(item)
+    try:
+        yield item
+    finally:
+        item.stop()
+        _active.reset(token)
+        _save(item)
+
+
+def _save(item: Profile):
+    try:
+        print(f"🔬 剖析结果已保存: {item.save()}")
+    except Exception as e:
+        print(f"⚠️ 保存剖析结果失败: {e}")
+
+
+@contextmanager
+def job(name: str) -> Iterator[Optional[Profile]]:
+    """
+    剖析后台任务（如 batch_generate）
+    发起任务的请求要求了剖析，或按 PROFILING_JOB_SAMPLE_RATE 抽中时剖析
+    """
+    sampled = settings.PROFILING_JOB_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_JOB_SAMPLE_RATE
+    if not settings.PROFILING_ENABLED or not (_requested.get() or sampled):
+        yield None
+        return
+    with profile(f"job {name}") as item:
+        yield item
+
+
+def _trigger(scope) -> bool:
+    """请求头 X-Profile 或查询参数 profile 要求剖析（设置了 PROFILING_TOKEN 时须与其一致）"""
+    value = dict(scope.get("headers") or []).get(PROFILE_HEADER, b"").decode("latin-1")
+    if not value and scope.get("query_string"):
+        values = parse_qs(scope["query_string"].decode("latin-1")).get(PROFILE_QUERY)
+        value = values[0] if values else ""
+    value = value.strip()
+    if settings.PROFILING_TOKEN:
+        return value == settings.PROFILING_TOKEN
+    return value.lower() not in ("", "0", "false", "no")
+
+
+# SQLAlchemy：剖析期间记录每条语句
+
+_SQL_START_KEY = "profile_sql_start"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active.get() is None:
+        return
+    conn.info.setdefault(_SQL_START_KEY, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    item = _active.get()
+    stack = conn.info.get(_SQL_START_KEY)
+    if item is None or not stack:
+        return
+    start = stack.pop()
+    if not item.running:
+        return
+    item.statements.append({
+        "offset_ms": round((start - item._start) * 1000, 3),
+        "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+        "statement": statement,
+        "parameters": repr(parameters)[:_MAX_PARAMETERS_LENGTH],
+        "rowcount": cursor.rowcount if cursor is not None else None,
+        "executemany": executemany,
+    })
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    conn = context.connection
+    stack = conn.info.get(_SQL_START_KEY) if conn is not None else None
+    if stack:
+        stack.pop()
+
+
+class ProfilingMiddleware:
+    """
+    PROFILING_ENABLED 时，按请求头 X-Profile 或查询参数 profile 剖析单个请求，
+    响应头 X-Profile-Id 返回结果文件名前缀
+    剖析在响应体发送完毕时结束；请求的后台任务通过 job() 另行剖析
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED or not _trigger(scope):
+            await self.app(scope, receive, send)
+            return
+
+        item = Profile(f"{scope['method']} {scope['path']}")
+        if not item.start():
+            print(f"⚠️ 已有剖析在进行，跳过: {item.name}")
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (PROFILE_ID_HEADER, item.id.encode())]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # 响应发送完毕即结束剖析，之后的后台任务可以再开始剖析
+                item.stop()
+
+        requested = _requested.set(True)
+        active = _active.set(item)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            item.stop()
+            _active.reset(active)
+            _requested.reset(requested)
+            await asyncio.to_thread(_save, item)
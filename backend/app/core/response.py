@@ -1,7 +1,18 @@
 """统一响应格式"""
-from typing import Any, Optional, Generic, TypeVar
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Generic, TypeVar
+import json
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 
+try:
+    import orjson
+except ImportError:  # 未安装时回退到标准库 json（结果相同，速度较慢）
+    orjson = None
+
 T = TypeVar('T')
 
 
@@ -32,8 +43,67 @@ def error_response(message: str = "操作失败", code: int = 400) -> dict:
 
 class PageResponse(BaseModel, Generic[T]):
     """分页响应模型"""
-    total: int
+    total: Optional[int]  # 未统计总数时为 None
     page: int
     page_size: int
     items: list[T]
 
+
+def _default(obj: Any) -> Any:
+    """orjson 不直接支持的类型"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    """序列化为 UTF-8 JSON（枚举取值，datetime 为 ISO 格式，与 FastAPI 默认输出一致）"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(
+        jsonable_encoder(obj), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+@lru_cache(maxsize=256)
+def _success_prefix(message: str) -> bytes:
+    """预先序列化的成功响应外层（data 之前的部分）"""
+    return b'{"code":200,"message":' + dumps(message) + b',"data":'
+
+
+def render_success(data: Any = None, message: str = "操作成功") -> bytes:
+    """将成功响应直接序列化为字节（与 success_response 的结构相同）"""
+    return _success_prefix(message) + dumps(data) + b"}"
+
+
+def fast_success_response(data: Any = None, message: str = "操作成功") -> Response:
+    """
+    成功响应的快速路径
+    data 应为 dict/list/基本类型（如 rows_to_dicts 的结果），跳过 Pydantic 校验和 FastAPI 的逐层编码
+    """
+    return Response(content=render_success(data, message), media_type="application/json")
+
+
+def list_columns(schema: type, model: type, **overrides) -> List[Any]:
+    """
+    按列表项Schema的字段顺序取模型的列（以字段名为标签），用于直接查询行元组
+
+    Args:
+        schema: 列表项Schema（如 DialogueListItem）
+        model: ORM模型
+        overrides: 不在模型上的字段对应的列，如 character_name=Character.name
+    """
+    return [
+        (overrides[name] if name in overrides else getattr(model, name)).label(name)
+        for name in schema.model_fields
+    ]
+
+
+def rows_to_dicts(rows) -> List[Dict[str, Any]]:
+    """将查询结果行转换为字典列表（键为列标签）"""
+    if not rows:
+        return []
+    keys = list(rows[0]._fields)
+    return [dict(zip(keys, row)) for row in rows]
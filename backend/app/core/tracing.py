@@ -0,0 +1,401 @@
+"""请求级链路追踪"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, Iterator, List, Optional
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+# OTLP 中的 span kind / status code
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_OK, STATUS_ERROR = 1, 2
+
+SERVICE_NAME = "asr-story-backend"
+
+# W3C traceparent: 版本-trace_id-parent_id-flags
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# SQL 语句写入 span 属性时的最大长度
+_MAX_STATEMENT_LENGTH = 500
+
+
+class SpanContext:
+    """跨进程/任务传递的追踪上下文"""
+
+    __slots__ = ("trace_id", "span_id")
+
+    def __init__(self, trace_id: str, span_id: str):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    @classmethod
+    def from_traceparent(cls, header: Optional[str]) -> Optional["SpanContext"]:
+        match = _TRACEPARENT.match((header or "").strip().lower())
+        if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+            return None
+        return cls(match.group(1), match.group(2))
+
+
+class Span:
+    """
+    一个计时片段（字段与 OpenTelemetry span 对应）
+    同一进程内的一棵 span 树（本地根 span 及其后代）在根 span 结束时一并导出
+    """
+
+    __slots__ = (
+        "name", "context", "parent_id", "kind", "start_ns", "end_ns",
+        "attributes", "status", "status_message", "_root", "_finished"
+    )
+
+    def __init__(self, name: str, context: SpanContext, parent_id: Optional[str], kind: int,
+                 root: Optional["Span"], attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.status = 0
+        self.status_message = ""
+        self._root = root or self
+        # 仅本地根 span 使用：已结束的后代 span
+        self._finished: Optional[List["Span"]] = [] if root is None else None
+
+    @property
+    def trace_id(self) -> str:
+        return self.context.trace_id
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException):
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(exc).__name__}: {exc}"
+
+    def end(self):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        root = self._root
+        if root is self:
+            _export(self, self._finished)
+        elif root._finished is not None:
+            root._finished.append(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+class _NoopSpan:
+    """未启用追踪或未采样时使用，所有操作为空"""
+
+    trace_id = None
+    context = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_exception(self, exc: BaseException):
+        pass
+
+    def end(self):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current: ContextVar[Optional[Span]] = ContextVar("trace_current_span", default=None)
+
+
+def enabled() -> bool:
+    return settings.TRACING_EXPORTER != "none"
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def current_context() -> Optional[SpanContext]:
+    """当前 span 的上下文（交给后台任务时使用）"""
+    item = _current.get()
+    return item.context if item is not None else None
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+def start_span(
+    name: str,
+    attributes: Optional[Dict[str, Any]] = None,
+    kind: int = KIND_INTERNAL,
+    parent: Optional[SpanContext] = None,
+    root: bool = False
+):
+    """
+    创建 span（不设为当前 span，需自行调用 end）
+
+    Args:
+        name: 名称
+        attributes: 属性
+        kind: KIND_INTERNAL/KIND_SERVER/KIND_CLIENT
+        parent: 远端或其它任务传来的父上下文（如请求头中的 traceparent、提交后台任务时的上下文）
+        root: 当前没有 span 时是否新建追踪（请求入口和后台任务为 True，其余仅在已有追踪时记录）
+    """
+    if not enabled():
+        return NOOP_SPAN
+    current = _current.get()
+    if parent is None and current is not None:
+        if current._root.end_ns is None:
+            return Span(name, SpanContext(current.trace_id, _new_id(64)), current.context.span_id,
+                        kind, current._root, attributes)
+        # 当前 span 树已导出（如响应发送后执行的后台任务），只有入口 span 另起一棵树
+        if not root:
+            return NOOP_SPAN
+        parent = current.context
+    if parent is None and not root:
+        return NOOP_SPAN
+    if parent is None and random.random() >= settings.TRACING_SAMPLE_RATE:
+        return NOOP_SPAN
+    trace_id = parent.trace_id if parent is not None else _new_id(128)
+    parent_id = parent.span_id if parent is not None else None
+    return Span(name, SpanContext(trace_id, _new_id(64)), parent_id, kind, None, attributes)
+
+
+@contextmanager
+def span(
+    name: str,
+    attributes: Optional[Dict[str, Any]] = None,
+    kind: int = KIND_INTERNAL,
+    parent: Optional[SpanContext] = None,
+    root: bool = False
+) -> Iterator[Any]:
+    """
+    在 with 块内记录一个 span 并设为当前 span（同步和异步代码均可使用）
+    异常会记录到 span 上并继续抛出
+    """
+    item = start_span(name, attributes, kind, parent, root)
+    if item is NOOP_SPAN:
+        yield item
+        return
+    token = _current.set(item)
+    try:
+        yield item
+    except BaseException as e:
+        item.record_exception(e)
+        raise
+    finally:
+        _current.reset(token)
+        item.end()
+
+
+def traced(name: str):
+    """函数装饰器：在已有追踪中为每次调用记录一个 span（支持异步函数）"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current.get() is None:
+                    return await func(*args, **kwargs)
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# 导出
+
+_export_lock = threading.Lock()
+
+
+def _attribute_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(item: Span) -> Dict[str, Any]:
+    result = {
+        "traceId": item.trace_id,
+        "spanId": item.context.span_id,
+        "name": item.name,
+        "kind": item.kind,
+        "startTimeUnixNano": str(item.start_ns),
+        "endTimeUnixNano": str(item.end_ns),
+        "attributes": [{"key": key, "value": _attribute_value(value)} for key, value in item.attributes.items()],
+        "status": {"code": item.status or STATUS_OK},
+    }
+    if item.parent_id:
+        result["parentSpanId"] = item.parent_id
+    if item.status_message:
+        result["status"]["message"] = item.status_message
+    return result
+
+
+def to_otlp(spans: List[Span]) -> Dict[str, Any]:
+    """OTLP/JSON 格式（可由 OpenTelemetry Collector 的 otlpjsonfile 接收器读取）"""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": "app"}, "spans": [_otlp_span(item) for item in spans]}],
+    }]}
+
+
+def _export(root: Span, descendants: List[Span]):
+    spans = [root, *descendants]
+    try:
+        if settings.TRACING_EXPORTER == "file":
+            line = json.dumps(to_otlp(spans), ensure_ascii=False)
+            path = settings.TRACING_FILE or os.path.join(settings.STORAGE_PATH, "traces", "spans.jsonl")
+            with _export_lock:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        elif settings.TRACING_EXPORTER == "console":
+            if root.duration_ms >= settings.TRACING_CONSOLE_MIN_MS:
+                print(format_tree(spans))
+    except Exception as e:
+        print(f"⚠️ 导出追踪数据失败: {e}")
+
+
+def format_tree(spans: List[Span]) -> str:
+    """按父子关系缩进输出各 span 的耗时"""
+    children: Dict[Optional[str], List[Span]] = {}
+    ids = {item.context.span_id for item in spans}
+    for item in spans:
+        parent = item.parent_id if item.parent_id in ids else None
+        children.setdefault(parent, []).append(item)
+
+    lines = []
+
+    def walk(parent: Optional[str], depth: int):
+        for item in sorted(children.get(parent, []), key=lambda s: s.start_ns):
+            status = " ❌ " + item.status_message if item.status == STATUS_ERROR else ""
+            detail = " ".join(str(item.attributes.get("db.statement", "")).split())
+            detail = f"  {detail[:80]}" if detail else ""
+            lines.append(f"{'  ' * depth}{item.name} {item.duration_ms:.2f}ms{status}{detail}")
+            walk(item.context.span_id, depth + 1)
+
+    walk(None, 0)
+    return f"🔍 trace {spans[0].trace_id}\n" + "\n".join(lines)
+
+
+# SQLAlchemy：在已有追踪中为每条语句记录一个 span
+
+_DB_SPANS_KEY = "trace_spans"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is None:
+        return
+    item = start_span("db.query", {
+        "db.system": conn.dialect.name,
+        "db.statement": statement[:_MAX_STATEMENT_LENGTH],
+    }, kind=KIND_CLIENT)
+    if executemany:
+        item.set_attribute("db.executemany", True)
+    conn.info.setdefault(_DB_SPANS_KEY, []).append(item)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stack = conn.info.get(_DB_SPANS_KEY)
+    if stack:
+        item = stack.pop()
+        if cursor is not None and cursor.rowcount is not None and cursor.rowcount >= 0:
+            item.set_attribute("db.rowcount", cursor.rowcount)
+        item.end()
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    conn = context.connection
+    stack = conn.info.get(_DB_SPANS_KEY) if conn is not None else None
+    if stack:
+        item = stack.pop()
+        item.record_exception(context.original_exception)
+        item.end()
+
+
+class TracingMiddleware:
+    """
+    为每个请求创建服务端 span（继承请求头 traceparent），响应头返回 traceparent
+    span 在响应体发送完毕时结束，不包含之后执行的后台任务（后台任务另起 span，属于同一追踪）
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not enabled():
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        parent = SpanContext.from_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        request_span = start_span(
+            f"{scope['method']} {scope['path']}",
+            {"http.method": scope["method"], "http.target": scope["path"]},
+            kind=KIND_SERVER, parent=parent, root=True
+        )
+        if request_span is NOOP_SPAN:
+            await self.app(scope, receive, send)
+            return
+
+        def finish():
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                request_span.name = f"{scope['method']} {route}"
+                request_span.set_attribute("http.route", route)
+            request_span.end()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                request_span.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    request_span.status = STATUS_ERROR
+                message.setdefault("headers", [])
+                message["headers"] = [
+                    *message["headers"], (b"traceparent", request_span.context.traceparent.encode())
+                ]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        token = _current.set(request_span)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            request_span.record_exception(e)
+            raise
+        finally:
+            _current.reset(token)
+            finish()
@@ -4,6 +4,10 @@ from app.models.chapter import Chapter, ChapterStatus
 from app.models.character import Character
 from app.models.dialogue import Dialogue, DialogueType, DialogueStatus
 from app.models.audio_export import AudioExport
+from app.models.parse_result import ParseResult
+from app.models.speech_rate import SpeechRate
+from app.models.synthesis_lease import SynthesisLease
+from app.models.statistics import ChapterStats, ProjectStats
 
 __all__ = [
     "Project",
@@ -15,5 +19,10 @@ __all__ = [
     "DialogueType",
     "DialogueStatus",
     "AudioExport",
+    "ParseResult",
+    "SpeechRate",
+    "SynthesisLease",
+    "ChapterStats",
+    "ProjectStats",
 ]
 
@@ -1,10 +1,11 @@
 """章节数据模型"""
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 import enum
 
 from app.core.database import Base
+from app.models.types import CompressedText
 
 
 class ChapterStatus(str, enum.Enum):
@@ -18,12 +19,18 @@ class ChapterStatus(str, enum.Enum):
 class Chapter(Base):
     """章节模型"""
     __tablename__ = "chapters"
+    __table_args__ = (
+        # 项目章节列表按顺序返回
+        Index("idx_chapters_project_order", "project_id", "order_index"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, comment="所属项目ID")
     title = Column(String(500), nullable=False, comment="章节标题")
     order_index = Column(Integer, nullable=False, comment="章节顺序")
-    content = Column(Text, comment="原始文本内容")
+    # 全文较大，默认延迟加载；需要时以 undefer(Chapter.content) 显式加载，
+    # 未加载就访问时直接报错，避免在列表查询中逐行补查
+    content = deferred(Column(CompressedText, comment="原始文本内容"), raiseload=True)
     word_count = Column(Integer, default=0, comment="字数统计")
     status = Column(
         SQLEnum(ChapterStatus),
@@ -1,5 +1,5 @@
 """角色数据模型"""
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, JSON, DateTime
+from sqlalchemy import Column, Integer, Float, String, Text, ForeignKey, Index, JSON, DateTime
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -9,14 +9,18 @@ from app.core.database import Base
 class Character(Base):
     """角色模型"""
     __tablename__ = "characters"
+    __table_args__ = (
+        # 按项目取角色及按名称匹配说话人
+        Index("idx_characters_project_name", "project_id", "name"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, comment="所属项目ID")
     name = Column(String(255), nullable=False, comment="角色名称")
     avatar = Column(String(500), comment="角色头像路径")
     description = Column(Text, comment="角色描述")
-    dialogue_count = Column(Integer, default=0, comment="对话数量")
-    total_duration = Column(Integer, default=0, comment="总时长(秒)")
+    dialogue_count = Column(Integer, default=0, comment="对话数量(由统计服务维护)")
+    total_duration = Column(Float, default=0.0, comment="已生成音频总时长(秒，由统计服务维护)")
     voice_config = Column(
         JSON,
         comment="声音配置 JSON {engine, voice_id, speed, pitch, volume, emotion}"
@@ -1,5 +1,5 @@
 """对话/旁白数据模型"""
-from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, Enum as SQLEnum, DateTime
+from sqlalchemy import Column, Integer, String, Text, Float, ForeignKey, Index, Enum as SQLEnum, DateTime
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -24,6 +24,13 @@ class DialogueStatus(str, enum.Enum):
 class Dialogue(Base):
     """对话/旁白模型"""
     __tablename__ = "dialogues"
+    __table_args__ = (
+        # 章节对话列表按 (order_index, id) 游标分页
+        Index("idx_dialogues_chapter_order", "chapter_id", "order_index"),
+        # 按状态取章节对话（导出已完成音频、待生成队列），按顺序返回无需排序
+        Index("idx_dialogues_chapter_status_order", "chapter_id", "status", "order_index"),
+        Index("idx_dialogues_character_id", "character_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     chapter_id = Column(Integer, ForeignKey("chapters.id"), nullable=False, comment="所属章节ID")
@@ -38,6 +45,7 @@ class Dialogue(Base):
     content = Column(Text, nullable=False, comment="对话文本内容")
     start_time = Column(Float, default=0.0, comment="开始时间(秒)")
     end_time = Column(Float, default=0.0, comment="结束时间(秒)")
+    duration = Column(Float, default=0.0, comment="音频时长(秒，毫秒精度)")
     audio_path = Column(String(500), comment="音频文件路径")
     status = Column(
         SQLEnum(DialogueStatus),
@@ -0,0 +1,19 @@
+"""文本解析结果缓存模型"""
+from sqlalchemy import Column, Integer, String, JSON, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class ParseResult(Base):
+    """文本解析结果缓存（按内容哈希 + 解析器版本索引）"""
+    __tablename__ = "parse_results"
+    __table_args__ = (
+        UniqueConstraint("content_hash", "parser_version", name="uq_parse_results_hash_version"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    content_hash = Column(String(64), nullable=False, comment="内容SHA-256哈希")
+    parser_version = Column(Integer, nullable=False, comment="解析器版本")
+    dialogues = Column(JSON, nullable=False, comment="解析出的对话/旁白片段列表")
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
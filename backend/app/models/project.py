@@ -1,5 +1,5 @@
 """项目数据模型"""
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, Index, Enum as SQLEnum
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -17,6 +17,16 @@ class ProjectStatus(str, enum.Enum):
 class Project(Base):
     """项目模型"""
     __tablename__ = "projects"
+    __table_args__ = (
+        # 列表按 (updated_at, id) 倒序游标分页
+        Index("idx_projects_updated_at_id", "updated_at", "id"),
+        Index("idx_projects_status_updated_at_id", "status", "updated_at", "id"),
+        # 名称/描述全文搜索（仅 MySQL，ngram 分词支持中文）
+        Index(
+            "ft_projects_name_description", "name", "description",
+            mysql_prefix="FULLTEXT", mysql_with_parser="ngram"
+        ).ddl_if(dialect="mysql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String(255), nullable=False, comment="项目名称")
@@ -28,9 +38,9 @@ class Project(Base):
         nullable=False,
         comment="项目状态"
     )
-    chapters_count = Column(Integer, default=0, comment="章节数量")
-    characters_count = Column(Integer, default=0, comment="角色数量")
-    total_duration = Column(Integer, default=0, comment="总时长(秒)")
+    chapters_count = Column(Integer, default=0, comment="章节数量(由统计服务维护)")
+    characters_count = Column(Integer, default=0, comment="角色数量(由统计服务维护)")
+    total_duration = Column(Float, default=0.0, comment="已生成音频总时长(秒，由统计服务维护)")
     created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
     updated_at = Column(
         DateTime(timezone=True),
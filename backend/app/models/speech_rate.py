@@ -0,0 +1,27 @@
+"""音色语速统计模型"""
+from sqlalchemy import Column, Integer, String, Float, Numeric, BigInteger, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class SpeechRate(Base):
+    """音色语速统计（按 引擎 + 音色 + 语速倍率 在线累计实际合成时长）"""
+    __tablename__ = "speech_rates"
+    __table_args__ = (
+        UniqueConstraint("engine", "voice_id", "speed", name="uq_speech_rates_voice"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    engine = Column(String(50), nullable=False, comment="TTS引擎")
+    voice_id = Column(String(255), nullable=False, comment="音色ID")
+    speed = Column(Numeric(4, 2, asdecimal=False), nullable=False, comment="语速倍率")
+    sample_count = Column(Integer, default=0, nullable=False, comment="样本数")
+    total_chars = Column(BigInteger, default=0, nullable=False, comment="累计字数")
+    total_seconds = Column(Float, default=0.0, nullable=False, comment="累计时长(秒)")
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        comment="更新时间"
+    )
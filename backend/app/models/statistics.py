@@ -0,0 +1,44 @@
+"""统计数据模型（由 StatsService 增量维护）"""
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class ChapterStats(Base):
+    """章节对话统计（每个章节一行）"""
+    __tablename__ = "chapter_stats"
+
+    chapter_id = Column(Integer, ForeignKey("chapters.id", ondelete="CASCADE"), primary_key=True, comment="章节ID")
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True, comment="所属项目ID")
+    dialogue_count = Column(Integer, nullable=False, default=0, comment="对话总数")
+    pending_count = Column(Integer, nullable=False, default=0, comment="待生成数")
+    generating_count = Column(Integer, nullable=False, default=0, comment="生成中数")
+    completed_count = Column(Integer, nullable=False, default=0, comment="已完成数")
+    error_count = Column(Integer, nullable=False, default=0, comment="生成出错数")
+    synthesized_duration = Column(Float, nullable=False, default=0.0, comment="已生成音频总时长(秒)")
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        comment="更新时间"
+    )
+
+
+class ProjectStats(Base):
+    """项目对话统计（每个项目一行，为各章节统计之和）"""
+    __tablename__ = "project_stats"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True, comment="项目ID")
+    dialogue_count = Column(Integer, nullable=False, default=0, comment="对话总数")
+    pending_count = Column(Integer, nullable=False, default=0, comment="待生成数")
+    generating_count = Column(Integer, nullable=False, default=0, comment="生成中数")
+    completed_count = Column(Integer, nullable=False, default=0, comment="已完成数")
+    error_count = Column(Integer, nullable=False, default=0, comment="生成出错数")
+    synthesized_duration = Column(Float, nullable=False, default=0.0, comment="已生成音频总时长(秒)")
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        comment="更新时间"
+    )
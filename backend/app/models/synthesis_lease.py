@@ -0,0 +1,17 @@
+"""对话合成租约模型"""
+from sqlalchemy import Column, Integer, String, Float
+
+from app.core.database import Base
+
+
+class SynthesisLease(Base):
+    """
+    对话合成租约：同一对话同一时间只由一个进程合成
+    持有者定期续约，进程退出未释放的租约过期后可被接管；合成完成后删除
+    """
+    __tablename__ = "synthesis_leases"
+
+    dialogue_id = Column(Integer, primary_key=True, autoincrement=False, comment="对话ID")
+    fingerprint = Column(String(64), nullable=False, comment="合成内容指纹（文本+音色配置）")
+    owner = Column(String(128), nullable=False, comment="持有者（主机:进程:随机串）")
+    expires_at = Column(Float, nullable=False, comment="过期时间（Unix时间戳，秒）")
@@ -0,0 +1,96 @@
+"""自定义列类型"""
+import zlib
+from typing import Optional
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects import mysql
+from sqlalchemy.types import TypeDecorator
+
+from app.core.config import settings
+
+# 压缩数据的头部标记（首字节 0x01 不会出现在正常文本开头），未带标记的值按 UTF-8 原文读取
+COMPRESSION_HEADERS = {
+    "zlib": b"\x01z",
+    "zstd": b"\x01s",
+}
+
+
+def _zstd():
+    """按需导入 zstandard（可选依赖）"""
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("使用 zstd 压缩章节内容需要安装 zstandard: pip install zstandard")
+    return zstandard
+
+
+def compress_text(text: str, method: str, min_bytes: int = 0) -> bytes:
+    """
+    编码文本，按指定方式压缩（压缩后不更小或不足 min_bytes 时保存原文）
+
+    Args:
+        text: 文本
+        method: 压缩方式 none/zlib/zstd
+        min_bytes: 启用压缩的最小字节数
+
+    Returns:
+        待存储的字节串
+    """
+    raw = text.encode("utf-8")
+    if method in ("", "none") or len(raw) < min_bytes:
+        return raw
+
+    if method == "zlib":
+        packed = zlib.compress(raw, 6)
+    elif method == "zstd":
+        packed = _zstd().ZstdCompressor(level=3).compress(raw)
+    else:
+        raise ValueError(f"不支持的压缩方式: {method}")
+
+    header = COMPRESSION_HEADERS[method]
+    if len(header) + len(packed) >= len(raw):
+        return raw
+    return header + packed
+
+
+def decompress_text(data: bytes) -> str:
+    """解码 compress_text 的结果（兼容未压缩的原文）"""
+    header = bytes(data[:2])
+    if header == COMPRESSION_HEADERS["zlib"]:
+        return zlib.decompress(data[2:]).decode("utf-8")
+    if header == COMPRESSION_HEADERS["zstd"]:
+        return _zstd().ZstdDecompressor().decompress(data[2:]).decode("utf-8")
+    return bytes(data).decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """
+    可压缩存储的长文本列
+    写入时按 CHAPTER_CONTENT_COMPRESSION 配置压缩，读取时根据头部标记自动解压，
+    切换配置不影响已存储的数据
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "mysql":
+            return dialect.type_descriptor(mysql.LONGBLOB())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return compress_text(
+            value,
+            settings.CHAPTER_CONTENT_COMPRESSION,
+            settings.CHAPTER_CONTENT_COMPRESS_MIN_BYTES
+        )
+
+    def process_result_value(self, value, dialect) -> Optional[str]:
+        if value is None:
+            return None
+        # 旧库中以文本类型存储的值（如 SQLite TEXT）直接返回
+        if isinstance(value, str):
+            return value
+        return decompress_text(value)
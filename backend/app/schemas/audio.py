@@ -13,6 +13,14 @@ class AudioBatchGenerateRequest(BaseModel):
     dialogue_ids: List[int] = Field(..., description="对话ID列表")
 
 
+class AudioPrefetchRequest(BaseModel):
+    """试听预生成请求"""
+    session_id: str = Field(..., min_length=1, max_length=64, description="客户端会话ID（每个打开的编辑/试听页面一个）")
+    chapter_id: int = Field(..., description="章节ID")
+    dialogue_id: Optional[int] = Field(None, description="当前对话ID（为空时从章节开头）")
+    count: Optional[int] = Field(None, ge=0, description="预生成的对话数（默认 PREFETCH_COUNT）")
+
+
 class AudioExportRequest(BaseModel):
     """音频导出请求"""
     project_id: int = Field(..., description="项目ID")
@@ -25,6 +33,6 @@ class AudioGenerateResponse(BaseModel):
     """音频生成响应"""
     dialogue_id: int
     audio_path: Optional[str] = None
-    duration: Optional[int] = None
+    duration: Optional[float] = None
     status: str
 
@@ -1,9 +1,18 @@
 """角色相关的Schema"""
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from pydantic import BaseModel, Field
 
 
+class AlternateVoice(BaseModel):
+    """其他引擎上的等效音色（语速等未填写时沿用主音色）"""
+    engine: str = Field(..., description="TTS引擎")
+    voice_id: str = Field(..., description="声音ID")
+    speed: Optional[float] = Field(None, ge=0.5, le=2.0, description="语速")
+    pitch: Optional[float] = Field(None, ge=0.5, le=2.0, description="音调")
+    volume: Optional[float] = Field(None, ge=0.0, le=2.0, description="音量")
+
+
 class VoiceConfig(BaseModel):
     """声音配置Schema"""
     engine: str = Field(default="azure", description="TTS引擎")
@@ -12,6 +21,7 @@ class VoiceConfig(BaseModel):
     pitch: float = Field(default=1.0, ge=0.5, le=2.0, description="音调")
     volume: float = Field(default=1.0, ge=0.0, le=2.0, description="音量")
     emotion: Optional[str] = Field(None, description="情感类型")
+    alternates: List[AlternateVoice] = Field(default_factory=list, description="其他引擎上的等效音色（故障切换和对冲请求使用）")
 
 
 class CharacterBase(BaseModel):
@@ -40,7 +50,7 @@ class CharacterInDB(CharacterBase):
     id: int
     project_id: int
     dialogue_count: int
-    total_duration: int
+    total_duration: float
     voice_config: Optional[Dict[str, Any]]
     created_at: datetime
     updated_at: datetime
@@ -56,7 +66,7 @@ class CharacterListItem(BaseModel):
     name: str
     avatar: Optional[str]
     dialogue_count: int
-    total_duration: int
+    total_duration: float
     voice_config: Optional[Dict[str, Any]]
 
     class Config:
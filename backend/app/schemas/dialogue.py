@@ -33,6 +33,7 @@ class DialogueBatchUpdate(BaseModel):
     dialogue_ids: list[int] = Field(..., description="对话ID列表")
     character_id: Optional[int] = Field(None, description="统一分配角色ID")
     status: Optional[DialogueStatus] = Field(None, description="批量更新状态")
+    reset_audio: bool = Field(False, description="清除已生成的音频并将状态重置为待生成")
 
 
 class DialogueInDB(DialogueBase):
@@ -42,6 +43,7 @@ class DialogueInDB(DialogueBase):
     character_id: Optional[int]
     start_time: float
     end_time: float
+    duration: Optional[float] = 0.0
     audio_path: Optional[str]
     status: DialogueStatus
     created_at: datetime
@@ -62,6 +64,7 @@ class DialogueListItem(BaseModel):
     order_index: int
     status: DialogueStatus
     audio_path: Optional[str]
+    duration: Optional[float] = 0.0
 
     class Config:
         from_attributes = True
@@ -32,7 +32,7 @@ class ProjectInDB(ProjectBase):
     status: ProjectStatus
     chapters_count: int
     characters_count: int
-    total_duration: int
+    total_duration: float
     created_at: datetime
     updated_at: datetime
 
@@ -49,7 +49,7 @@ class ProjectListItem(BaseModel):
     status: ProjectStatus
     chapters_count: int
     characters_count: int
-    total_duration: int
+    total_duration: float
     created_at: datetime
     updated_at: datetime
 
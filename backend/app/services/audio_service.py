@@ -1,20 +1,43 @@
 """音频处理服务"""
+from dataclasses import asdict, replace
 from typing import List, Optional, Dict
 from pathlib import Path
+import asyncio
+import hashlib
+import json
 import os
+import time
+import uuid
 from pydub import AudioSegment
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.dialogue import Dialogue
+from app.core import metrics, tracing
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, write_lock
+from app.models.dialogue import Dialogue, DialogueStatus
 from app.models.character import Character
+from app.models.chapter import Chapter
 from app.models.audio_export import AudioExport
-from app.services.tts_factory import TTSFactory
 from app.services.tts_base import TTSConfig, TTSResult
+from app.services.tts_router import TTSRouter
+from app.services.tts_scheduler import TTSScheduler, BATCH, INTERACTIVE
+from app.services.speech_rate import SpeechRateEstimator
+from app.services.synthesis_flight import SynthesisFlight
 
 
 class AudioService:
     """音频生成和处理服务"""
     
+    # 旁白（无角色或角色未配置声音）使用的默认声音配置
+    DEFAULT_VOICE_CONFIG = {
+        "engine": "mock",
+        "voice_id": "mock_narrator",
+        "speed": 1.0,
+        "pitch": 1.0,
+        "volume": 1.0
+    }
+    
     def __init__(self, storage_path: str):
         """
         初始化音频服务
@@ -30,86 +53,204 @@ class AudioService:
         self.audio_dir.mkdir(parents=True, exist_ok=True)
         self.temp_dir.mkdir(parents=True, exist_ok=True)
     
+    @tracing.traced("audio.generate_dialogue")
     async def generate_dialogue_audio(
         self,
         dialogue: Dialogue,
         character: Optional[Character],
-        db: Session
+        db: AsyncSession,
+        priority: str = BATCH
     ) -> TTSResult:
         """
         生成单条对话的音频
+        按优先级排队等待合成名额，按引擎限速，暂时性失败（限流、超时、5xx）自动退避重试；
+        角色声明了其他引擎上的等效音色时按引擎表现选择并在失败时切换；
+        同一对话正在合成相同内容时等待并沿用其结果
         
         Args:
             dialogue: 对话对象
             character: 角色对象（如果是旁白可以为None）
             db: 数据库会话
+            priority: 调度优先级（interactive 为单条试听：优先调度，引擎熔断时不等待恢复，可发对冲请求）
             
         Returns:
             TTSResult: 生成结果
         """
-        # 确定TTS配置
-        if character and character.voice_config:
-            voice_config = character.voice_config
-        else:
-            # 旁白使用默认配置
-            voice_config = {
-                "engine": "mock",
-                "voice_id": "mock_narrator",
-                "speed": 1.0,
-                "pitch": 1.0,
-                "volume": 1.0
-            }
-        
-        # 创建TTS配置
-        tts_config = TTSConfig(
-            engine=voice_config.get("engine", "mock"),
-            voice_id=voice_config.get("voice_id", ""),
-            speed=voice_config.get("speed", 1.0),
-            pitch=voice_config.get("pitch", 1.0),
-            volume=voice_config.get("volume", 1.0),
-            format="mp3"
-        )
+        # 创建TTS配置（主音色及等效音色）
+        candidates = self.build_tts_configs(character.voice_config if character else None)
         
-        # 生成输出路径
+        # 生成输出路径（等效音色沿用主音色的格式）
         output_dir = self.audio_dir / str(dialogue.chapter_id)
         output_dir.mkdir(parents=True, exist_ok=True)
-        output_path = output_dir / f"dialogue_{dialogue.id}.mp3"
+        output_path = output_dir / f"dialogue_{dialogue.id}.{candidates[0].format}"
         
-        # 创建TTS提供商
-        provider = TTSFactory.create_provider(tts_config.engine)
+        async def synthesize() -> TTSResult:
+            # 所属项目（同一会话中已加载的章节不再查询）
+            chapter = await db.get(Chapter, dialogue.chapter_id)
+            project_id = chapter.project_id if chapter else None
+            
+            # 先写入临时文件，完成后改名，读取方不会看到写了一半的文件
+            part_path = output_dir / f"{output_path.name}.{uuid.uuid4().hex[:8]}.part"
+            queued = time.perf_counter()
+            try:
+                with tracing.span("tts.synthesize", {
+                    "tts.candidates": len(candidates),
+                    "tts.chars": len(dialogue.content),
+                    "tts.priority": priority,
+                }) as span:
+                    async with TTSScheduler.slot(priority, project_id):
+                        start = time.perf_counter()
+                        span.set_attribute("tts.queue_ms", round((start - queued) * 1000, 3))
+                        result, tts_config = await TTSRouter.synthesize(
+                            candidates,
+                            text=dialogue.content,
+                            output_path=str(part_path),
+                            interactive=priority == INTERACTIVE
+                        )
+                    span.set_attribute("tts.engine", tts_config.engine)
+                    span.set_attribute("tts.voice", tts_config.voice_id)
+                    span.set_attribute("tts.success", result.success)
+                if result.success:
+                    os.replace(part_path, output_path)
+                    result.audio_path = str(output_path)
+            finally:
+                if part_path.exists():
+                    part_path.unlink()
+            self.record_synthesis(tts_config, dialogue.content, result, time.perf_counter() - start)
+            
+            # 更新对话记录（合成可以并发，写事务在 SQLite 下排队）
+            async with write_lock():
+                if result.success:
+                    dialogue.audio_path = str(output_path)
+                    dialogue.duration = result.duration or 0.0
+                    dialogue.status = DialogueStatus.COMPLETED
+                    # 用实际时长校准该音色的语速统计
+                    if result.duration:
+                        await db.run_sync(
+                            SpeechRateEstimator.record,
+                            engine=tts_config.engine,
+                            voice_id=tts_config.voice_id,
+                            speed=tts_config.speed,
+                            text=dialogue.content,
+                            duration=result.duration
+                        )
+                else:
+                    dialogue.status = DialogueStatus.ERROR
+                
+                await db.commit()
+            
+            return result
+        
+        # 同一对话同一内容的并发请求（单条生成、批量任务、预生成、其它进程）只合成一次
+        fingerprint = self.synthesis_fingerprint(dialogue.content, candidates)
+        result, synthesized = await SynthesisFlight.run(dialogue.id, fingerprint, synthesize)
+        if not synthesized:
+            # 由并发的请求合成，结果已提交
+            await db.refresh(dialogue)
+            if result is None:
+                completed = dialogue.status == DialogueStatus.COMPLETED
+                result = TTSResult(
+                    success=completed,
+                    audio_path=dialogue.audio_path if completed else None,
+                    duration=dialogue.duration if completed else None,
+                    error_message=None if completed else "并发的合成请求失败"
+                )
         
-        # 生成音频
-        result = await provider.synthesize(
-            text=dialogue.content,
-            config=tts_config,
-            output_path=str(output_path)
+        return result
+    
+    @staticmethod
+    def synthesis_fingerprint(text: str, candidates: List[TTSConfig]) -> str:
+        """合成内容指纹（文本和全部候选音色配置）"""
+        payload = json.dumps(
+            [text, [asdict(config) for config in candidates]],
+            ensure_ascii=False,
+            sort_keys=True
         )
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+    
+    @classmethod
+    def build_tts_config(cls, voice_config: Optional[Dict]) -> TTSConfig:
+        """
+        根据角色声音配置构造TTS配置（未配置时使用旁白默认配置）
         
-        # 更新对话记录
-        if result.success:
-            dialogue.audio_path = str(output_path)
-            dialogue.duration = result.duration
-            dialogue.status = "completed"
-        else:
-            dialogue.status = "failed"
-        
-        db.commit()
+        Args:
+            voice_config: 角色的 voice_config
+            
+        Returns:
+            TTSConfig
+        """
+        voice_config = voice_config or cls.DEFAULT_VOICE_CONFIG
+        return TTSConfig(
+            engine=voice_config.get("engine", "mock"),
+            voice_id=voice_config.get("voice_id", ""),
+            speed=voice_config.get("speed", 1.0),
+            pitch=voice_config.get("pitch", 1.0),
+            volume=voice_config.get("volume", 1.0),
+            format=voice_config.get("format", settings.TTS_AUDIO_FORMAT)
+        )
+    
+    @classmethod
+    def build_tts_configs(cls, voice_config: Optional[Dict]) -> List[TTSConfig]:
+        """
+        主音色及 voice_config.alternates 中的等效音色（语速等未填写时沿用主音色）
         
-        return result
+        Args:
+            voice_config: 角色的 voice_config
+            
+        Returns:
+            TTSConfig 列表，第一个为主音色
+        """
+        voice_config = voice_config or cls.DEFAULT_VOICE_CONFIG
+        primary = cls.build_tts_config(voice_config)
+        configs = [primary]
+        seen = {(primary.engine, primary.voice_id)}
+        for alternate in voice_config.get("alternates") or []:
+            key = (alternate.get("engine"), alternate.get("voice_id"))
+            if not all(key) or key in seen:
+                continue
+            seen.add(key)
+            configs.append(replace(
+                primary,
+                engine=alternate["engine"],
+                voice_id=alternate["voice_id"],
+                **{
+                    name: alternate[name] if alternate.get(name) is not None else getattr(primary, name)
+                    for name in ("speed", "pitch", "volume")
+                },
+            ))
+        return configs
+    
+    @staticmethod
+    def record_synthesis(tts_config: TTSConfig, text: str, result: TTSResult, elapsed: float):
+        """记录一次合成的耗时、速度和字数指标"""
+        engine = tts_config.engine
+        outcome = "success" if result.success else "error"
+        metrics.TTS_LATENCY.labels(engine, tts_config.voice_id, outcome).observe(elapsed)
+        metrics.TTS_CHARS.labels(engine).inc(len(text))
+        if result.success:
+            if elapsed > 0:
+                metrics.TTS_CHARS_PER_SECOND.labels(engine).observe(len(text) / elapsed)
+            metrics.TTS_AUDIO_SECONDS.labels(engine).inc(result.duration or 0.0)
+    
+    @staticmethod
+    def record_export(kind: str, format: str, elapsed: float, file_size: int):
+        """记录一次导出的耗时和文件大小指标"""
+        metrics.EXPORT_LATENCY.labels(kind, format).observe(elapsed)
+        metrics.EXPORT_BYTES.labels(kind, format).observe(file_size)
     
     async def batch_generate(
         self,
         dialogue_ids: List[int],
-        db: Session,
         progress_callback=None
     ) -> Dict:
         """
         批量生成对话音频
+        并发处理多条对话（最多 TTS_MAX_CONCURRENCY 条，实际合成数由调度器和引擎限速器控制），
+        每条对话使用独立的数据库会话
         
         Args:
             dialogue_ids: 对话ID列表
-            db: 数据库会话
-            progress_callback: 进度回调函数
+            progress_callback: 进度回调函数（参数为已完成数、总数）
             
         Returns:
             生成统计信息
@@ -118,39 +259,42 @@ class AudioService:
         success_count = 0
         failed_count = 0
         failed_items = []
+        completed = 0
         
-        for idx, dialogue_id in enumerate(dialogue_ids):
-            # 获取对话和角色
-            dialogue = db.query(Dialogue).filter(Dialogue.id == dialogue_id).first()
-            if not dialogue:
-                failed_count += 1
-                failed_items.append({"id": dialogue_id, "error": "对话不存在"})
-                continue
-            
-            character = None
-            if dialogue.character_id:
-                character = db.query(Character).filter(
-                    Character.id == dialogue.character_id
-                ).first()
-            
-            # 生成音频
-            try:
-                result = await self.generate_dialogue_audio(dialogue, character, db)
+        # 队列深度：本任务中尚未开始处理的对话数（任务中途取消时扣除剩余部分）
+        remaining = total
+        pending = iter(dialogue_ids)
+        
+        async def worker():
+            nonlocal remaining, success_count, failed_count, completed
+            for dialogue_id in pending:
+                remaining -= 1
+                metrics.BATCH_QUEUE_DEPTH.dec()
+                
+                try:
+                    result = await self._generate_batch_item(dialogue_id)
+                except Exception as e:
+                    result = TTSResult(success=False, error_message=str(e))
+                    await self._mark_batch_item_failed(dialogue_id)
                 if result.success:
                     success_count += 1
                 else:
                     failed_count += 1
-                    failed_items.append({
-                        "id": dialogue_id,
-                        "error": result.error_message
-                    })
-            except Exception as e:
-                failed_count += 1
-                failed_items.append({"id": dialogue_id, "error": str(e)})
-            
-            # 调用进度回调
-            if progress_callback:
-                progress_callback(idx + 1, total)
+                    failed_items.append({"id": dialogue_id, "error": result.error_message})
+                
+                # 调用进度回调
+                completed += 1
+                if progress_callback:
+                    progress_callback(completed, total)
+        
+        concurrency = settings.TTS_MAX_CONCURRENCY if settings.TTS_MAX_CONCURRENCY > 0 else total
+        metrics.BATCH_JOBS.inc()
+        metrics.BATCH_QUEUE_DEPTH.inc(total)
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+        finally:
+            metrics.BATCH_JOBS.dec()
+            metrics.BATCH_QUEUE_DEPTH.dec(remaining)
         
         return {
             "total": total,
@@ -159,6 +303,32 @@ class AudioService:
             "failed_items": failed_items
         }
     
+    async def _generate_batch_item(self, dialogue_id: int) -> TTSResult:
+        """在独立会话中生成批量任务中的一条对话"""
+        async with AsyncSessionLocal() as db:
+            # 获取对话、角色和所属章节
+            dialogue = await db.get(Dialogue, dialogue_id)
+            if not dialogue:
+                return TTSResult(success=False, error_message="对话不存在")
+            character = await db.get(Character, dialogue.character_id) if dialogue.character_id else None
+            await db.get(Chapter, dialogue.chapter_id)
+            # 结束读事务，排队和合成期间不占用连接池中的连接（提交后对象不过期）
+            await db.commit()
+            return await self.generate_dialogue_audio(dialogue, character, db)
+    
+    async def _mark_batch_item_failed(self, dialogue_id: int):
+        """生成过程中出错（如数据库错误）的对话在新会话中标记为失败，不停留在待生成状态"""
+        try:
+            async with AsyncSessionLocal() as db, write_lock():
+                await db.execute(
+                    update(Dialogue)
+                    .where(Dialogue.id == dialogue_id, Dialogue.status != DialogueStatus.COMPLETED)
+                    .values(status=DialogueStatus.ERROR)
+                )
+                await db.commit()
+        except Exception as e:
+            print(f"⚠️ 标记对话 {dialogue_id} 生成失败时出错: {e}")
+    
     def merge_audio_files(
         self,
         audio_paths: List[str],
@@ -178,28 +348,36 @@ class AudioService:
         Returns:
             是否成功
         """
-        try:
-            combined = AudioSegment.empty()
-            silence = AudioSegment.silent(duration=add_silence)
-            
-            for audio_path in audio_paths:
-                if not os.path.exists(audio_path):
-                    continue
+        with tracing.span("audio.merge", {"audio.files": len(audio_paths), "audio.format": format}) as span:
+            try:
+                combined = AudioSegment.empty()
+                silence = AudioSegment.silent(duration=add_silence)
                 
-                audio = AudioSegment.from_file(audio_path)
-                combined += audio + silence
-            
-            # 导出合并后的音频
-            combined.export(output_path, format=format)
-            return True
-        except Exception as e:
-            print(f"音频合并失败: {str(e)}")
-            return False
+                # 分别累计解码和编码耗时，区分慢在读取解码还是导出编码
+                decode_start = time.perf_counter()
+                for audio_path in audio_paths:
+                    if not os.path.exists(audio_path):
+                        continue
+                    
+                    audio = AudioSegment.from_file(audio_path)
+                    combined += audio + silence
+                span.set_attribute("audio.decode_ms", round((time.perf_counter() - decode_start) * 1000, 3))
+                
+                # 导出合并后的音频
+                encode_start = time.perf_counter()
+                combined.export(output_path, format=format)
+                span.set_attribute("audio.encode_ms", round((time.perf_counter() - encode_start) * 1000, 3))
+                return True
+            except Exception as e:
+                span.record_exception(e)
+                print(f"音频合并失败: {str(e)}")
+                return False
     
+    @tracing.traced("audio.export_chapter")
     async def export_chapter_audio(
         self,
         chapter_id: int,
-        db: Session,
+        db: AsyncSession,
         format: str = "mp3",
         quality: str = "high"
     ) -> Optional[str]:
@@ -216,16 +394,15 @@ class AudioService:
             导出文件路径
         """
         # 获取章节的所有对话（按顺序）
-        dialogues = db.query(Dialogue).filter(
-            Dialogue.chapter_id == chapter_id,
-            Dialogue.status == "completed"
-        ).order_by(Dialogue.order_index).all()
-        
-        if not dialogues:
-            return None
+        audio_paths = (await db.execute(
+            select(Dialogue.audio_path).where(
+                Dialogue.chapter_id == chapter_id,
+                Dialogue.status == DialogueStatus.COMPLETED
+            ).order_by(Dialogue.order_index)
+        )).scalars().all()
         
         # 收集音频文件路径
-        audio_paths = [d.audio_path for d in dialogues if d.audio_path]
+        audio_paths = [path for path in audio_paths if path]
         
         if not audio_paths:
             return None
@@ -235,20 +412,25 @@ class AudioService:
         output_dir.mkdir(parents=True, exist_ok=True)
         output_path = output_dir / f"chapter_{chapter_id}.{format}"
         
-        # 合并音频
-        success = self.merge_audio_files(
+        # 合并音频（解码/编码耗时，放到线程中执行以免阻塞事件循环）
+        start = time.perf_counter()
+        success = await asyncio.to_thread(
+            self.merge_audio_files,
             audio_paths,
             str(output_path),
             format=format
         )
+        if success:
+            self.record_export("chapter", format, time.perf_counter() - start, os.path.getsize(output_path))
         
         return str(output_path) if success else None
     
+    @tracing.traced("audio.export_project")
     async def export_project_audio(
         self,
         project_id: int,
         chapter_ids: Optional[List[int]],
-        db: Session,
+        db: AsyncSession,
         format: str = "mp3",
         quality: str = "high"
     ) -> Optional[AudioExport]:
@@ -267,12 +449,12 @@ class AudioService:
         """
         # 获取要导出的章节
         from app.models.chapter import Chapter
-        query = db.query(Chapter).filter(Chapter.project_id == project_id)
+        query = select(Chapter).where(Chapter.project_id == project_id)
         
         if chapter_ids:
-            query = query.filter(Chapter.id.in_(chapter_ids))
+            query = query.where(Chapter.id.in_(chapter_ids))
         
-        chapters = query.order_by(Chapter.order_index).all()
+        chapters = (await db.execute(query.order_by(Chapter.order_index))).scalars().all()
         
         if not chapters:
             return None
@@ -280,14 +462,14 @@ class AudioService:
         # 收集所有音频文件
         all_audio_paths = []
         for chapter in chapters:
-            dialogues = db.query(Dialogue).filter(
-                Dialogue.chapter_id == chapter.id,
-                Dialogue.status == "completed"
-            ).order_by(Dialogue.order_index).all()
+            audio_paths = (await db.execute(
+                select(Dialogue.audio_path).where(
+                    Dialogue.chapter_id == chapter.id,
+                    Dialogue.status == DialogueStatus.COMPLETED
+                ).order_by(Dialogue.order_index)
+            )).scalars().all()
             
-            for dialogue in dialogues:
-                if dialogue.audio_path:
-                    all_audio_paths.append(dialogue.audio_path)
+            all_audio_paths.extend(path for path in audio_paths if path)
         
         if not all_audio_paths:
             return None
@@ -297,8 +479,10 @@ class AudioService:
         output_dir.mkdir(parents=True, exist_ok=True)
         output_path = output_dir / f"project_{project_id}.{format}"
         
-        # 合并音频
-        success = self.merge_audio_files(
+        # 合并音频（放到线程中执行以免阻塞事件循环）
+        start = time.perf_counter()
+        success = await asyncio.to_thread(
+            self.merge_audio_files,
             all_audio_paths,
             str(output_path),
             format=format
@@ -309,6 +493,7 @@ class AudioService:
         
         # 创建导出记录
         file_size = os.path.getsize(output_path)
+        self.record_export("project", format, time.perf_counter() - start, file_size)
         export_record = AudioExport(
             project_id=project_id,
             format=format,
@@ -318,8 +503,8 @@ class AudioService:
             export_range={"chapter_ids": chapter_ids or [c.id for c in chapters]}
         )
         db.add(export_record)
-        db.commit()
-        db.refresh(export_record)
+        await db.commit()
+        await db.refresh(export_record)
         
         return export_record
     
@@ -0,0 +1,84 @@
+"""级联删除服务"""
+from typing import List
+
+from sqlalchemy import select, delete
+from sqlalchemy.orm import Session
+
+from app.models.project import Project
+from app.models.chapter import Chapter
+from app.models.character import Character
+from app.models.dialogue import Dialogue
+from app.models.audio_export import AudioExport
+from app.models.statistics import ChapterStats, ProjectStats
+from app.services.statistics import StatsService
+from app.services.response_cache import ResponseCache, CHAPTER_LIST, CHARACTER_LIST, DIALOGUE_LIST
+
+_projects = Project.__table__
+_chapters = Chapter.__table__
+_characters = Character.__table__
+_dialogues = Dialogue.__table__
+_audio_exports = AudioExport.__table__
+_chapter_stats = ChapterStats.__table__
+_project_stats = ProjectStats.__table__
+
+
+class CascadeDeleteService:
+    """
+    以集合式 DELETE 删除项目/章节及其下属数据
+    ORM 级联会逐个加载并删除子对象（一个项目可能有数十万条对话），这里每张表一条
+    DELETE ... WHERE 外键条件，按子表到父表的顺序执行；绕过ORM事件，统计和列表缓存在此显式维护。
+    磁盘上的音频和导出文件不在事务内删除，由 StorageGC 在提交后异步回收
+    """
+
+    @staticmethod
+    def delete_chapter(db: Session, chapter_id: int, project_id: int):
+        """
+        删除章节及其对话（不提交事务）
+
+        Args:
+            db: 数据库会话
+            chapter_id: 章节ID
+            project_id: 章节所属项目ID
+        """
+        # 删除前按角色/状态汇总待删除的对话，得到统计增量
+        delta = StatsService.chapter_delete_delta(db, chapter_id, project_id)
+
+        db.execute(delete(_dialogues).where(_dialogues.c.chapter_id == chapter_id))
+        StatsService.delete_rows(db, chapter_ids=[chapter_id])
+        db.execute(delete(_chapters).where(_chapters.c.id == chapter_id))
+        delta.apply(db)
+
+        ResponseCache.touch(db, CHAPTER_LIST, project_id)
+        ResponseCache.touch(db, CHARACTER_LIST, project_id)
+        ResponseCache.touch(db, DIALOGUE_LIST, chapter_id)
+
+    @staticmethod
+    def delete_project(db: Session, project_id: int) -> List[int]:
+        """
+        删除项目及其章节、对话、角色、导出记录和统计（不提交事务）
+
+        Args:
+            db: 数据库会话
+            project_id: 项目ID
+
+        Returns:
+            被删除的章节ID（用于回收章节音频目录）
+        """
+        chapter_ids = list(db.execute(
+            select(_chapters.c.id).where(_chapters.c.project_id == project_id)
+        ).scalars())
+        project_chapters = select(_chapters.c.id).where(_chapters.c.project_id == project_id)
+
+        # 子表在前，满足 MySQL 的外键约束
+        db.execute(delete(_dialogues).where(_dialogues.c.chapter_id.in_(project_chapters)))
+        db.execute(delete(_characters).where(_characters.c.project_id == project_id))
+        StatsService.delete_rows(db, project_ids=[project_id])
+        db.execute(delete(_audio_exports).where(_audio_exports.c.project_id == project_id))
+        db.execute(delete(_chapters).where(_chapters.c.project_id == project_id))
+        db.execute(delete(_projects).where(_projects.c.id == project_id))
+
+        ResponseCache.touch(db, CHAPTER_LIST, project_id)
+        ResponseCache.touch(db, CHARACTER_LIST, project_id)
+        for chapter_id in chapter_ids:
+            ResponseCache.touch(db, DIALOGUE_LIST, chapter_id)
+        return chapter_ids
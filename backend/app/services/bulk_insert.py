@@ -0,0 +1,80 @@
+"""批量写入服务"""
+from typing import Dict, List, Any
+from sqlalchemy import insert, func, select
+from sqlalchemy.orm import Session
+
+
+class BulkInsertService:
+    """
+    批量插入同一父记录下的多行数据
+    数据库支持 executemany + RETURNING（SQLite/PostgreSQL/MariaDB）时直接取回ID，
+    否则（MySQL）锁定父记录后先记录其下的最大ID，插入后按ID范围取回新行ID
+    （同一父记录的并发批量插入依次执行，ID范围不会交错）；
+    两种方式都通过父记录内唯一的键列（如 order_index）把ID对应回输入行
+    """
+
+    # 单条INSERT语句的最大行数
+    CHUNK_SIZE = 1000
+
+    @classmethod
+    def insert_rows(
+        cls,
+        db: Session,
+        model: type,
+        parent_column,
+        parent_id: int,
+        rows: List[Dict[str, Any]],
+        key: str = "order_index"
+    ) -> List[Dict[str, Any]]:
+        """
+        批量插入并返回带ID和时间戳的行数据（不提交事务）
+
+        Args:
+            db: 数据库会话
+            model: ORM模型类（需有 id/created_at/updated_at 列）
+            parent_column: 父记录外键列，如 Dialogue.chapter_id
+            parent_id: 父记录ID（所有行必须属于该父记录）
+            rows: 待插入的行数据
+            key: 在本批数据中唯一的列名，用于把取回的ID对应到输入行
+
+        Returns:
+            插入后的行数据（与输入顺序一致，补充了 id/created_at/updated_at）
+        """
+        if not rows:
+            return []
+
+        # 显式写入时间戳，响应无需再逐行刷新；取数据库时间，与 server_default 写入的时间一致
+        now = db.execute(select(func.now())).scalar()
+        rows = [{**row, "created_at": now, "updated_at": now} for row in rows]
+        key_column = getattr(model, key)
+
+        ids_by_key = {}
+        if db.get_bind().dialect.insert_executemany_returning:
+            stmt = insert(model).returning(model.id, key_column)
+            for start in range(0, len(rows), cls.CHUNK_SIZE):
+                for row_id, row_key in db.execute(stmt, rows[start:start + cls.CHUNK_SIZE]):
+                    ids_by_key[row_key] = row_id
+        else:
+            # 锁定父记录（外键指向的行），同一父记录的并发批量插入在此排队
+            parent_key = next(iter(parent_column.expression.foreign_keys)).column
+            db.execute(select(parent_key).where(parent_key == parent_id).with_for_update())
+            max_before = db.query(func.max(model.id)).filter(
+                parent_column == parent_id
+            ).scalar() or 0
+            for start in range(0, len(rows), cls.CHUNK_SIZE):
+                db.execute(insert(model), rows[start:start + cls.CHUNK_SIZE])
+            ids_by_key = dict(
+                db.query(key_column, model.id).filter(
+                    parent_column == parent_id,
+                    model.id > max_before
+                ).all()
+            )
+
+        if len(ids_by_key) != len(rows):
+            raise RuntimeError(
+                f"批量插入 {model.__tablename__} 后取回的ID数量不一致: "
+                f"期望 {len(rows)}，实际 {len(ids_by_key)}（{key} 需在本批数据中唯一）"
+            )
+        for row in rows:
+            row["id"] = ids_by_key[row[key]]
+        return rows
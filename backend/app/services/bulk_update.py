@@ -0,0 +1,46 @@
+"""批量更新服务"""
+from typing import Any, Dict, Iterable
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+
+class BulkUpdateService:
+    """
+    按ID列表执行集合式 UPDATE
+    不加载ORM对象，每个分块一条 UPDATE ... WHERE id IN (...)，更新数取自 rowcount
+    """
+
+    # 单条UPDATE语句的最大ID数（低于 SQLite 旧版本 999 个参数的上限）
+    CHUNK_SIZE = 900
+
+    @classmethod
+    def update_by_ids(
+        cls,
+        db: Session,
+        model: type,
+        ids: Iterable[int],
+        values: Dict[str, Any]
+    ) -> int:
+        """
+        批量更新指定ID的行（不提交事务）
+
+        Args:
+            db: 数据库会话
+            model: ORM模型类
+            ids: 待更新的行ID（重复ID只更新一次）
+            values: 要设置的列值
+
+        Returns:
+            实际匹配更新的行数
+        """
+        ids = sorted(set(ids))
+        if not ids or not values:
+            return 0
+
+        # 会话中未加载这些对象，无需同步会话状态
+        stmt = update(model).values(**values).execution_options(synchronize_session=False)
+        updated = 0
+        for start in range(0, len(ids), cls.CHUNK_SIZE):
+            chunk = ids[start:start + cls.CHUNK_SIZE]
+            updated += db.execute(stmt.where(model.id.in_(chunk))).rowcount
+        return updated
@@ -0,0 +1,57 @@
+"""列表总数缓存"""
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+import time
+
+from app.core import metrics
+from app.core.config import settings
+
+
+class CountCache:
+    """
+    进程内的 COUNT 结果缓存
+    列表翻页时总数在短时间内不会变化，按 (命名空间, 筛选条件) 缓存 COUNT 结果；
+    写操作调用 invalidate 清除对应命名空间，其他进程的缓存最多滞后 TTL 秒；
+    最多保留 LIST_COUNT_CACHE_MAX_ENTRIES 条（搜索词等筛选条件不受限），超出时淘汰最久未使用的
+    """
+
+    _entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, int]]" = OrderedDict()
+
+    @classmethod
+    def get(cls, namespace: str, key: Hashable) -> Optional[int]:
+        """
+        读取缓存的总数（过期或不存在时返回 None）
+
+        Args:
+            namespace: 命名空间（如 "projects"）
+            key: 筛选条件
+        """
+        entry = cls._entries.get((namespace, key))
+        if entry is None:
+            metrics.CACHE_REQUESTS.labels(f"count:{namespace}", "miss").inc()
+            return None
+        expires_at, total = entry
+        if expires_at < time.monotonic():
+            cls._entries.pop((namespace, key), None)
+            metrics.CACHE_REQUESTS.labels(f"count:{namespace}", "miss").inc()
+            return None
+        cls._entries.move_to_end((namespace, key))
+        metrics.CACHE_REQUESTS.labels(f"count:{namespace}", "hit").inc()
+        return total
+
+    @classmethod
+    def set(cls, namespace: str, key: Hashable, total: int):
+        """写入总数（TTL 为 0 时不缓存）"""
+        ttl = settings.LIST_COUNT_CACHE_TTL
+        if ttl <= 0:
+            return
+        cls._entries[(namespace, key)] = (time.monotonic() + ttl, total)
+        cls._entries.move_to_end((namespace, key))
+        while len(cls._entries) > max(settings.LIST_COUNT_CACHE_MAX_ENTRIES, 1):
+            cls._entries.popitem(last=False)
+
+    @classmethod
+    def invalidate(cls, namespace: str):
+        """清除命名空间下的全部缓存"""
+        for entry_key in [k for k in cls._entries if k[0] == namespace]:
+            cls._entries.pop(entry_key, None)
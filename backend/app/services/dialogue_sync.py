@@ -0,0 +1,88 @@
+"""对话增量同步服务"""
+from typing import Dict, List
+from difflib import SequenceMatcher
+from sqlalchemy.orm import Session
+
+from app.models.chapter import Chapter
+from app.models.character import Character
+from app.models.dialogue import Dialogue, DialogueType, DialogueStatus
+
+
+class DialogueSyncService:
+    """
+    章节内容变更后的对话增量同步
+    将已有对话列表与重新解析出的片段按 (类型, 内容) 对齐，
+    只插入、删除或修改发生变化的部分，未变化的对话保留音频和状态
+    """
+
+    @staticmethod
+    def resegment_chapter(chapter: Chapter, segments: List[Dict], db: Session) -> Dict[str, int]:
+        """
+        按章节当前内容增量同步对话（不提交事务，由调用方commit）
+
+        Args:
+            chapter: 章节对象（content 为最新内容）
+            segments: 章节当前内容的对话提取结果（ParseCache.get_dialogues）
+            db: 数据库会话
+
+        Returns:
+            变更统计 {unchanged, updated, inserted, deleted}
+        """
+        existing: List[Dialogue] = db.query(Dialogue).filter(
+            Dialogue.chapter_id == chapter.id
+        ).order_by(Dialogue.order_index, Dialogue.id).all()
+
+        # 获取角色映射（角色名 -> 角色ID）
+        characters = db.query(Character).filter(
+            Character.project_id == chapter.project_id
+        ).all()
+        character_map = {c.name: c.id for c in characters}
+
+        old_keys = [(DialogueType(d.type).value, d.content) for d in existing]
+        new_keys = [(s['type'], s['content']) for s in segments]
+        matcher = SequenceMatcher(None, old_keys, new_keys, autojunk=False)
+
+        stats = {"unchanged": 0, "updated": 0, "inserted": 0, "deleted": 0}
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            old_block = existing[i1:i2]
+            new_block = segments[j1:j2]
+
+            if tag == 'equal':
+                # 内容未变，仅同步顺序，保留音频、状态和手动分配的角色
+                for dialogue, segment in zip(old_block, new_block):
+                    dialogue.order_index = segment['order_index']
+                stats["unchanged"] += len(old_block)
+                continue
+
+            # 变化区间内逐一配对修改，多余的删除或新增
+            paired = min(len(old_block), len(new_block))
+            for dialogue, segment in zip(old_block[:paired], new_block[:paired]):
+                dialogue.order_index = segment['order_index']
+                dialogue.type = segment['type']
+                dialogue.content = segment['content']
+                if segment.get('character') in character_map:
+                    dialogue.character_id = character_map[segment['character']]
+                elif segment['type'] == DialogueType.NARRATION.value:
+                    dialogue.character_id = None
+                # 内容已变，旧音频作废，需要重新生成
+                dialogue.audio_path = None
+                dialogue.start_time = 0.0
+                dialogue.end_time = 0.0
+                dialogue.status = DialogueStatus.PENDING
+            stats["updated"] += paired
+
+            for dialogue in old_block[paired:]:
+                db.delete(dialogue)
+            stats["deleted"] += len(old_block) - paired
+
+            for segment in new_block[paired:]:
+                db.add(Dialogue(
+                    chapter_id=chapter.id,
+                    character_id=character_map.get(segment.get('character')),
+                    type=segment['type'],
+                    content=segment['content'],
+                    order_index=segment['order_index']
+                ))
+            stats["inserted"] += len(new_block) - paired
+
+        return stats
@@ -0,0 +1,138 @@
+"""文本解析结果缓存服务"""
+from typing import Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import hashlib
+import os
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+
+from app.core import metrics
+from app.core.config import settings
+from app.models.parse_result import ParseResult
+from app.services.text_parser import TextParser
+
+
+class ParseCache:
+    """
+    对话提取结果缓存
+    以 (内容SHA-256, 解析器版本) 为键存储在 parse_results 表中，
+    角色提取和对话批量创建共用同一份解析结果；
+    未命中时在线程池中解析，章节较多时分发到常驻进程池，解析期间不阻塞事件循环
+    """
+
+    # 多章节并行解析的进程池（首次使用时创建，应用关闭时回收）
+    _pool: Optional[ProcessPoolExecutor] = None
+
+    @staticmethod
+    def content_hash(content: str) -> str:
+        """计算内容哈希"""
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    @classmethod
+    async def get_dialogues(cls, content: str, db: AsyncSession) -> List[Dict[str, any]]:
+        """
+        获取单段内容的对话提取结果（未命中时解析并写入缓存）
+
+        Args:
+            content: 章节内容
+            db: 数据库会话
+
+        Returns:
+            与 TextParser.extract_dialogues 相同格式的片段列表
+        """
+        return (await cls.get_many({0: content}, db))[0]
+
+    @classmethod
+    async def get_many(cls, contents: Dict[int, str], db: AsyncSession) -> Dict[int, List[Dict[str, any]]]:
+        """
+        批量获取多个章节的对话提取结果
+        未命中缓存的章节数达到 PARSE_PARALLEL_MIN_CHAPTERS 时使用多进程并行解析
+
+        Args:
+            contents: {章节ID: 章节内容}
+            db: 数据库会话
+
+        Returns:
+            {章节ID: 片段列表}
+        """
+        hashes = {key: cls.content_hash(content or "") for key, content in contents.items()}
+        cached = await db.run_sync(cls._lookup, set(hashes.values())) if hashes else {}
+
+        hits = sum(1 for content_hash in hashes.values() if content_hash in cached)
+        metrics.CACHE_REQUESTS.labels("parse", "hit").inc(hits)
+        metrics.CACHE_REQUESTS.labels("parse", "miss").inc(len(hashes) - hits)
+
+        # 相同内容只解析一次
+        missing = {}
+        for key, content_hash in hashes.items():
+            if content_hash not in cached and content_hash not in missing:
+                missing[content_hash] = contents[key] or ""
+
+        if missing:
+            parsed = dict(zip(missing.keys(), await cls._parse_all(list(missing.values()))))
+            cached.update(parsed)
+            await db.run_sync(cls._store_many, parsed)
+
+        return {key: cached[content_hash] for key, content_hash in hashes.items()}
+
+    @classmethod
+    def shutdown(cls):
+        """回收解析进程池（应用关闭时调用）"""
+        if cls._pool is not None:
+            cls._pool.shutdown(wait=False, cancel_futures=True)
+            cls._pool = None
+
+    @staticmethod
+    def _lookup(db: Session, content_hashes: set) -> Dict[str, List[Dict[str, any]]]:
+        rows = db.query(ParseResult.content_hash, ParseResult.dialogues).filter(
+            ParseResult.content_hash.in_(content_hashes),
+            ParseResult.parser_version == TextParser.PARSER_VERSION
+        ).all()
+        return {row.content_hash: row.dialogues for row in rows}
+
+    @staticmethod
+    def _parse_sequential(texts: List[str]) -> List[List[Dict[str, any]]]:
+        return [TextParser.extract_dialogues(text) for text in texts]
+
+    @classmethod
+    async def _parse_all(cls, texts: List[str]) -> List[List[Dict[str, any]]]:
+        """解析多段文本（在默认线程池中执行），数量较多时分发到进程池"""
+        loop = asyncio.get_running_loop()
+        if len(texts) < settings.PARSE_PARALLEL_MIN_CHAPTERS:
+            return await loop.run_in_executor(None, cls._parse_sequential, texts)
+
+        if cls._pool is None:
+            cls._pool = ProcessPoolExecutor(max_workers=settings.PARSE_WORKERS or os.cpu_count() or 1)
+        pool = cls._pool
+        try:
+            return list(await asyncio.gather(*(
+                loop.run_in_executor(pool, TextParser.extract_dialogues, text) for text in texts
+            )))
+        except BrokenProcessPool:
+            # 工作进程异常退出后进程池不可再用，下次调用时重建
+            if cls._pool is pool:
+                cls._pool = None
+            raise
+
+    @classmethod
+    def _store_many(cls, db: Session, parsed: Dict[str, List[Dict[str, any]]]):
+        for content_hash, dialogues in parsed.items():
+            cls._store(content_hash, dialogues, db)
+
+    @staticmethod
+    def _store(content_hash: str, dialogues: List[Dict[str, any]], db: Session) -> Optional[ParseResult]:
+        """写入缓存（并发写入同一键时忽略唯一约束冲突）"""
+        record = ParseResult(
+            content_hash=content_hash,
+            parser_version=TextParser.PARSER_VERSION,
+            dialogues=dialogues
+        )
+        try:
+            with db.begin_nested():
+                db.add(record)
+        except IntegrityError:
+            return None
+        return record
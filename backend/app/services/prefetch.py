@@ -0,0 +1,175 @@
+"""试听预生成：在编辑/试听章节时以低优先级提前合成当前位置之后的对话"""
+from typing import Dict, Iterable, List, Optional
+import asyncio
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics, tracing
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.dialogue import Dialogue, DialogueStatus
+from app.models.character import Character
+from app.services.audio_service import AudioService
+from app.services.tts_scheduler import SPECULATIVE
+
+
+class _Session:
+    """一个编辑器/试听页面的预生成状态"""
+
+    __slots__ = ("chapter_id", "tasks")
+
+    def __init__(self, chapter_id: int):
+        self.chapter_id = chapter_id
+        self.tasks: Dict[int, asyncio.Task] = {}
+
+
+class PrefetchService:
+    """
+    按客户端会话（每个打开的编辑器/试听页面一个 session_id）管理预生成任务
+    - schedule：取当前对话之后最多 N 条待生成的对话，以 speculative 优先级排队合成（按顺序，近的先合成）；
+      同一会话再次调用时取消不在新范围内的任务，切换章节时取消旧章节的全部任务
+    - cancel_session：离开页面时取消该会话的任务
+    - cancel_dialogues / cancel_chapters：对话被编辑、删除或重新分段，单条生成接管该对话时取消
+    被取消的合成不写入数据库，对话保持待生成状态；预生成任务只保存在本进程内，
+    多进程部署时取消请求须到达发起预生成的进程（未取消的任务最多合成 N 条）
+    """
+
+    _sessions: Dict[str, _Session] = {}
+    _audio_service: Optional[AudioService] = None
+
+    @classmethod
+    async def schedule(
+        cls,
+        session_id: str,
+        chapter_id: int,
+        db: AsyncSession,
+        dialogue_id: Optional[int] = None,
+        count: Optional[int] = None
+    ) -> List[int]:
+        """
+        预生成当前位置之后的对话
+
+        Args:
+            session_id: 客户端会话ID
+            chapter_id: 章节ID
+            db: 数据库会话
+            dialogue_id: 当前对话（为空时从章节开头）
+            count: 预生成的对话数（默认 PREFETCH_COUNT，不超过 PREFETCH_MAX_COUNT）
+
+        Returns:
+            本会话正在预生成的对话ID
+        """
+        count = settings.PREFETCH_COUNT if count is None else count
+        count = min(max(count, 0), settings.PREFETCH_MAX_COUNT)
+
+        query = select(Dialogue.id).where(
+            Dialogue.chapter_id == chapter_id,
+            Dialogue.status == DialogueStatus.PENDING
+        )
+        if dialogue_id is not None:
+            current = (await db.execute(
+                select(Dialogue.order_index, Dialogue.id).where(
+                    Dialogue.id == dialogue_id, Dialogue.chapter_id == chapter_id
+                )
+            )).first()
+            if current is not None:
+                query = query.where(
+                    tuple_(Dialogue.order_index, Dialogue.id) > tuple_(current.order_index, current.id)
+                )
+        targets = (await db.execute(
+            query.order_by(Dialogue.order_index, Dialogue.id).limit(count)
+        )).scalars().all() if count else []
+
+        session = cls._sessions.get(session_id)
+        if session is not None and session.chapter_id != chapter_id:
+            cls.cancel_session(session_id)
+            session = None
+        if session is None:
+            session = cls._sessions[session_id] = _Session(chapter_id)
+
+        wanted = set(targets)
+        for target_id, task in list(session.tasks.items()):
+            if target_id not in wanted:
+                task.cancel()
+        # 其它会话已在预生成的对话不重复合成
+        running = {target_id for other in cls._sessions.values() for target_id in other.tasks}
+        trace_context = tracing.current_context()
+        for target_id in targets:
+            if target_id not in running:
+                cls._start(session_id, session, target_id, trace_context)
+
+        if not session.tasks:
+            cls._sessions.pop(session_id, None)
+        return [target_id for target_id in targets if target_id in session.tasks or target_id in running]
+
+    @classmethod
+    def cancel_session(cls, session_id: str) -> int:
+        """取消会话的全部预生成任务，返回取消的任务数"""
+        session = cls._sessions.pop(session_id, None)
+        if session is None:
+            return 0
+        for task in session.tasks.values():
+            task.cancel()
+        return len(session.tasks)
+
+    @classmethod
+    def cancel_dialogues(cls, dialogue_ids: Iterable[int]):
+        """取消指定对话的预生成（对话内容、角色或状态被修改后调用）"""
+        ids = set(dialogue_ids)
+        for session in cls._sessions.values():
+            for target_id in ids & session.tasks.keys():
+                session.tasks[target_id].cancel()
+
+    @classmethod
+    def cancel_chapters(cls, chapter_ids: Iterable[int]):
+        """取消指定章节的全部预生成（章节重新分段或被删除后调用）"""
+        ids = set(chapter_ids)
+        for session_id, session in list(cls._sessions.items()):
+            if session.chapter_id in ids:
+                cls.cancel_session(session_id)
+
+    @classmethod
+    async def stop(cls):
+        """取消全部预生成任务（应用关闭时调用）"""
+        tasks = [task for session in cls._sessions.values() for task in session.tasks.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        cls._sessions.clear()
+
+    @classmethod
+    def _start(cls, session_id: str, session: _Session, dialogue_id: int, trace_context):
+        task = asyncio.create_task(cls._generate(dialogue_id, trace_context))
+        session.tasks[dialogue_id] = task
+        metrics.PREFETCH.labels("scheduled").inc()
+
+        def finished(done: asyncio.Task):
+            if session.tasks.get(dialogue_id) is done:
+                del session.tasks[dialogue_id]
+            if not session.tasks and cls._sessions.get(session_id) is session:
+                del cls._sessions[session_id]
+            if done.cancelled():
+                metrics.PREFETCH.labels("cancelled").inc()
+            elif done.exception() is not None:
+                metrics.PREFETCH.labels("failed").inc()
+                print(f"⚠️ 预生成对话 {dialogue_id} 失败: {done.exception()}")
+
+        task.add_done_callback(finished)
+
+    @classmethod
+    async def _generate(cls, dialogue_id: int, trace_context):
+        if cls._audio_service is None:
+            cls._audio_service = AudioService(storage_path=settings.STORAGE_PATH)
+        with tracing.span("job.prefetch", {"dialogue.id": dialogue_id}, parent=trace_context, root=True):
+            async with AsyncSessionLocal() as db:
+                dialogue = await db.get(Dialogue, dialogue_id)
+                # 排队期间已被生成或删除
+                if dialogue is None or dialogue.status != DialogueStatus.PENDING:
+                    metrics.PREFETCH.labels("skipped").inc()
+                    return
+                character = await db.get(Character, dialogue.character_id) if dialogue.character_id else None
+                result = await cls._audio_service.generate_dialogue_audio(
+                    dialogue, character, db, priority=SPECULATIVE
+                )
+                metrics.PREFETCH.labels("completed" if result.success else "failed").inc()
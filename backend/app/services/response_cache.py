@@ -0,0 +1,312 @@
+"""列表响应缓存"""
+from collections import OrderedDict
+from itertools import chain
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+import hashlib
+import threading
+import time
+
+from fastapi import Request, Response
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, attributes
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.response import render_success
+from app.models.project import Project
+from app.models.chapter import Chapter
+from app.models.character import Character
+from app.models.dialogue import Dialogue
+
+# 缓存的列表（命名空间 -> 上级对象）：章节列表、角色列表按项目，对话列表按章节
+CHAPTER_LIST = "chapters"
+CHARACTER_LIST = "characters"
+DIALOGUE_LIST = "dialogues"
+
+# 会话中待发布的版本变更（提交后递增版本号，回滚时丢弃）
+_PENDING_KEY = "response_cache_touched"
+
+# 修改后会影响角色列表中对话数/时长的对话字段
+_CHARACTER_STATS_FIELDS = ("chapter_id", "character_id", "status", "duration")
+
+ListKey = Tuple[str, int]
+
+
+class MemoryCacheBackend:
+    """进程内 LRU 缓存（默认；多进程部署时各进程的版本号互不可见，应使用 redis）"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        # 版本号起点取启动时间（微秒），重启后不会与客户端持有的旧 ETag 重复
+        self._epoch = time.time_ns() // 1000
+        self._lock = threading.Lock()
+
+    def get_version(self, key: str) -> int:
+        return self._versions.get(key, self._epoch)
+
+    def bump(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, self._epoch) + 1
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key: str, body: bytes):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RedisCacheBackend:
+    """
+    Redis 共享缓存（多进程/多实例部署时使用，需安装 redis）
+    缓存操作须在毫秒内完成，连接超时或出错时按未命中处理，不影响请求
+    """
+
+    PREFIX = "asr:response:"
+
+    def __init__(self, url: str, ttl: int):
+        import redis
+
+        self.ttl = ttl
+        self._client = redis.Redis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.05)
+        self._errors = (redis.RedisError, OSError)
+
+    def get_version(self, key: str) -> int:
+        version_key = f"{self.PREFIX}version:{key}"
+        try:
+            version = self._client.get(version_key)
+            if version is None:
+                # 版本键被淘汰后从当前时间重新开始，不会与之前发出的 ETag 重复
+                self._client.set(version_key, time.time_ns() // 1000, nx=True)
+                version = self._client.get(version_key)
+            return int(version)
+        except self._errors:
+            return -1
+
+    def bump(self, keys: Iterable[str]):
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            for key in keys:
+                pipe.incr(f"{self.PREFIX}version:{key}")
+            pipe.execute()
+        except self._errors as e:
+            print(f"⚠️ 响应缓存版本更新失败: {e}")
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self._client.get(f"{self.PREFIX}entry:{key}")
+        except self._errors:
+            return None
+
+    def set(self, key: str, body: bytes):
+        try:
+            self._client.set(f"{self.PREFIX}entry:{key}", body, ex=self.ttl)
+        except self._errors:
+            pass
+
+
+class CachedList:
+    """一次列表请求的缓存状态（由 ResponseCache.lookup 返回）"""
+
+    def __init__(self, entry_key: Optional[str], etag: Optional[str], response: Optional[Response] = None):
+        self.entry_key = entry_key
+        self.etag = etag
+        # 命中时的响应（304 或缓存的完整响应），为 None 时需查询后调用 store
+        self.response = response
+
+    def store(self, data: Any, message: str) -> Response:
+        """序列化成功响应，写入缓存并附带 ETag 返回"""
+        body = render_success(data, message)
+        if self.entry_key is None:
+            return Response(content=body, media_type="application/json")
+        ResponseCache.backend().set(self.entry_key, body)
+        return Response(content=body, media_type="application/json", headers=_cache_headers(self.etag))
+
+
+class ResponseCache:
+    """
+    列表响应的读穿透缓存
+    每个列表（如某章节的对话列表）有一个版本号，写操作提交后递增；
+    缓存键和 ETag 都包含版本号，版本不变时直接返回序列化好的响应，客户端 ETag 一致时返回 304
+    """
+
+    _backend = None
+
+    @classmethod
+    def backend(cls):
+        if cls._backend is None:
+            if settings.RESPONSE_CACHE_BACKEND == "redis":
+                cls._backend = RedisCacheBackend(settings.RESPONSE_CACHE_REDIS_URL, settings.RESPONSE_CACHE_TTL)
+            else:
+                cls._backend = MemoryCacheBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+        return cls._backend
+
+    @staticmethod
+    def enabled() -> bool:
+        return settings.RESPONSE_CACHE_BACKEND != "none"
+
+    @classmethod
+    def lookup(cls, request: Request, namespace: str, parent_id: int, params: Hashable = ()) -> CachedList:
+        """
+        查找列表的缓存响应
+
+        Args:
+            request: 当前请求（读取 If-None-Match）
+            namespace: 列表命名空间（CHAPTER_LIST 等）
+            parent_id: 上级对象ID
+            params: 影响响应内容的其它查询参数（如分页游标）
+        """
+        if not cls.enabled():
+            return CachedList(None, None)
+
+        backend = cls.backend()
+        version = backend.get_version(f"{namespace}:{parent_id}")
+        if version < 0:
+            return CachedList(None, None)
+
+        variant = hashlib.blake2b(repr(params).encode(), digest_size=6).hexdigest()
+        etag = f'W/"{namespace}-{parent_id}-{version}-{variant}"'
+        if etag in _if_none_match(request):
+            metrics.CACHE_REQUESTS.labels(namespace, "not_modified").inc()
+            return CachedList(None, etag, Response(status_code=304, headers=_cache_headers(etag)))
+
+        entry_key = f"{namespace}:{parent_id}:{version}:{variant}"
+        body = backend.get(entry_key)
+        if body is not None:
+            metrics.CACHE_REQUESTS.labels(namespace, "hit").inc()
+            return CachedList(entry_key, etag, Response(
+                content=body, media_type="application/json", headers=_cache_headers(etag)
+            ))
+        metrics.CACHE_REQUESTS.labels(namespace, "miss").inc()
+        return CachedList(entry_key, etag)
+
+    @staticmethod
+    def touch(db, namespace: str, parent_id: Optional[int]):
+        """
+        标记列表已变更（事务提交后生效）
+        ORM 写操作由会话事件自动标记，绕过ORM的批量写入需显式调用
+
+        Args:
+            db: 同步或异步数据库会话
+            namespace: 列表命名空间
+            parent_id: 上级对象ID
+        """
+        if parent_id is None:
+            return
+        session = db.sync_session if isinstance(db, AsyncSession) else db
+        session.info.setdefault(_PENDING_KEY, set()).add((namespace, parent_id))
+
+    @classmethod
+    def touch_dialogues(cls, db: Session, dialogue_ids: Iterable[int]):
+        """标记一批对话所在章节的对话列表及所属项目的角色列表已变更（绕过ORM批量更新时调用）"""
+        ids = sorted(set(dialogue_ids))
+        for start in range(0, len(ids), 900):
+            rows = db.execute(
+                select(Dialogue.chapter_id, Chapter.project_id).distinct()
+                .join(Chapter, Chapter.id == Dialogue.chapter_id)
+                .where(Dialogue.id.in_(ids[start:start + 900]))
+            ).all()
+            for chapter_id, project_id in rows:
+                cls.touch(db, DIALOGUE_LIST, chapter_id)
+                cls.touch(db, CHARACTER_LIST, project_id)
+
+    @classmethod
+    def publish(cls, keys: Iterable[ListKey]):
+        """递增列表版本号，使旧缓存和旧 ETag 失效"""
+        if cls.enabled():
+            cls.backend().bump(f"{namespace}:{parent_id}" for namespace, parent_id in keys)
+
+
+def _cache_headers(etag: str) -> Dict[str, str]:
+    # no-cache：浏览器可缓存但每次需携带 ETag 重新验证
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def _if_none_match(request: Request) -> Set[str]:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return set()
+    return {tag.strip() for tag in header.split(",")}
+
+
+def _history_values(obj, field: str) -> Set[Any]:
+    """字段在本次flush前后的值"""
+    history = attributes.get_history(obj, field, passive=attributes.PASSIVE_NO_INITIALIZE)
+    return {v for v in chain(history.added, history.deleted, history.unchanged) if v is not None}
+
+
+def _stats_fields_changed(obj) -> bool:
+    return any(
+        attributes.get_history(obj, field, passive=attributes.PASSIVE_NO_INITIALIZE).has_changes()
+        for field in _CHARACTER_STATS_FIELDS
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _track_list_changes(session: Session, flush_context):
+    """根据本次flush的ORM变更标记受影响的列表"""
+    touched: Set[ListKey] = set()
+    chapter_projects: Dict[int, int] = {}
+    character_chapters: Set[int] = set()
+    new, deleted = session.new, session.deleted
+
+    for obj in chain(new, session.dirty, deleted):
+        if isinstance(obj, Dialogue):
+            if obj not in new and obj not in deleted and not session.is_modified(obj, include_collections=False):
+                continue
+            chapter_ids = _history_values(obj, "chapter_id")
+            touched.update((DIALOGUE_LIST, chapter_id) for chapter_id in chapter_ids)
+            # 角色列表含对话数和时长
+            if _history_values(obj, "character_id") and (
+                obj in new or obj in deleted or _stats_fields_changed(obj)
+            ):
+                character_chapters.update(chapter_ids)
+        elif isinstance(obj, Chapter):
+            chapter_projects[obj.id] = obj.project_id
+            touched.add((CHAPTER_LIST, obj.project_id))
+            if obj in deleted:
+                touched.add((DIALOGUE_LIST, obj.id))
+                touched.add((CHARACTER_LIST, obj.project_id))
+        elif isinstance(obj, Character):
+            touched.add((CHARACTER_LIST, obj.project_id))
+        elif isinstance(obj, Project) and obj in deleted:
+            touched.add((CHAPTER_LIST, obj.id))
+            touched.add((CHARACTER_LIST, obj.id))
+
+    missing = character_chapters - chapter_projects.keys()
+    if missing:
+        chapters = Chapter.__table__
+        chapter_projects.update(session.connection().execute(
+            select(chapters.c.id, chapters.c.project_id).where(chapters.c.id.in_(missing))
+        ).all())
+    touched.update(
+        (CHARACTER_LIST, chapter_projects[chapter_id])
+        for chapter_id in character_chapters if chapter_id in chapter_projects
+    )
+
+    if touched:
+        session.info.setdefault(_PENDING_KEY, set()).update(touched)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_list_changes(session: Session):
+    # 提交后才递增版本，避免并发读取在提交前以新版本缓存旧数据
+    touched = session.info.pop(_PENDING_KEY, None)
+    if touched:
+        ResponseCache.publish(touched)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_list_changes(session: Session):
+    session.info.pop(_PENDING_KEY, None)
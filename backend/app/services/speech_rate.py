@@ -0,0 +1,211 @@
+"""音色语速校准与时长预估服务"""
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.speech_rate import SpeechRate
+from app.services.text_parser import TextParser
+from app.services.tts_base import TTSConfig
+
+
+class SpeechRateEstimator:
+    """
+    基于实际合成时长的语速估算器
+    每次合成成功后按 (引擎, 音色, 语速倍率) 累计字数和时长，
+    预估时依次回退: 精确音色+倍率 -> 同音色其他倍率 -> 同引擎 -> 默认语速
+    """
+
+    # 无统计数据时的默认语速（字/秒，语速倍率为1.0时）
+    DEFAULT_CHARS_PER_SECOND = 3.5
+
+    # 统计样本数达到该值才使用
+    MIN_SAMPLES = 3
+
+    def __init__(self, db: Session):
+        """
+        加载全部语速统计（表按音色聚合，行数很少）
+
+        Args:
+            db: 数据库会话
+        """
+        self._exact: Dict[Tuple[str, str, float], Tuple[int, int, float]] = {}
+        # 归一化到 1.0 倍速后的累计 [样本数, 字数, 时长×倍率]
+        self._by_voice: Dict[Tuple[str, str], List[float]] = {}
+        self._by_engine: Dict[str, List[float]] = {}
+
+        for row in db.query(SpeechRate).all():
+            self._exact[(row.engine, row.voice_id, self._speed_key(row.speed))] = (
+                row.sample_count, row.total_chars, row.total_seconds
+            )
+            for bucket, key in ((self._by_voice, (row.engine, row.voice_id)),
+                                (self._by_engine, row.engine)):
+                acc = bucket.setdefault(key, [0, 0, 0.0])
+                acc[0] += row.sample_count
+                acc[1] += row.total_chars
+                acc[2] += row.total_seconds * row.speed
+
+    @staticmethod
+    def _speed_key(speed: Optional[float]) -> float:
+        """语速倍率统一保留两位小数作为统计键"""
+        return round(float(speed or 1.0), 2)
+
+    def chars_per_second(self, engine: str, voice_id: str, speed: float = 1.0) -> float:
+        """
+        获取指定音色的语速（字/秒）
+
+        Args:
+            engine: TTS引擎
+            voice_id: 音色ID
+            speed: 语速倍率
+
+        Returns:
+            语速（字/秒）
+        """
+        speed = self._speed_key(speed)
+
+        samples, chars, seconds = self._exact.get((engine, voice_id, speed), (0, 0, 0.0))
+        if samples >= self.MIN_SAMPLES and seconds > 0:
+            return chars / seconds
+
+        # 其他倍率的统计按倍率线性换算
+        for acc in (self._by_voice.get((engine, voice_id)), self._by_engine.get(engine)):
+            if acc and acc[0] >= self.MIN_SAMPLES and acc[2] > 0:
+                return acc[1] / acc[2] * speed
+
+        return self.DEFAULT_CHARS_PER_SECOND * speed
+
+    def estimate(self, text: str, config: TTSConfig) -> float:
+        """
+        预估文本在指定TTS配置下的朗读时长（秒）
+
+        Args:
+            text: 文本
+            config: TTS配置
+
+        Returns:
+            预估时长（秒，毫秒精度）
+        """
+        rate = self.chars_per_second(config.engine, config.voice_id, config.speed)
+        return TextParser.estimate_duration(text, words_per_second=rate)
+
+    def estimate_chapters(self, chapter_ids: List[int], db: Session) -> Dict[int, Dict]:
+        """
+        预估多个章节的总时长
+        已生成的对话使用实际时长，未生成的按角色音色预估；
+        尚未拆分对话的章节按旁白音色预估全文
+
+        Args:
+            chapter_ids: 章节ID列表
+            db: 数据库会话
+
+        Returns:
+            {章节ID: {estimated_duration, synthesized_duration, pending_duration,
+                      dialogue_count, pending_count}}
+        """
+        from app.models.chapter import Chapter
+        from app.models.character import Character
+        from app.models.dialogue import Dialogue, DialogueStatus
+        from app.services.audio_service import AudioService
+
+        stats = {
+            chapter_id: {
+                "estimated_duration": 0.0,
+                "synthesized_duration": 0.0,
+                "pending_duration": 0.0,
+                "dialogue_count": 0,
+                "pending_count": 0,
+            }
+            for chapter_id in chapter_ids
+        }
+        if not chapter_ids:
+            return stats
+
+        rows = db.query(
+            Dialogue.chapter_id,
+            Dialogue.content,
+            Dialogue.status,
+            Dialogue.duration,
+            Character.voice_config
+        ).outerjoin(
+            Character, Character.id == Dialogue.character_id
+        ).filter(
+            Dialogue.chapter_id.in_(chapter_ids)
+        ).all()
+
+        for row in rows:
+            item = stats[row.chapter_id]
+            item["dialogue_count"] += 1
+            if row.status == DialogueStatus.COMPLETED and row.duration:
+                item["synthesized_duration"] += row.duration
+            else:
+                config = AudioService.build_tts_config(row.voice_config)
+                item["pending_duration"] += self.estimate(row.content, config)
+                item["pending_count"] += 1
+
+        # 尚未拆分对话的章节按旁白音色预估全文
+        unsegmented = [cid for cid, item in stats.items() if item["dialogue_count"] == 0]
+        if unsegmented:
+            narrator = AudioService.build_tts_config(None)
+            for chapter in db.query(Chapter.id, Chapter.content).filter(Chapter.id.in_(unsegmented)):
+                stats[chapter.id]["pending_duration"] += self.estimate(chapter.content or "", narrator)
+
+        for item in stats.values():
+            item["synthesized_duration"] = round(item["synthesized_duration"], 3)
+            item["pending_duration"] = round(item["pending_duration"], 3)
+            item["estimated_duration"] = round(
+                item["synthesized_duration"] + item["pending_duration"], 3
+            )
+        return stats
+
+    @classmethod
+    def record(
+        cls,
+        db: Session,
+        engine: str,
+        voice_id: str,
+        speed: float,
+        text: str,
+        duration: float
+    ):
+        """
+        记录一次实际合成结果（累计更新，不提交事务）
+
+        Args:
+            db: 数据库会话
+            engine: TTS引擎
+            voice_id: 音色ID
+            speed: 语速倍率
+            text: 合成文本
+            duration: 实际音频时长（秒）
+        """
+        chars = TextParser.count_speech_chars(text)
+        if chars <= 0 or duration <= 0:
+            return
+
+        speed = cls._speed_key(speed)
+        query = db.query(SpeechRate).filter(
+            SpeechRate.engine == engine,
+            SpeechRate.voice_id == voice_id,
+            SpeechRate.speed == speed
+        )
+        row = query.first()
+        if row is None:
+            try:
+                with db.begin_nested():
+                    db.add(SpeechRate(
+                        engine=engine,
+                        voice_id=voice_id,
+                        speed=speed,
+                        sample_count=1,
+                        total_chars=chars,
+                        total_seconds=duration
+                    ))
+                return
+            except IntegrityError:
+                # 并发的合成先插入了同一音色的统计，改为累加
+                row = query.first()
+
+        # 以SQL表达式累加，避免并发写入时互相覆盖
+        row.sample_count = SpeechRate.sample_count + 1
+        row.total_chars = SpeechRate.total_chars + chars
+        row.total_seconds = SpeechRate.total_seconds + duration
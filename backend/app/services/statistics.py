@@ -0,0 +1,473 @@
+"""统计计数增量维护服务"""
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, select, update, delete, insert, func, case
+from sqlalchemy.orm import Session, attributes
+
+from app.models.project import Project
+from app.models.chapter import Chapter
+from app.models.character import Character
+from app.models.dialogue import Dialogue, DialogueStatus
+from app.models.statistics import ChapterStats, ProjectStats
+
+# 对话状态 -> 统计列
+STATUS_COLUMNS = {status: f"{status.value}_count" for status in DialogueStatus}
+
+# 章节/项目统计表中的计数列
+DIALOGUE_STATS_COLUMNS = ["dialogue_count", *STATUS_COLUMNS.values(), "synthesized_duration"]
+
+# 影响统计的对话字段
+DIALOGUE_STATS_FIELDS = ("chapter_id", "character_id", "status", "duration")
+
+_chapters = Chapter.__table__
+_characters = Character.__table__
+_projects = Project.__table__
+_chapter_stats = ChapterStats.__table__
+_project_stats = ProjectStats.__table__
+
+
+class StatsDelta:
+    """
+    一批写操作产生的统计增量
+    按章节/项目/角色累计，apply 时每个对象一条以SQL表达式累加的 UPDATE，并发写入互不覆盖
+    """
+
+    def __init__(self):
+        # 章节ID -> {统计列: 增量}（项目统计由章节增量汇总）
+        self.chapters: Dict[int, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        # 项目ID -> {projects 表计数列: 增量}
+        self.projects: Dict[int, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        # 角色ID -> {characters 表计数列: 增量}
+        self.characters: Dict[int, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        # 已知的章节 -> 项目映射（其余在 apply 时查询）
+        self.chapter_projects: Dict[int, int] = {}
+        # 本批中被删除的对象，不再更新其统计
+        self.deleted_chapters: Set[int] = set()
+        self.deleted_projects: Set[int] = set()
+        self.deleted_characters: Set[int] = set()
+
+    def add_dialogue(
+        self,
+        chapter_id: Optional[int],
+        character_id: Optional[int],
+        status: Any,
+        duration: Optional[float],
+        sign: int = 1
+    ):
+        """计入（sign=1）或扣除（sign=-1）一条对话"""
+        self.add_dialogues(chapter_id, character_id, status, 1, duration, sign)
+
+    def add_dialogues(
+        self,
+        chapter_id: Optional[int],
+        character_id: Optional[int],
+        status: Any,
+        count: int,
+        total_duration: Optional[float],
+        sign: int = 1
+    ):
+        """计入或扣除同一章节、角色、状态的一组对话（total_duration 为这组对话的时长之和）"""
+        if chapter_id is None or not count:
+            return
+        status = DialogueStatus(status) if status is not None else DialogueStatus.PENDING
+        synthesized = (total_duration or 0.0) if status == DialogueStatus.COMPLETED else 0.0
+
+        chapter = self.chapters[chapter_id]
+        chapter["dialogue_count"] += sign * count
+        chapter[STATUS_COLUMNS[status]] += sign * count
+        chapter["synthesized_duration"] += sign * synthesized
+
+        if character_id is not None:
+            character = self.characters[character_id]
+            character["dialogue_count"] += sign * count
+            character["total_duration"] += sign * synthesized
+
+    def add_chapter(self, project_id: int, sign: int = 1):
+        """计入或扣除一个章节"""
+        self.projects[project_id]["chapters_count"] += sign
+
+    def add_character(self, project_id: int, sign: int = 1):
+        """计入或扣除一个角色"""
+        self.projects[project_id]["characters_count"] += sign
+
+    def apply(self, db):
+        """
+        写入增量（不提交事务）
+
+        Args:
+            db: 数据库会话或连接
+        """
+        conn = db.connection() if isinstance(db, Session) else db
+
+        chapter_ids = [cid for cid, values in self.chapters.items() if _has_changes(values)]
+        missing = [cid for cid in chapter_ids if cid not in self.chapter_projects]
+        if missing:
+            self.chapter_projects.update(conn.execute(
+                select(_chapter_stats.c.chapter_id, _chapter_stats.c.project_id).where(
+                    _chapter_stats.c.chapter_id.in_(missing)
+                )
+            ).all())
+
+        # 章节统计，并按项目汇总
+        project_totals: Dict[int, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        for chapter_id in chapter_ids:
+            values = self.chapters[chapter_id]
+            if chapter_id not in self.deleted_chapters:
+                conn.execute(
+                    update(_chapter_stats)
+                    .where(_chapter_stats.c.chapter_id == chapter_id)
+                    .values(_increments(_chapter_stats, values))
+                )
+            project_id = self.chapter_projects.get(chapter_id)
+            if project_id is not None:
+                for column, value in values.items():
+                    project_totals[project_id][column] += value
+
+        for project_id, values in project_totals.items():
+            if project_id in self.deleted_projects:
+                continue
+            conn.execute(
+                update(_project_stats)
+                .where(_project_stats.c.project_id == project_id)
+                .values(_increments(_project_stats, values))
+            )
+            self.projects[project_id]["total_duration"] += values.get("synthesized_duration", 0.0)
+
+        # 项目和角色上的计数列（保持 updated_at 不变，计数变化不算作用户修改）
+        for table, deltas, deleted in (
+            (_projects, self.projects, self.deleted_projects),
+            (_characters, self.characters, self.deleted_characters),
+        ):
+            for row_id, values in deltas.items():
+                if row_id in deleted or not _has_changes(values):
+                    continue
+                conn.execute(
+                    update(table)
+                    .where(table.c.id == row_id)
+                    .values(updated_at=table.c.updated_at, **_increments(table, values))
+                )
+
+
+def _has_changes(values: Dict[str, float]) -> bool:
+    return any(abs(value) > 1e-9 for value in values.values())
+
+
+def _increments(table, values: Dict[str, float]) -> Dict[str, Any]:
+    """{列: 增量} -> {列: 列 + 增量}（空值按0处理，计数列取整）"""
+    result = {}
+    for column, value in values.items():
+        if abs(value) <= 1e-9:
+            continue
+        value = round(value, 3) if "duration" in column else int(round(value))
+        result[column] = func.coalesce(table.c[column], 0) + value
+    return result
+
+
+class StatsService:
+    """
+    项目/章节/角色统计的增量维护
+    ORM 写操作由会话 after_flush 事件自动计入；
+    绕过ORM的批量写入（BulkInsertService/BulkUpdateService）需调用对应方法
+    """
+
+    @staticmethod
+    def create_rows(db, chapters: Iterable[Tuple[int, int]] = (), project_ids: Iterable[int] = ()):
+        """
+        为新章节/新项目创建零值统计行（不提交事务）
+
+        Args:
+            db: 数据库会话或连接
+            chapters: [(章节ID, 项目ID)]
+            project_ids: 项目ID列表
+        """
+        conn = db.connection() if isinstance(db, Session) else db
+        chapter_rows = [{"chapter_id": cid, "project_id": pid} for cid, pid in chapters]
+        project_rows = [{"project_id": pid} for pid in project_ids]
+        if project_rows:
+            conn.execute(insert(_project_stats), [_zero_row(row) for row in project_rows])
+        if chapter_rows:
+            conn.execute(insert(_chapter_stats), [_zero_row(row) for row in chapter_rows])
+
+    @classmethod
+    def chapters_inserted(cls, db: Session, project_id: int, chapter_ids: List[int]):
+        """批量插入章节后调用：创建统计行并累加项目章节数"""
+        if not chapter_ids:
+            return
+        cls.create_rows(db, chapters=[(cid, project_id) for cid in chapter_ids])
+        delta = StatsDelta()
+        delta.add_chapter(project_id, len(chapter_ids))
+        delta.apply(db)
+
+    @staticmethod
+    def dialogues_inserted(db: Session, rows: List[Dict[str, Any]]):
+        """批量插入对话后调用（rows 为插入的行数据）"""
+        delta = StatsDelta()
+        for row in rows:
+            delta.add_dialogue(
+                row.get("chapter_id"),
+                row.get("character_id"),
+                row.get("status"),
+                row.get("duration")
+            )
+        delta.apply(db)
+
+    @staticmethod
+    def dialogue_update_delta(db: Session, ids: Iterable[int], values: Dict[str, Any]) -> StatsDelta:
+        """
+        计算按ID批量更新对话产生的统计增量（需在 UPDATE 之前调用，更新后再 apply）
+
+        Args:
+            db: 数据库会话
+            ids: 待更新的对话ID
+            values: 要设置的列值
+
+        Returns:
+            统计增量
+        """
+        delta = StatsDelta()
+        if not any(field in values for field in DIALOGUE_STATS_FIELDS):
+            return delta
+
+        ids = sorted(set(ids))
+        columns = [Dialogue.__table__.c[field] for field in DIALOGUE_STATS_FIELDS]
+        for start in range(0, len(ids), 900):
+            rows = db.execute(select(*columns).where(Dialogue.id.in_(ids[start:start + 900]))).all()
+            for row in rows:
+                old = dict(zip(DIALOGUE_STATS_FIELDS, row))
+                new = {**old, **{k: v for k, v in values.items() if k in DIALOGUE_STATS_FIELDS}}
+                if old != new:
+                    delta.add_dialogue(sign=-1, **old)
+                    delta.add_dialogue(sign=1, **new)
+        return delta
+
+    @staticmethod
+    def chapter_delete_delta(db: Session, chapter_id: int, project_id: int) -> StatsDelta:
+        """
+        计算删除章节（连同其对话）产生的统计增量（需在删除之前调用，删除后再 apply）
+        按角色和状态聚合章节内的对话，不逐条加载
+        """
+        delta = StatsDelta()
+        delta.deleted_chapters.add(chapter_id)
+        delta.chapter_projects[chapter_id] = project_id
+        delta.add_chapter(project_id, -1)
+
+        dialogues = Dialogue.__table__
+        rows = db.execute(
+            select(
+                dialogues.c.character_id,
+                dialogues.c.status,
+                func.count(dialogues.c.id),
+                func.sum(func.coalesce(dialogues.c.duration, 0))
+            ).where(dialogues.c.chapter_id == chapter_id).group_by(
+                dialogues.c.character_id, dialogues.c.status
+            )
+        ).all()
+        for character_id, status, count, duration in rows:
+            delta.add_dialogues(chapter_id, character_id, status, count, duration, sign=-1)
+        return delta
+
+    @staticmethod
+    def delete_rows(db, chapter_ids: Iterable[int] = (), project_ids: Iterable[int] = ()):
+        """删除章节/项目的统计行（不提交事务）"""
+        conn = db.connection() if isinstance(db, Session) else db
+        chapter_ids, project_ids = list(chapter_ids), list(project_ids)
+        if chapter_ids:
+            conn.execute(delete(_chapter_stats).where(_chapter_stats.c.chapter_id.in_(chapter_ids)))
+        if project_ids:
+            conn.execute(delete(_chapter_stats).where(_chapter_stats.c.project_id.in_(project_ids)))
+            conn.execute(delete(_project_stats).where(_project_stats.c.project_id.in_(project_ids)))
+
+    @classmethod
+    def rebuild(cls, db: Session, project_ids: Optional[List[int]] = None):
+        """
+        从明细数据重新计算项目统计（不提交事务），用于初始化已有数据或修复统计偏差
+
+        Args:
+            db: 数据库会话
+            project_ids: 要重建的项目ID（为空时重建全部项目）
+        """
+        if project_ids is None:
+            project_ids = list(db.execute(select(_projects.c.id)).scalars())
+        if not project_ids:
+            return
+
+        for start in range(0, len(project_ids), 500):
+            cls._rebuild_projects(db, project_ids[start:start + 500])
+
+    @classmethod
+    def _rebuild_projects(cls, db: Session, project_ids: List[int]):
+        conn = db.connection()
+        dialogues = Dialogue.__table__
+        completed_duration = func.sum(case(
+            (dialogues.c.status == DialogueStatus.COMPLETED, func.coalesce(dialogues.c.duration, 0)),
+            else_=0
+        ))
+
+        chapter_rows = conn.execute(
+            select(_chapters.c.id, _chapters.c.project_id).where(_chapters.c.project_id.in_(project_ids))
+        ).all()
+        chapters = {row.id: _zero_row({"chapter_id": row.id, "project_id": row.project_id}) for row in chapter_rows}
+        projects = {pid: _zero_row({"project_id": pid}) for pid in project_ids}
+
+        # 按章节、状态汇总对话
+        status_rows = conn.execute(
+            select(
+                dialogues.c.chapter_id,
+                dialogues.c.status,
+                func.count(dialogues.c.id),
+                func.sum(func.coalesce(dialogues.c.duration, 0))
+            ).join(_chapters, _chapters.c.id == dialogues.c.chapter_id).where(
+                _chapters.c.project_id.in_(project_ids)
+            ).group_by(dialogues.c.chapter_id, dialogues.c.status)
+        ).all()
+        for chapter_id, status, count, duration in status_rows:
+            chapter = chapters.get(chapter_id)
+            if chapter is None:
+                continue
+            status = DialogueStatus(status) if status is not None else DialogueStatus.PENDING
+            for row in (chapter, projects[chapter["project_id"]]):
+                row["dialogue_count"] += count
+                row[STATUS_COLUMNS[status]] += count
+                if status == DialogueStatus.COMPLETED:
+                    row["synthesized_duration"] += duration or 0.0
+
+        cls.delete_rows(conn, project_ids=project_ids)
+        conn.execute(insert(_project_stats), list(projects.values()))
+        if chapters:
+            conn.execute(insert(_chapter_stats), list(chapters.values()))
+
+        # 项目计数列
+        chapter_counts = dict(conn.execute(
+            select(_chapters.c.project_id, func.count(_chapters.c.id)).where(
+                _chapters.c.project_id.in_(project_ids)
+            ).group_by(_chapters.c.project_id)
+        ).all())
+        character_counts = dict(conn.execute(
+            select(_characters.c.project_id, func.count(_characters.c.id)).where(
+                _characters.c.project_id.in_(project_ids)
+            ).group_by(_characters.c.project_id)
+        ).all())
+        for project_id, row in projects.items():
+            conn.execute(
+                update(_projects).where(_projects.c.id == project_id).values(
+                    updated_at=_projects.c.updated_at,
+                    chapters_count=chapter_counts.get(project_id, 0),
+                    characters_count=character_counts.get(project_id, 0),
+                    total_duration=round(row["synthesized_duration"], 3)
+                )
+            )
+
+        # 角色计数列
+        character_rows = conn.execute(
+            select(
+                _characters.c.id,
+                func.count(dialogues.c.id),
+                completed_duration
+            ).outerjoin(dialogues, dialogues.c.character_id == _characters.c.id).where(
+                _characters.c.project_id.in_(project_ids)
+            ).group_by(_characters.c.id)
+        ).all()
+        for character_id, count, duration in character_rows:
+            conn.execute(
+                update(_characters).where(_characters.c.id == character_id).values(
+                    updated_at=_characters.c.updated_at,
+                    dialogue_count=count,
+                    total_duration=round(duration or 0.0, 3)
+                )
+            )
+
+    @classmethod
+    def ensure_all(cls, db: Session) -> int:
+        """
+        为缺少统计行的项目重建统计（启动时调用，补齐升级前的已有数据）
+
+        Returns:
+            重建的项目数
+        """
+        missing_projects = select(_projects.c.id).outerjoin(
+            _project_stats, _project_stats.c.project_id == _projects.c.id
+        ).where(_project_stats.c.project_id.is_(None))
+        missing_chapters = select(_chapters.c.project_id).outerjoin(
+            _chapter_stats, _chapter_stats.c.chapter_id == _chapters.c.id
+        ).where(_chapter_stats.c.chapter_id.is_(None))
+
+        project_ids = sorted(set(db.execute(missing_projects).scalars()) | set(db.execute(missing_chapters).scalars()))
+        cls.rebuild(db, project_ids)
+        return len(project_ids)
+
+
+def _zero_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """补齐统计列的零值"""
+    return {**{column: 0 for column in DIALOGUE_STATS_COLUMNS}, "synthesized_duration": 0.0, **row}
+
+
+def _dialogue_state(obj: Dialogue, old: bool) -> Dict[str, Any]:
+    """取对话在本次flush前（old=True）或后的统计相关字段值"""
+    state = {}
+    for field in DIALOGUE_STATS_FIELDS:
+        history = attributes.get_history(obj, field, passive=attributes.PASSIVE_NO_INITIALIZE)
+        if old and history.deleted:
+            state[field] = history.deleted[0]
+        elif not old and history.added:
+            state[field] = history.added[0]
+        elif history.unchanged:
+            state[field] = history.unchanged[0]
+        else:
+            state[field] = obj.__dict__.get(field)
+    return state
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_statistics(session: Session, flush_context):
+    """根据本次flush的新增/修改/删除计入统计增量（flush后、提交前执行，与数据变更在同一事务中）"""
+    delta = StatsDelta()
+    new_chapters: List[Tuple[int, int]] = []
+    new_projects: List[int] = []
+
+    for obj in session.deleted:
+        if isinstance(obj, Dialogue):
+            delta.add_dialogue(sign=-1, **_dialogue_state(obj, old=True))
+        elif isinstance(obj, Chapter):
+            delta.deleted_chapters.add(obj.id)
+            delta.chapter_projects[obj.id] = obj.project_id
+            delta.add_chapter(obj.project_id, -1)
+        elif isinstance(obj, Character):
+            delta.deleted_characters.add(obj.id)
+            delta.add_character(obj.project_id, -1)
+        elif isinstance(obj, Project):
+            delta.deleted_projects.add(obj.id)
+
+    for obj in session.new:
+        if isinstance(obj, Dialogue):
+            delta.add_dialogue(**_dialogue_state(obj, old=False))
+        elif isinstance(obj, Chapter):
+            new_chapters.append((obj.id, obj.project_id))
+            delta.chapter_projects[obj.id] = obj.project_id
+            delta.add_chapter(obj.project_id)
+        elif isinstance(obj, Character):
+            delta.add_character(obj.project_id)
+        elif isinstance(obj, Project):
+            new_projects.append(obj.id)
+
+    for obj in session.dirty:
+        if isinstance(obj, Dialogue) and session.is_modified(obj, include_collections=False):
+            old = _dialogue_state(obj, old=True)
+            new = _dialogue_state(obj, old=False)
+            if old != new:
+                delta.add_dialogue(sign=-1, **old)
+                delta.add_dialogue(sign=1, **new)
+
+    if not (new_chapters or new_projects or delta.deleted_chapters or delta.deleted_projects
+            or delta.chapters or delta.projects or delta.characters):
+        return
+
+    conn = session.connection()
+    StatsService.delete_rows(conn, delta.deleted_chapters, delta.deleted_projects)
+    StatsService.create_rows(conn, new_chapters, new_projects)
+    delta.apply(conn)
+
+
+# 修改这些字段时总是先取得旧值（对象已过期时也会加载），保证增量计算准确
+for _attribute in (Dialogue.chapter_id, Dialogue.character_id, Dialogue.status, Dialogue.duration):
+    event.listen(_attribute, "set", lambda target, value, oldvalue, initiator: None, active_history=True)
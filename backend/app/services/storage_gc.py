@@ -0,0 +1,297 @@
+"""存储文件回收服务"""
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import asyncio
+import os
+import re
+import time
+
+from sqlalchemy import select
+
+from app.core import tracing
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.project import Project
+from app.models.chapter import Chapter
+from app.models.dialogue import Dialogue
+from app.models.audio_export import AudioExport
+
+# 存储目录中由数据库记录引用的文件（其余文件不做处理）
+_DIALOGUE_AUDIO = re.compile(r"^dialogue_(\d+)\.[\w.]+$")  # 含合成中途退出留下的 .part 临时文件
+_CHAPTER_EXPORT = re.compile(r"^chapter_(\d+)\.\w+$")
+_PROJECT_EXPORT = re.compile(r"^project_(\d+)\.\w+$")
+
+# 文件分类：(类型, 所属章节/项目ID, 对话ID)
+FileKind = Tuple[str, Optional[int], Optional[int]]
+
+
+class StorageGC:
+    """
+    异步回收存储目录中不再被数据库引用的文件
+    - 删除项目/章节后调用 schedule，由后台任务分批删除其音频目录、导出文件和上传文件，不阻塞删除接口
+    - 每隔 STORAGE_GC_INTERVAL 秒巡检一次存储目录，回收漏删的文件（进程在回收前退出、
+      重置音频后留下的旧文件、生成中途被删除的章节等）
+    文件是否被引用按批查询数据库判断；最近修改的文件（可能正在生成、尚未写入数据库）在宽限期内不回收
+    """
+
+    _queue: Optional[asyncio.Queue] = None
+    _tasks: List[asyncio.Task] = []
+    _lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    async def start(cls):
+        """启动回收任务（应用启动时调用）"""
+        cls._queue = asyncio.Queue()
+        cls._lock = asyncio.Lock()
+        cls._tasks = [asyncio.create_task(cls._work())]
+        if settings.STORAGE_GC_INTERVAL > 0:
+            cls._tasks.append(asyncio.create_task(cls._reconcile_periodically()))
+
+    @classmethod
+    async def stop(cls):
+        """停止回收任务（应用关闭时调用，未处理的回收留给下次巡检）"""
+        for task in cls._tasks:
+            task.cancel()
+        await asyncio.gather(*cls._tasks, return_exceptions=True)
+        cls._tasks = []
+        cls._queue = None
+
+    @classmethod
+    def schedule(cls, project_ids: Iterable[int] = (), chapter_ids: Iterable[int] = ()):
+        """
+        登记已删除的项目/章节，事务提交后调用
+
+        Args:
+            project_ids: 已删除的项目ID（回收上传文件和项目导出文件）
+            chapter_ids: 已删除的章节ID（回收章节音频目录和章节导出文件）
+        """
+        if cls._queue is None:
+            # 回收任务未启动（如在脚本中调用），由下次巡检处理
+            return
+        cls._queue.put_nowait((tuple(project_ids), tuple(chapter_ids), tracing.current_context()))
+
+    @classmethod
+    async def _work(cls):
+        while True:
+            project_ids, chapter_ids, trace_context = await cls._queue.get()
+            try:
+                async with cls._lock:
+                    # 回收记入发起删除的请求所在的追踪
+                    root = trace_context is not None
+                    with tracing.span("job.storage_gc", parent=trace_context, root=root) as span:
+                        result = await asyncio.to_thread(cls.collect, project_ids, chapter_ids)
+                        span.set_attribute("gc.deleted", result["deleted"])
+                if result["deleted"]:
+                    print(f"🧹 已回收 {result['deleted']} 个文件（{result['bytes']} 字节）")
+            except Exception as e:
+                print(f"⚠️ 回收存储文件失败: {e}")
+            finally:
+                cls._queue.task_done()
+
+    @classmethod
+    async def _reconcile_periodically(cls):
+        while True:
+            await asyncio.sleep(settings.STORAGE_GC_INTERVAL)
+            try:
+                async with cls._lock:
+                    result = await asyncio.to_thread(cls.reconcile)
+                if result["deleted"]:
+                    print(f"🧹 巡检回收 {result['deleted']} 个孤立文件（{result['bytes']} 字节）")
+            except Exception as e:
+                print(f"⚠️ 存储巡检失败: {e}")
+
+    @classmethod
+    def collect(cls, project_ids: Iterable[int] = (), chapter_ids: Iterable[int] = ()) -> Dict[str, int]:
+        """
+        回收已删除项目/章节的文件（同步执行）
+        所属项目/章节已不存在的文件不受宽限期限制
+
+        Returns:
+            {"scanned": 检查的文件数, "deleted": 删除的文件数, "bytes": 释放的字节数}
+        """
+        storage = Path(settings.STORAGE_PATH)
+        audio_dir = storage / "audio"
+        exports_dir = audio_dir / "exports"
+
+        paths: List[Iterable[Path]] = []
+        for chapter_id in chapter_ids:
+            paths.append(_walk(audio_dir / str(chapter_id)))
+            paths.append(exports_dir.glob(f"chapter_{chapter_id}.*"))
+        for project_id in project_ids:
+            paths.append(_walk(storage / "uploads" / str(project_id)))
+            paths.append(exports_dir.glob(f"project_{project_id}.*"))
+        return cls._sweep((path for group in paths for path in group), orphans_expire=True)
+
+    @classmethod
+    def reconcile(cls) -> Dict[str, int]:
+        """
+        巡检整个存储目录，回收未被引用且超过宽限期的文件（同步执行）
+
+        Returns:
+            {"scanned": 检查的文件数, "deleted": 删除的文件数, "bytes": 释放的字节数}
+        """
+        storage = Path(settings.STORAGE_PATH)
+        files = (
+            path for root in ("audio", "uploads", "temp")
+            for path in _walk(storage / root)
+        )
+        return cls._sweep(files, orphans_expire=False)
+
+    @classmethod
+    def _sweep(cls, paths: Iterable[Path], orphans_expire: bool) -> Dict[str, int]:
+        """分批判断文件是否仍被引用并删除未引用的文件"""
+        storage = Path(settings.STORAGE_PATH)
+        result = {"scanned": 0, "deleted": 0, "bytes": 0}
+        batch_size = max(settings.STORAGE_GC_BATCH_SIZE, 1)
+        paths = iter(paths)
+        while True:
+            batch = list(islice(paths, batch_size))
+            if not batch:
+                break
+            result["scanned"] += len(batch)
+            classified = [(path, _classify(storage, path)) for path in batch]
+            classified = [(path, kind) for path, kind in classified if kind is not None]
+            if not classified:
+                continue
+
+            live, owners = cls._liveness(classified)
+            recent_after = time.time() - settings.STORAGE_GC_GRACE_SECONDS
+            parents: Set[Path] = set()
+            for path, kind in classified:
+                if path in live:
+                    continue
+                try:
+                    stat = path.stat()
+                    # 所属对象仍存在时文件可能正在生成、尚未写入数据库
+                    if stat.st_mtime > recent_after and not (orphans_expire and kind[1] not in owners[kind[0]]):
+                        continue
+                    path.unlink()
+                except FileNotFoundError:
+                    continue
+                result["deleted"] += 1
+                result["bytes"] += stat.st_size
+                parents.add(path.parent)
+
+            for parent in parents:
+                _remove_empty_dirs(storage, parent)
+        return result
+
+    @staticmethod
+    def _liveness(classified: List[Tuple[Path, FileKind]]) -> Tuple[Set[Path], Dict[str, Set[int]]]:
+        """
+        查询一批文件的引用情况
+
+        Returns:
+            (仍被引用的文件, {类型: 仍存在的所属项目/章节ID})
+        """
+        ids: Dict[str, Set[int]] = {"dialogue": set(), "chapter": set(), "project": set()}
+        for _, (kind, owner_id, dialogue_id) in classified:
+            if kind == "dialogue":
+                ids["dialogue"].add(dialogue_id)
+                ids["chapter"].add(owner_id)
+            elif kind == "chapter_export":
+                ids["chapter"].add(owner_id)
+            elif kind in ("project_export", "upload"):
+                ids["project"].add(owner_id)
+
+        db = SessionLocal()
+        try:
+            dialogues = {}
+            if ids["dialogue"]:
+                dialogues = {
+                    row.id: row for row in db.execute(
+                        select(Dialogue.id, Dialogue.chapter_id, Dialogue.audio_path)
+                        .where(Dialogue.id.in_(ids["dialogue"]))
+                    )
+                }
+            chapters = set(db.execute(
+                select(Chapter.id).where(Chapter.id.in_(ids["chapter"]))
+            ).scalars()) if ids["chapter"] else set()
+            projects = set(db.execute(
+                select(Project.id).where(Project.id.in_(ids["project"]))
+            ).scalars()) if ids["project"] else set()
+            export_files: Set[Tuple[int, str]] = set()
+            if projects:
+                export_files = {
+                    (project_id, os.path.basename(file_path))
+                    for project_id, file_path in db.execute(
+                        select(AudioExport.project_id, AudioExport.file_path)
+                        .where(AudioExport.project_id.in_(projects))
+                    )
+                }
+        finally:
+            db.close()
+
+        live: Set[Path] = set()
+        for path, (kind, owner_id, dialogue_id) in classified:
+            if kind == "dialogue":
+                row = dialogues.get(dialogue_id)
+                # 对话存在但已重置音频或改用了其它文件时，旧文件同样回收
+                if row is not None and row.chapter_id == owner_id and row.audio_path \
+                        and os.path.basename(row.audio_path) == path.name:
+                    live.add(path)
+            elif kind == "chapter_export":
+                if owner_id in chapters:
+                    live.add(path)
+            elif kind == "project_export":
+                if (owner_id, path.name) in export_files:
+                    live.add(path)
+            elif kind == "upload":
+                if owner_id in projects:
+                    live.add(path)
+
+        owners = {
+            "dialogue": chapters,
+            "chapter_export": chapters,
+            "project_export": projects,
+            "upload": projects,
+            "temp": set(),
+        }
+        return live, owners
+
+
+def _walk(root: Path) -> Iterator[Path]:
+    """遍历目录下的文件（目录不存在时为空）"""
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            yield Path(dirpath) / filename
+
+
+def _classify(storage: Path, path: Path) -> Optional[FileKind]:
+    """按存储布局识别文件，无法识别的返回 None"""
+    try:
+        parts = path.relative_to(storage).parts
+    except ValueError:
+        return None
+    if len(parts) < 2:
+        return None
+
+    root, name = parts[0], parts[-1]
+    if root == "audio" and len(parts) == 3:
+        if parts[1] == "exports":
+            match = _CHAPTER_EXPORT.match(name)
+            if match:
+                return "chapter_export", int(match.group(1)), None
+            match = _PROJECT_EXPORT.match(name)
+            if match:
+                return "project_export", int(match.group(1)), None
+            return None
+        match = _DIALOGUE_AUDIO.match(name)
+        if parts[1].isdigit() and match:
+            return "dialogue", int(parts[1]), int(match.group(1))
+    elif root == "uploads" and len(parts) >= 3 and parts[1].isdigit():
+        return "upload", int(parts[1]), None
+    elif root == "temp":
+        return "temp", None, None
+    return None
+
+
+def _remove_empty_dirs(storage: Path, directory: Path):
+    """删除空目录直到存储的一级目录（audio/uploads/temp 本身保留）"""
+    while len(directory.relative_to(storage).parts) > 1:
+        try:
+            directory.rmdir()
+        except OSError:
+            return
+        directory = directory.parent
@@ -0,0 +1,224 @@
+"""对话合成的单飞（single-flight）：同一对话同时只合成一次，并发的请求等待并共享结果"""
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+import asyncio
+import os
+import random
+import socket
+import time
+import uuid
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, async_engine
+from app.models.synthesis_lease import SynthesisLease
+
+T = TypeVar("T")
+
+# 本进程的租约持有者前缀
+_PROCESS = f"{socket.gethostname()}:{os.getpid()}"
+# 租约读写遇到锁等待超时、死锁等错误时的重试次数
+_DB_RETRIES = 5
+
+
+class SynthesisFlight:
+    """
+    按 对话ID + 指纹（文本和音色配置）去重合成
+    - 进程内：第一个请求执行合成（领头者），同一对话同一指纹的后续请求等待其结果；
+      指纹不同（合成期间文本或音色被修改）时等待领头者结束后再合成，同一对话的文件不会被并发写入
+    - 跨进程（SYNTHESIS_LEASE_ENABLED）：领头者在 synthesis_leases 表中取得对话的租约后才合成，
+      合成期间每 1/3 租期续约一次，完成（结果已提交）后删除；租约被其它进程以相同指纹持有时
+      等待其释放，然后直接读取数据库中的结果；持有者异常退出时租约过期后被接管，
+      本进程遗留的租约（释放失败）立即接管；SQLite 只用于单进程部署，不使用租约
+    领头者被取消时（如预生成被取消）等待者改为自行合成；领头者失败时等待者得到同样的异常或失败结果
+    """
+
+    # 对话ID -> (指纹, 结果)
+    _flights: Dict[int, Tuple[str, asyncio.Future]] = {}
+
+    @classmethod
+    async def run(
+        cls,
+        dialogue_id: int,
+        fingerprint: str,
+        synthesize: Callable[[], Awaitable[T]]
+    ) -> Tuple[Optional[T], bool]:
+        """
+        执行或等待一次合成
+
+        Args:
+            dialogue_id: 对话ID
+            fingerprint: 合成内容指纹
+            synthesize: 合成并提交结果的函数（只由领头者调用）
+
+        Returns:
+            (结果, 是否由本请求合成)；结果为 None 表示由其它进程合成，须从数据库读取
+        """
+        while True:
+            flight = cls._flights.get(dialogue_id)
+            if flight is None:
+                break
+            held, future = flight
+            try:
+                # shield：等待者被取消时不影响领头者
+                value = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    continue
+                raise
+            except Exception:
+                if held == fingerprint:
+                    raise
+                continue
+            if held == fingerprint:
+                metrics.SYNTHESIS_DEDUPED.labels("process").inc()
+                return value, False
+
+        future = asyncio.get_running_loop().create_future()
+        flight = cls._flights[dialogue_id] = (fingerprint, future)
+        try:
+            value, synthesized = await cls._lead(dialogue_id, fingerprint, synthesize)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # 没有等待者时避免 "exception was never retrieved"
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value, synthesized
+        finally:
+            if cls._flights.get(dialogue_id) is flight:
+                del cls._flights[dialogue_id]
+
+    @classmethod
+    async def _lead(
+        cls,
+        dialogue_id: int,
+        fingerprint: str,
+        synthesize: Callable[[], Awaitable[T]]
+    ) -> Tuple[Optional[T], bool]:
+        if not cls.lease_enabled():
+            return await synthesize(), True
+
+        owner = f"{_PROCESS}:{uuid.uuid4().hex[:8]}"
+        if not await cls._acquire(dialogue_id, fingerprint, owner):
+            metrics.SYNTHESIS_DEDUPED.labels("lease").inc()
+            return None, False
+
+        heartbeat = asyncio.create_task(cls._renew(dialogue_id, owner))
+        try:
+            return await synthesize(), True
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+            await asyncio.shield(cls._release(dialogue_id, owner))
+
+    @staticmethod
+    def lease_enabled() -> bool:
+        """是否使用跨进程租约（SQLite 下并发写入会互相阻塞，且只用于单进程部署，不使用）"""
+        return settings.SYNTHESIS_LEASE_ENABLED and async_engine.dialect.name != "sqlite"
+
+    @staticmethod
+    def _backoff(failures: int) -> float:
+        return settings.SYNTHESIS_LEASE_POLL_INTERVAL * failures * (0.5 + random.random())
+
+    @classmethod
+    async def _acquire(cls, dialogue_id: int, fingerprint: str, owner: str) -> bool:
+        """
+        取得对话的租约；其它进程以相同指纹合成完成时返回 False（无需再合成）
+        """
+        waiting_same = False
+        failures = 0
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    now = time.time()
+                    lease = (await db.execute(
+                        select(SynthesisLease.fingerprint, SynthesisLease.owner, SynthesisLease.expires_at)
+                        .where(SynthesisLease.dialogue_id == dialogue_id)
+                    )).first()
+                    if lease is None:
+                        if waiting_same:
+                            return False
+                        db.add(SynthesisLease(
+                            dialogue_id=dialogue_id,
+                            fingerprint=fingerprint,
+                            owner=owner,
+                            expires_at=now + settings.SYNTHESIS_LEASE_TTL
+                        ))
+                        try:
+                            await db.commit()
+                            return True
+                        except IntegrityError:
+                            # 其它进程同时取得了租约
+                            await db.rollback()
+                            continue
+                    # 本进程同一对话只有一个领头者，本进程持有的租约是释放失败遗留的
+                    stale = lease.owner.startswith(f"{_PROCESS}:")
+                    if stale or lease.expires_at < now:
+                        # 持有者未续约（进程已退出）或为本进程遗留，接管
+                        taken = await db.execute(
+                            update(SynthesisLease)
+                            .where(SynthesisLease.dialogue_id == dialogue_id, SynthesisLease.owner == lease.owner)
+                            .values(fingerprint=fingerprint, owner=owner, expires_at=now + settings.SYNTHESIS_LEASE_TTL)
+                        )
+                        await db.commit()
+                        if taken.rowcount == 1:
+                            print(f"⚠️ 接管对话 {dialogue_id} {'本进程遗留' if stale else '过期'}的合成租约")
+                            return True
+                        continue
+                    waiting_same = lease.fingerprint == fingerprint
+            except OperationalError as e:
+                # 锁等待超时、死锁等：退避后重试
+                failures += 1
+                if failures > _DB_RETRIES:
+                    raise
+                print(f"⚠️ 取得对话 {dialogue_id} 的合成租约失败（第 {failures} 次），稍后重试: {e}")
+                await asyncio.sleep(cls._backoff(failures))
+                continue
+            await asyncio.sleep(settings.SYNTHESIS_LEASE_POLL_INTERVAL)
+
+    @classmethod
+    async def _renew(cls, dialogue_id: int, owner: str):
+        interval = max(settings.SYNTHESIS_LEASE_TTL / 3, 0.1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with AsyncSessionLocal() as db:
+                    renewed = await db.execute(
+                        update(SynthesisLease)
+                        .where(SynthesisLease.dialogue_id == dialogue_id, SynthesisLease.owner == owner)
+                        .values(expires_at=time.time() + settings.SYNTHESIS_LEASE_TTL)
+                    )
+                    await db.commit()
+                if renewed.rowcount != 1:
+                    print(f"⚠️ 对话 {dialogue_id} 的合成租约已被接管")
+                    return
+            except Exception as e:
+                print(f"⚠️ 续约对话 {dialogue_id} 的合成租约失败: {e}")
+
+    @classmethod
+    async def _release(cls, dialogue_id: int, owner: str):
+        for failures in range(1, _DB_RETRIES + 2):
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        delete(SynthesisLease)
+                        .where(SynthesisLease.dialogue_id == dialogue_id, SynthesisLease.owner == owner)
+                    )
+                    await db.commit()
+                return
+            except OperationalError as e:
+                if failures > _DB_RETRIES:
+                    # 未释放的租约由本进程的下一次合成立即接管，其它进程在过期后接管
+                    print(f"⚠️ 释放对话 {dialogue_id} 的合成租约失败: {e}")
+                    return
+                await asyncio.sleep(cls._backoff(failures))
+            except Exception as e:
+                print(f"⚠️ 释放对话 {dialogue_id} 的合成租约失败: {e}")
+                return
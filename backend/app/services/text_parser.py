@@ -5,10 +5,15 @@ from pathlib import Path
 import docx
 from PyPDF2 import PdfReader
 
+from app.core.tracing import traced
+
 
 class TextParser:
     """文本解析器"""
     
+    # 解析器版本（对话提取规则变化时递增，使解析缓存失效）
+    PARSER_VERSION = 2
+    
     # 章节标题识别模式
     CHAPTER_PATTERNS = [
         r'^第[零一二三四五六七八九十百千0-9]+章\s*.+',
@@ -18,13 +23,32 @@ class TextParser:
         r'^[零一二三四五六七八九十百千]+[\.\、]\s*.+',
     ]
     
-    # 对话标记识别模式
-    DIALOGUE_PATTERNS = [
-        r'(.+?)说：["""](.+?)["""]',
-        r'(.+?)道：["""](.+?)["""]',
-        r'(.+?)：["""](.+?)["""]',
-        r'"(.+?)"，(.+?)说',
-    ]
+    # 引号配对（开引号 -> 闭引号）
+    QUOTE_PAIRS = {
+        '"': '"',
+        '“': '”',
+        '‘': '’',
+        '「': '」',
+        '『': '』',
+    }
+    
+    # 说话动词（长词在前，优先匹配）
+    SPEECH_VERBS = (
+        '说道', '笑道', '问道', '答道', '喊道', '叫道', '骂道', '叹道',
+        '说', '道', '问', '答', '喊', '叫',
+    )
+    
+    # 署名与引号之间的分隔符
+    ATTRIBUTION_SEPARATORS = '：:，,'
+    
+    # 子句边界（说话人不会跨越这些字符）
+    CLAUSE_DELIMITERS = frozenset('，,。.！!？?；;：:、…—"“”‘’「」『』')
+    
+    # 标点字符（仅由这些字符组成的旁白会被丢弃）
+    PUNCTUATION = frozenset('，,。.！!？?；;：:、…—-~～·"“”‘’「」『』()（）《》 \t\u3000')
+    
+    # 说话人名称的最大长度
+    MAX_SPEAKER_LENGTH = 8
     
     @staticmethod
     def read_file(file_path: str) -> str:
@@ -54,6 +78,7 @@ class TextParser:
             raise ValueError(f"不支持的文件格式: {extension}")
     
     @classmethod
+    @traced("text.split_chapters")
     def split_chapters(cls, text: str) -> List[Dict[str, any]]:
         """
         智能分割章节
@@ -115,52 +140,160 @@ class TextParser:
         return chapters
     
     @classmethod
+    @traced("text.extract_dialogues")
     def extract_dialogues(cls, text: str) -> List[Dict[str, any]]:
         """
         提取对话和旁白
-        返回: [{'type': 'dialogue/narration', 'character': '角色名', 'content': '内容', 'order_index': 序号}]
+        单遍扫描每个段落，按引号切分为多个旁白/对话片段，整体复杂度 O(n)
+        返回: [{'type': 'dialogue/narration', 'character': '角色名', 'content': '内容',
+               'order_index': 序号, 'paragraph_index': 段落序号}]
         """
         dialogues = []
         paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
         
-        for idx, para in enumerate(paragraphs):
-            # 尝试匹配对话模式
-            character_name = None
-            dialogue_content = None
-            
-            for pattern in cls.DIALOGUE_PATTERNS:
-                match = re.search(pattern, para)
-                if match:
-                    groups = match.groups()
-                    if len(groups) >= 2:
-                        # 判断哪个是角色名，哪个是对话内容
-                        if len(groups[0]) < len(groups[1]):
-                            character_name = groups[0].strip()
-                            dialogue_content = groups[1].strip()
-                        else:
-                            character_name = groups[1].strip()
-                            dialogue_content = groups[0].strip()
-                    break
-            
-            # 构造对话/旁白对象
-            if character_name and dialogue_content:
-                dialogues.append({
-                    'type': 'dialogue',
-                    'character': character_name,
-                    'content': dialogue_content,
-                    'order_index': idx
-                })
-            else:
-                # 旁白
-                dialogues.append({
-                    'type': 'narration',
-                    'character': None,
-                    'content': para,
-                    'order_index': idx
-                })
+        for para_idx, para in enumerate(paragraphs):
+            for segment in cls._tokenize_paragraph(para):
+                segment['order_index'] = len(dialogues)
+                segment['paragraph_index'] = para_idx
+                dialogues.append(segment)
         
         return dialogues
     
+    @classmethod
+    def _tokenize_paragraph(cls, para: str) -> List[Dict[str, any]]:
+        """
+        将单个段落切分为旁白/对话片段
+        引号内为对话，说话人取自引号前的"某某说："或引号后的"，某某道。"；
+        同段内无署名的引号沿用上一位说话人，整段都无说话人时视为旁白的一部分
+        """
+        # 第一遍：按引号切分为 (开引号, 文本) 片段，开引号为None表示引号外文本
+        pieces: List[Tuple[Optional[str], str]] = []
+        n = len(para)
+        i = 0
+        text_start = 0
+        while i < n:
+            close = cls.QUOTE_PAIRS.get(para[i])
+            if close is None:
+                i += 1
+                continue
+            j = para.find(close, i + 1)
+            if j == -1:
+                # 引号未闭合，剩余部分按旁白处理
+                break
+            if i > text_start:
+                pieces.append((None, para[text_start:i]))
+            pieces.append((para[i], para[i + 1:j]))
+            i = j + 1
+            text_start = i
+        if text_start < n:
+            pieces.append((None, para[text_start:]))
+        
+        # 第二遍：识别说话人，并记录每段引号外文本中被署名占用的部分
+        kept = [[0, len(text)] for _, text in pieces]
+        speakers: List[Optional[str]] = [None] * len(pieces)
+        last_speaker = None
+        for k, (quote, _) in enumerate(pieces):
+            if quote is None:
+                continue
+            speaker = None
+            if k > 0 and pieces[k - 1][0] is None:
+                speaker, start = cls._speaker_before(pieces[k - 1][1])
+                if speaker:
+                    kept[k - 1][1] = min(kept[k - 1][1], start)
+            if speaker is None and k + 1 < len(pieces) and pieces[k + 1][0] is None:
+                speaker, end = cls._speaker_after(pieces[k + 1][1])
+                if speaker:
+                    kept[k + 1][0] = max(kept[k + 1][0], end)
+            if speaker is None:
+                speaker = last_speaker
+            speakers[k] = speaker
+            last_speaker = speaker
+        
+        # 第三遍：组装片段，相邻旁白合并
+        segments = []
+        narration = []
+        
+        def flush_narration():
+            content = ''.join(narration).strip()
+            narration.clear()
+            if any(ch not in cls.PUNCTUATION for ch in content):
+                segments.append({'type': 'narration', 'character': None, 'content': content})
+        
+        for k, (quote, text) in enumerate(pieces):
+            if quote is None:
+                narration.append(text[kept[k][0]:kept[k][1]])
+            elif speakers[k] is None:
+                narration.append(quote + text + cls.QUOTE_PAIRS[quote])
+            elif text.strip():
+                flush_narration()
+                segments.append({'type': 'dialogue', 'character': speakers[k], 'content': text.strip()})
+        flush_narration()
+        
+        return segments
+    
+    @classmethod
+    def _speaker_before(cls, text: str) -> Tuple[Optional[str], int]:
+        """
+        从引号前的文本末尾识别说话人（如"张三说："、"李四问道，"）
+        返回: (角色名, 署名起始位置)，未识别时角色名为None
+        """
+        end = len(text)
+        while end > 0 and text[end - 1].isspace():
+            end -= 1
+        if end == 0 or text[end - 1] not in cls.ATTRIBUTION_SEPARATORS:
+            return None, len(text)
+        has_colon = text[end - 1] in '：:'
+        end -= 1
+        
+        verb_end = end
+        end = cls._strip_speech_verb(text, end)
+        if not has_colon and end == verb_end:
+            # 逗号前必须有说话动词，避免把普通从句误判为署名
+            return None, len(text)
+        
+        start = end
+        while start > 0 and text[start - 1] not in cls.CLAUSE_DELIMITERS:
+            start -= 1
+        speaker = text[start:end].strip()
+        if not speaker or len(speaker) > cls.MAX_SPEAKER_LENGTH:
+            return None, len(text)
+        return speaker, start
+    
+    @classmethod
+    def _speaker_after(cls, text: str) -> Tuple[Optional[str], int]:
+        """
+        从引号后的文本开头识别说话人（如"，张三说。"）
+        返回: (角色名, 署名结束位置)，未识别时角色名为None
+        """
+        n = len(text)
+        start = 0
+        while start < n and (text[start] in '，,' or text[start].isspace()):
+            start += 1
+        end = start
+        while end < n and text[end] not in cls.CLAUSE_DELIMITERS:
+            end += 1
+        
+        name_end = cls._strip_speech_verb(text, end, lower=start)
+        if name_end == end:
+            return None, 0
+        speaker = text[start:name_end].strip()
+        if not speaker or len(speaker) > cls.MAX_SPEAKER_LENGTH:
+            return None, 0
+        
+        # 署名后的一个标点一并归入署名
+        if end < n and text[end] in cls.ATTRIBUTION_SEPARATORS + '。.':
+            end += 1
+        return speaker, end
+    
+    @classmethod
+    def _strip_speech_verb(cls, text: str, end: int, lower: int = 0) -> int:
+        """去掉 text[lower:end] 末尾的说话动词，返回动词起始位置（无动词时返回end）"""
+        for verb in cls.SPEECH_VERBS:
+            start = end - len(verb)
+            if start >= lower and text.startswith(verb, start):
+                return start
+        return end
+    
     @classmethod
     def extract_characters(cls, dialogues: List[Dict[str, any]]) -> List[str]:
         """
@@ -175,12 +308,16 @@ class TextParser:
         return sorted(list(characters))
     
     @staticmethod
-    def estimate_duration(text: str, words_per_second: float = 3.5) -> int:
+    def count_speech_chars(text: str) -> int:
+        """统计朗读字数（不计空白字符）"""
+        return sum(1 for ch in text if not ch.isspace())
+    
+    @classmethod
+    def estimate_duration(cls, text: str, words_per_second: float = 3.5) -> float:
         """
-        估算文本朗读时长（秒）
-        中文平均语速约 3-4 字/秒
+        估算文本朗读时长（秒，毫秒精度）
+        中文平均语速约 3-4 字/秒；按音色校准的语速见 SpeechRateEstimator
         """
-        word_count = len(text)
-        duration = int(word_count / words_per_second)
-        return duration
+        word_count = cls.count_speech_chars(text)
+        return round(word_count / words_per_second, 3)
 
@@ -21,9 +21,11 @@ class TTSResult:
     """TTS生成结果"""
     success: bool
     audio_path: Optional[str] = None
-    duration: Optional[int] = None  # 音频时长（秒）
+    duration: Optional[float] = None  # 音频时长（秒，毫秒精度）
     error_message: Optional[str] = None
     metadata: Optional[Dict] = None
+    retryable: bool = False  # 失败是否为暂时性的（限流、超时、服务端错误），可以重试
+    retry_after: Optional[float] = None  # 服务端要求的重试等待秒数（如 429 的 Retry-After）
 
 
 class TTSProvider(ABC):
@@ -109,6 +111,9 @@ class MockTTSProvider(TTSProvider):
     生成静音音频文件
     """
     
+    # 模拟语速（字/秒，语速倍率为1.0时）
+    CHARS_PER_SECOND = 3.5
+    
     async def synthesize(
         self,
         text: str,
@@ -120,8 +125,8 @@ class MockTTSProvider(TTSProvider):
             from pydub import AudioSegment
             from pydub.generators import Sine
             
-            # 根据文字数量估算时长（3.5字/秒）
-            duration_ms = int(len(text) / 3.5 * 1000)
+            # 根据文字数量和语速估算时长
+            duration_ms = int(len(text) / (self.CHARS_PER_SECOND * config.speed) * 1000)
             
             # 生成静音音频
             silence = AudioSegment.silent(duration=duration_ms)
@@ -132,7 +137,7 @@ class MockTTSProvider(TTSProvider):
             return TTSResult(
                 success=True,
                 audio_path=output_path,
-                duration=int(duration_ms / 1000),
+                duration=len(silence) / 1000,
                 metadata={"engine": "mock", "text_length": len(text)}
             )
         except Exception as e:
@@ -1,6 +1,7 @@
 """TTS服务工厂"""
 from typing import Dict, Optional
 from app.services.tts_base import TTSProvider, MockTTSProvider
+from app.services.tts_http import HTTPTTSProvider
 
 
 class TTSFactory:
@@ -9,6 +10,7 @@ class TTSFactory:
     # 注册的TTS提供商
     _providers: Dict[str, type] = {
         "mock": MockTTSProvider,
+        "http": HTTPTTSProvider,
         # 后续可扩展其他引擎:
         # "azure": AzureTTSProvider,
         # "aliyun": AliyunTTSProvider,
@@ -40,7 +42,7 @@ class TTSFactory:
         创建TTS提供商实例
         
         Args:
-            engine: 引擎名称 (mock, azure, aliyun, tencent)
+            engine: 引擎名称 (mock, http, azure, aliyun, tencent)
             api_key: API密钥
             region: 服务区域
             **kwargs: 其他配置参数
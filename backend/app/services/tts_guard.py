@@ -0,0 +1,238 @@
+"""TTS 引擎的限流、重试与熔断"""
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+import asyncio
+import random
+import time
+
+from app.core import metrics
+from app.core.config import settings
+from app.services.tts_base import TTSResult
+
+# 熔断器状态（数值同时作为指标值）
+CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+# 估算当前请求速率的时间窗口（秒）
+_RATE_WINDOW = 5.0
+
+
+class AdaptiveRateLimiter:
+    """
+    自适应限速（GCRA 令牌桶：按速率为每个请求预约发送时刻，容量内的请求可以突发）
+    - 收到 429 时速率乘以 TTS_RATE_DECREASE，并暂停到 Retry-After 之后
+    - 请求因限速而等待且成功时，速率每秒加性提高 TTS_RATE_INCREASE
+    稳定后速率在服务商上限附近小幅振荡，持续吞吐略低于上限
+    未配置初始速率的引擎在第一次收到 429 前不限速，之后以最近的实际速率为起点
+    """
+
+    def __init__(self, rate: Optional[float]):
+        self.rate = rate
+        self._tat = 0.0  # 理论到达时间
+        self._paused_until = 0.0
+        self._granted: Deque[float] = deque()
+
+    async def acquire(self) -> float:
+        """等待发送时刻，返回等待的秒数"""
+        now = time.monotonic()
+        start = max(now, self._paused_until)
+        if self.rate:
+            interval = 1.0 / self.rate
+            tolerance = (max(settings.TTS_RATE_LIMIT_BURST, 1) - 1) * interval
+            start = max(start, self._tat - tolerance)
+            self._tat = max(self._tat, start) + interval
+        self._granted.append(start)
+        while self._granted and self._granted[0] < now - _RATE_WINDOW:
+            self._granted.popleft()
+        delay = start - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def on_success(self, waited: float):
+        if self.rate is None or waited <= 0:
+            return
+        # 每个请求提高 increase/rate，按当前速率发送时约等于每秒提高 increase
+        self.rate = min(self.rate + settings.TTS_RATE_INCREASE / self.rate, settings.TTS_RATE_LIMIT_MAX)
+
+    def on_throttled(self, retry_after: Optional[float]):
+        now = time.monotonic()
+        if self.rate is None:
+            observed = len(self._granted) / _RATE_WINDOW
+            self.rate = observed or settings.TTS_RATE_LIMIT_MIN
+        self.rate = max(self.rate * settings.TTS_RATE_DECREASE, settings.TTS_RATE_LIMIT_MIN)
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+        # 已预约的发送时刻按新速率重新排队
+        self._tat = max(now, self._paused_until)
+
+
+class CircuitBreaker:
+    """
+    熔断器：连续 TTS_BREAKER_FAILURES 次暂时性失败（超时、5xx、连接失败）后打开，
+    冷却期内暂停向该引擎发送请求；冷却结束后放行一个探测请求（半开），成功则关闭，
+    失败则再次打开并加倍冷却时间（不超过 TTS_BREAKER_MAX_COOLDOWN）
+    429 表示限流而非引擎故障，不计入失败
+    """
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_until = 0.0
+        self.cooldown = settings.TTS_BREAKER_COOLDOWN
+        self._probing = False
+
+    def wait_time(self) -> float:
+        """
+        允许发送前需要等待的秒数（0 表示可以发送）
+        半开状态下已有探测请求时，其它请求等待探测结果
+        """
+        if self.state == CLOSED:
+            return 0.0
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now < self.opened_until:
+                return self.opened_until - now
+            self.state = HALF_OPEN
+        if self._probing:
+            return min(self.cooldown, 0.5)
+        self._probing = True
+        return 0.0
+
+    def on_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = settings.TTS_BREAKER_COOLDOWN
+        self._probing = False
+
+    def on_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN:
+            self.cooldown = min(self.cooldown * 2, settings.TTS_BREAKER_MAX_COOLDOWN)
+            self._open()
+        elif self.failures >= settings.TTS_BREAKER_FAILURES > 0:
+            self._open()
+
+    def on_neutral(self):
+        """结果不反映引擎健康状况（如限流、参数错误）时释放探测名额"""
+        self._probing = False
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_until = time.monotonic() + self.cooldown
+        self._probing = False
+
+
+class EngineGuard:
+    """
+    按引擎包装 TTS 调用：限速 -> 熔断检查 -> 调用 -> 暂时性失败时退避重试
+    各引擎的状态保存在进程内，所有请求和批量任务共享
+    """
+
+    _guards: Dict[str, "EngineGuard"] = {}
+
+    def __init__(self, engine: str):
+        self.engine = engine
+        self.limiter = AdaptiveRateLimiter(_initial_rates().get(engine))
+        self.breaker = CircuitBreaker()
+
+    @classmethod
+    def get(cls, engine: str) -> "EngineGuard":
+        guard = cls._guards.get(engine)
+        if guard is None:
+            guard = cls._guards[engine] = cls(engine)
+        return guard
+
+    @classmethod
+    def reset(cls):
+        """清除全部引擎状态（配置变更后使用）"""
+        cls._guards.clear()
+
+    async def call(
+        self,
+        synthesize: Callable[[], Awaitable[TTSResult]],
+        wait: bool = True,
+        retries: Optional[int] = None
+    ) -> TTSResult:
+        """
+        执行一次合成（含重试）
+
+        Args:
+            synthesize: 发起一次合成请求的函数
+            wait: 熔断打开时是否等待冷却结束（批量任务等待；交互请求直接返回失败）
+            retries: 最多重试次数（默认 TTS_RETRY_ATTEMPTS；有备选引擎时由路由改为切换引擎）
+
+        Returns:
+            最后一次尝试的结果
+        """
+        retries = settings.TTS_RETRY_ATTEMPTS if retries is None else retries
+        attempt = 0
+        while True:
+            blocked = await self._admit(wait)
+            if blocked:
+                return TTSResult(success=False, error_message=blocked, retryable=True)
+
+            waited = await self.limiter.acquire()
+            try:
+                result = await synthesize()
+            except asyncio.CancelledError:
+                # 对冲请求中落后的一方被取消
+                self.breaker.on_neutral()
+                raise
+            except Exception:
+                self.breaker.on_failure()
+                self._export_state()
+                raise
+
+            self._observe(result, waited)
+            if result.success or not result.retryable or attempt >= retries:
+                return result
+
+            attempt += 1
+            throttled = _is_throttled(result)
+            metrics.TTS_RETRIES.labels(self.engine, "rate_limited" if throttled else "error").inc()
+            if not throttled:
+                # 指数退避 + 完全抖动（不短于服务端要求的等待）；限流的等待由限速器的暂停处理
+                ceiling = min(settings.TTS_RETRY_MAX_DELAY, settings.TTS_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+                await asyncio.sleep(max(random.uniform(0, ceiling), result.retry_after or 0))
+
+    async def _admit(self, wait: bool) -> Optional[str]:
+        """等待熔断器放行，不等待时返回拒绝原因"""
+        while True:
+            delay = self.breaker.wait_time()
+            self._export_state()
+            if delay <= 0:
+                return None
+            if not wait:
+                return f"TTS引擎 {self.engine} 暂时不可用（熔断中，{delay:.1f} 秒后重试）"
+            await asyncio.sleep(delay)
+
+    def _observe(self, result: TTSResult, waited: float):
+        if result.success:
+            self.breaker.on_success()
+            self.limiter.on_success(waited)
+        elif _is_throttled(result):
+            self.breaker.on_neutral()
+            self.limiter.on_throttled(result.retry_after)
+        elif result.retryable:
+            self.breaker.on_failure()
+        else:
+            self.breaker.on_neutral()
+        self._export_state()
+
+    def _export_state(self):
+        metrics.TTS_CIRCUIT_STATE.labels(self.engine).set(self.breaker.state)
+        metrics.TTS_RATE_LIMIT.labels(self.engine).set(self.limiter.rate or 0)
+
+
+def _is_throttled(result: TTSResult) -> bool:
+    return bool(result.metadata and result.metadata.get("status_code") == 429)
+
+
+def _initial_rates() -> Dict[str, float]:
+    """解析 TTS_RATE_LIMITS（"引擎=每秒请求数"，逗号分隔）"""
+    rates = {}
+    for item in settings.TTS_RATE_LIMITS.split(","):
+        engine, _, rate = item.partition("=")
+        if engine.strip() and rate.strip():
+            rates[engine.strip()] = float(rate)
+    return rates
@@ -0,0 +1,124 @@
+"""通用 HTTP TTS 提供商"""
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import asyncio
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.services.tts_base import TTSProvider, TTSConfig, TTSResult
+
+# 连接池按事件循环创建（httpx 的连接不能跨事件循环使用）
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            timeout=settings.TTS_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.TTS_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.TTS_HTTP_MAX_CONNECTIONS
+            )
+        )
+        _client_loop = loop
+    return _client
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After（秒数或 HTTP 日期）"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class HTTPTTSProvider(TTSProvider):
+    """
+    通用 HTTP TTS 提供商
+    接口约定:
+        POST {base_url}/synthesize  JSON {text, voice_id, speed, pitch, volume, sample_rate, format}
+            200: 响应体为音频，X-Audio-Duration 头为时长（秒）
+            429: 限流，Retry-After 头为建议等待秒数
+        GET {base_url}/voices      音色列表
+        GET {base_url}/health      健康检查
+    限流、超时、连接失败和 5xx 视为暂时性失败（TTSResult.retryable）
+    """
+
+    @property
+    def base_url(self) -> str:
+        return (self.config.get("base_url") or settings.TTS_HTTP_URL).rstrip("/")
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        api_key = self.api_key or settings.TTS_HTTP_KEY
+        return {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+    async def synthesize(
+        self,
+        text: str,
+        config: TTSConfig,
+        output_path: str
+    ) -> TTSResult:
+        """请求合成并把音频写入 output_path"""
+        try:
+            response = await _get_client().post(
+                f"{self.base_url}/synthesize",
+                headers=self.headers,
+                json={
+                    "text": text,
+                    "voice_id": config.voice_id,
+                    "speed": config.speed,
+                    "pitch": config.pitch,
+                    "volume": config.volume,
+                    "sample_rate": config.sample_rate,
+                    "format": config.format,
+                }
+            )
+        except httpx.TimeoutException:
+            return TTSResult(success=False, error_message="HTTP TTS 请求超时", retryable=True)
+        except httpx.TransportError as e:
+            return TTSResult(success=False, error_message=f"HTTP TTS 连接失败: {e}", retryable=True)
+
+        metadata = {"engine": "http", "status_code": response.status_code, "text_length": len(text)}
+        if response.status_code != 200:
+            retryable = response.status_code == 429 or response.status_code >= 500
+            return TTSResult(
+                success=False,
+                error_message=f"HTTP TTS 返回 {response.status_code}: {response.text[:200]}",
+                metadata=metadata,
+                retryable=retryable,
+                retry_after=parse_retry_after(response.headers.get("retry-after")) if retryable else None
+            )
+
+        try:
+            await asyncio.to_thread(Path(output_path).write_bytes, response.content)
+            duration = float(response.headers.get("x-audio-duration", 0))
+        except (OSError, ValueError) as e:
+            return TTSResult(success=False, error_message=f"HTTP TTS 保存音频失败: {e}", metadata=metadata)
+
+        return TTSResult(success=True, audio_path=output_path, duration=duration, metadata=metadata)
+
+    async def get_available_voices(self) -> List[Dict]:
+        """返回服务端的音色列表"""
+        response = await _get_client().get(f"{self.base_url}/voices", headers=self.headers)
+        response.raise_for_status()
+        return response.json()
+
+    async def test_connection(self) -> bool:
+        try:
+            response = await _get_client().get(f"{self.base_url}/health", headers=self.headers)
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
@@ -0,0 +1,231 @@
+"""多引擎路由：按延迟和错误率选择引擎，失败切换与对冲请求"""
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+import asyncio
+import math
+import os
+import time
+import uuid
+
+from app.core import metrics
+from app.core.config import settings
+from app.services.tts_base import TTSConfig, TTSResult
+from app.services.tts_factory import TTSFactory
+from app.services.tts_guard import EngineGuard, OPEN
+
+# 延迟和错误率的指数移动平均系数
+_EWMA_ALPHA = 0.2
+
+
+class EngineStats:
+    """
+    引擎的近期表现：成功请求的耗时（EWMA 和最近样本的分位数）与错误率（EWMA）
+    耗时包含限速等待，被限流的引擎同样显得更慢
+    """
+
+    _stats: Dict[str, "EngineStats"] = {}
+
+    def __init__(self):
+        self.samples = 0
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self._recent: Deque[float] = deque(maxlen=max(settings.TTS_ROUTING_WINDOW, 1))
+
+    @classmethod
+    def get(cls, engine: str) -> "EngineStats":
+        stats = cls._stats.get(engine)
+        if stats is None:
+            stats = cls._stats[engine] = cls()
+        return stats
+
+    @classmethod
+    def reset(cls):
+        cls._stats.clear()
+
+    def observe(self, elapsed: float, success: bool):
+        self.samples += 1
+        self.error_rate += _EWMA_ALPHA * ((0.0 if success else 1.0) - self.error_rate)
+        if success:
+            self.latency = elapsed if not self._recent else self.latency + _EWMA_ALPHA * (elapsed - self.latency)
+            self._recent.append(elapsed)
+
+    @property
+    def ready(self) -> bool:
+        return self.samples >= settings.TTS_ROUTING_MIN_SAMPLES and bool(self._recent)
+
+    def cost(self) -> Optional[float]:
+        """预期得到一次成功结果的耗时（样本不足时为 None）"""
+        if not self.ready:
+            return None
+        return self.latency / max(1.0 - self.error_rate, 0.05)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.ready:
+            return None
+        ordered = sorted(self._recent)
+        return ordered[min(max(math.ceil(q * len(ordered)) - 1, 0), len(ordered) - 1)]
+
+
+class TTSRouter:
+    """
+    在主音色和角色声明的等效音色（voice_config.alternates）之间路由
+    - 选择：按预期耗时（EWMA 耗时 / 成功率）排序，熔断中的引擎排在最后；
+      主引擎有 TTS_ROUTING_SWITCH_MARGIN 的优势，避免在相近的引擎间来回切换；没有数据的备选引擎排在主引擎之后
+    - 失败切换：非最后一个候选只尝试一次（不重试、不等待熔断恢复），失败后立即换下一个
+    - 对冲：交互请求在 TTS_HEDGE_ENABLED 时，首个请求超过该引擎耗时的 p95 仍未返回，
+      向下一个候选（没有备选时为同一引擎）再发一个请求，先成功者胜出，另一个取消
+    """
+
+    @classmethod
+    def rank(cls, candidates: List[TTSConfig]) -> List[TTSConfig]:
+        """按路由优先级排列候选音色"""
+        def key(item: Tuple[int, TTSConfig]):
+            index, config = item
+            unavailable = EngineGuard.get(config.engine).breaker.state == OPEN
+            cost = EngineStats.get(config.engine).cost()
+            if cost is None:
+                cost = 0.0 if index == 0 else math.inf
+            elif index == 0:
+                cost *= 1 - settings.TTS_ROUTING_SWITCH_MARGIN
+            return unavailable, cost, index
+
+        return [config for _, config in sorted(enumerate(candidates), key=key)]
+
+    @classmethod
+    async def synthesize(
+        cls,
+        candidates: List[TTSConfig],
+        text: str,
+        output_path: str,
+        interactive: bool = False
+    ) -> Tuple[TTSResult, TTSConfig]:
+        """
+        合成音频
+
+        Args:
+            candidates: 候选音色（第一个为主音色）
+            text: 文本
+            output_path: 输出文件路径
+            interactive: 交互请求（不等待熔断恢复，可对冲）
+
+        Returns:
+            (结果, 实际使用的音色配置)
+        """
+        ordered = cls.rank(candidates)
+        if interactive and settings.TTS_HEDGE_ENABLED:
+            return await cls._hedged(ordered, text, output_path)
+
+        result = None
+        for index, config in enumerate(ordered):
+            last = index == len(ordered) - 1
+            if index:
+                metrics.TTS_FAILOVERS.labels(ordered[index - 1].engine, config.engine).inc()
+            result = await cls._attempt(
+                config, text, output_path,
+                wait=last and not interactive,
+                retries=None if last else 0,
+                raise_errors=last
+            )
+            if result.success:
+                return result, config
+        return result, ordered[-1]
+
+    @classmethod
+    async def _attempt(
+        cls,
+        config: TTSConfig,
+        text: str,
+        output_path: str,
+        wait: bool,
+        retries: Optional[int] = None,
+        raise_errors: bool = True
+    ) -> TTSResult:
+        """通过引擎的限流/熔断执行一次合成并记录耗时和结果"""
+        start = time.perf_counter()
+        try:
+            provider = TTSFactory.create_provider(config.engine)
+            result = await EngineGuard.get(config.engine).call(
+                lambda: provider.synthesize(text=text, config=config, output_path=output_path),
+                wait=wait,
+                retries=retries
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            EngineStats.get(config.engine).observe(time.perf_counter() - start, False)
+            if raise_errors:
+                raise
+            return TTSResult(success=False, error_message=str(e))
+        EngineStats.get(config.engine).observe(time.perf_counter() - start, result.success)
+        return result
+
+    @classmethod
+    async def _hedged(
+        cls,
+        ordered: List[TTSConfig],
+        text: str,
+        output_path: str
+    ) -> Tuple[TTSResult, TTSConfig]:
+        """
+        对冲请求：各请求写入各自的临时文件，胜出者改名为 output_path
+        首个请求提前失败时立即发出第二个请求（等同于失败切换）
+        """
+        primary = ordered[0]
+        backup = ordered[1] if len(ordered) > 1 else primary
+        delay = EngineStats.get(primary.engine).quantile(settings.TTS_HEDGE_QUANTILE)
+        delay = max(delay if delay is not None else settings.TTS_HEDGE_DEFAULT_DELAY, settings.TTS_HEDGE_MIN_DELAY)
+
+        token = uuid.uuid4().hex[:8]
+        attempts: Dict[asyncio.Task, Tuple[TTSConfig, str]] = {}
+
+        def launch(config: TTSConfig, last: bool):
+            # 首个请求不重试（由第二个请求兜底），第二个请求按常规重试
+            path = f"{output_path}.{token}.{len(attempts)}.part"
+            task = asyncio.create_task(cls._attempt(
+                config, text, path, wait=False, retries=None if last else 0, raise_errors=last
+            ))
+            attempts[task] = (config, path)
+
+        launch(primary, last=False)
+        winner: Optional[asyncio.Task] = None
+        result, used = None, primary
+        try:
+            done, _ = await asyncio.wait(set(attempts), timeout=delay)
+            first = next(iter(attempts))
+            if first in done and first.result().success:
+                winner = first
+            else:
+                hedged = first not in done
+                if hedged:
+                    metrics.TTS_HEDGES.labels(backup.engine, "launched").inc()
+                else:
+                    metrics.TTS_FAILOVERS.labels(primary.engine, backup.engine).inc()
+                launch(backup, last=True)
+                pending = {task for task in attempts if not task.done()}
+                while pending and winner is None:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.result().success:
+                            winner = task
+                            break
+                if hedged and winner is not None and winner is not first:
+                    metrics.TTS_HEDGES.labels(backup.engine, "won").inc()
+
+            if winner is not None:
+                result = winner.result()
+                used, path = attempts[winner]
+                os.replace(path, output_path)
+                result.audio_path = output_path
+            else:
+                # 都失败时返回最后发出的请求的结果
+                last = list(attempts)[-1]
+                result, used = last.result(), attempts[last][0]
+        finally:
+            for task in attempts:
+                if task is not winner:
+                    task.cancel()
+            await asyncio.gather(*attempts, return_exceptions=True)
+            for task, (_, path) in attempts.items():
+                if task is not winner and os.path.exists(path):
+                    os.remove(path)
+        return result, used
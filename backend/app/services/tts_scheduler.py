@@ -0,0 +1,170 @@
+"""TTS 合成的优先级调度：交互请求优先于批量任务，批量任务优先于预生成，同级请求在项目之间公平分配"""
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+import asyncio
+import time
+
+from app.core import metrics
+from app.core.config import settings
+
+# 优先级（从高到低）
+INTERACTIVE = "interactive"
+BATCH = "batch"
+SPECULATIVE = "speculative"
+PRIORITIES = (INTERACTIVE, BATCH, SPECULATIVE)
+
+
+class _Waiter:
+    __slots__ = ("priority", "project_id", "future", "queued_at")
+
+    def __init__(self, priority: str, project_id: Optional[int]):
+        self.priority = priority
+        self.project_id = project_id
+        self.future = asyncio.get_running_loop().create_future()
+        self.queued_at = time.monotonic()
+
+
+class TTSScheduler:
+    """
+    限制同时进行的合成数（TTS_MAX_CONCURRENCY，含限速等待和重试），空出的名额按以下规则分配:
+    - 严格优先级：有交互请求排队时先分给交互请求，其次批量任务，最后预生成
+    - 预留：TTS_INTERACTIVE_RESERVED 个名额只给交互请求，批量任务占满其余名额时试听仍可立即开始；
+      预生成最多同时占用 TTS_SPECULATIVE_MAX_CONCURRENCY 个名额
+    - 公平：同一优先级内分给正在合成数最少的项目（相同时按排队先后轮流），
+      一个项目的多个批量任务不会挤占其它项目
+    名额在合成（含失败切换和对冲）结束后释放；并发上限同时限制了引擎限速器中排队的请求数，
+    交互请求的排队时间不超过一次合成的耗时
+    """
+
+    _active: Dict[str, int] = {priority: 0 for priority in PRIORITIES}
+    _project_active: Dict[Optional[int], int] = {}
+    # 各优先级按项目排队（dict 保持项目的排队顺序，用于轮流分配）
+    _queues: Dict[str, Dict[Optional[int], Deque[_Waiter]]] = {priority: {} for priority in PRIORITIES}
+
+    @classmethod
+    def reset(cls):
+        """清除全部调度状态（配置变更后使用）"""
+        cls._active = {priority: 0 for priority in PRIORITIES}
+        cls._project_active = {}
+        cls._queues = {priority: {} for priority in PRIORITIES}
+        cls._export()
+
+    @classmethod
+    @asynccontextmanager
+    async def slot(cls, priority: str = BATCH, project_id: Optional[int] = None):
+        """
+        占用一个合成名额，退出时释放
+
+        Args:
+            priority: interactive / batch / speculative
+            project_id: 所属项目（同一优先级内按项目公平分配）
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"未知的调度优先级: {priority}")
+        start = time.monotonic()
+        if cls._can_start(priority) and not cls._queued(priority):
+            cls._acquire(priority, project_id)
+        else:
+            waiter = _Waiter(priority, project_id)
+            cls._queues[priority].setdefault(project_id, deque()).append(waiter)
+            cls._export()
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                if waiter.future.done() and not waiter.future.cancelled():
+                    # 已分到名额后才被取消：交还名额
+                    cls._release(priority, project_id)
+                else:
+                    cls._discard(waiter)
+                raise
+        metrics.TTS_QUEUE_WAIT.labels(priority).observe(time.monotonic() - start)
+        try:
+            yield
+        finally:
+            cls._release(priority, project_id)
+
+    @classmethod
+    def _can_start(cls, priority: str) -> bool:
+        capacity = settings.TTS_MAX_CONCURRENCY
+        if capacity <= 0:
+            return True
+        active = sum(cls._active.values())
+        if priority == INTERACTIVE:
+            return active < capacity
+        if active >= capacity - min(max(settings.TTS_INTERACTIVE_RESERVED, 0), capacity - 1):
+            return False
+        if priority == SPECULATIVE:
+            return cls._active[SPECULATIVE] < settings.TTS_SPECULATIVE_MAX_CONCURRENCY
+        return True
+
+    @classmethod
+    def _queued(cls, priority: str) -> bool:
+        """同级或更高优先级是否有请求在排队"""
+        for level in PRIORITIES[:PRIORITIES.index(priority) + 1]:
+            if cls._queues[level]:
+                return True
+        return False
+
+    @classmethod
+    def _acquire(cls, priority: str, project_id: Optional[int]):
+        cls._active[priority] += 1
+        cls._project_active[project_id] = cls._project_active.get(project_id, 0) + 1
+        cls._export()
+
+    @classmethod
+    def _release(cls, priority: str, project_id: Optional[int]):
+        cls._active[priority] -= 1
+        remaining = cls._project_active.get(project_id, 1) - 1
+        if remaining > 0:
+            cls._project_active[project_id] = remaining
+        else:
+            cls._project_active.pop(project_id, None)
+        cls._dispatch()
+
+    @classmethod
+    def _dispatch(cls):
+        """按优先级和项目公平性把空出的名额分给排队的请求"""
+        for priority in PRIORITIES:
+            queues = cls._queues[priority]
+            while queues and cls._can_start(priority):
+                waiter = cls._next(queues)
+                if waiter is None:
+                    break
+                cls._acquire(priority, waiter.project_id)
+                waiter.future.set_result(None)
+            if queues:
+                # 高优先级仍在排队时不分给低优先级
+                break
+        cls._export()
+
+    @classmethod
+    def _next(cls, queues: Dict[Optional[int], Deque[_Waiter]]) -> Optional[_Waiter]:
+        """取正在合成数最少的项目的下一个请求（跳过已取消的），该项目移到队尾"""
+        while queues:
+            project_id = min(queues, key=lambda project: cls._project_active.get(project, 0))
+            queue = queues.pop(project_id)
+            waiter = queue.popleft()
+            if queue:
+                queues[project_id] = queue
+            if not waiter.future.done():
+                return waiter
+        return None
+
+    @classmethod
+    def _discard(cls, waiter: _Waiter):
+        queues = cls._queues[waiter.priority]
+        queue = queues.get(waiter.project_id)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del queues[waiter.project_id]
+        cls._export()
+
+    @classmethod
+    def _export(cls):
+        for priority in PRIORITIES:
+            metrics.TTS_SCHEDULER_ACTIVE.labels(priority).set(cls._active[priority])
+            metrics.TTS_SCHEDULER_QUEUED.labels(priority).set(
+                sum(len(queue) for queue in cls._queues[priority].values())
+            )
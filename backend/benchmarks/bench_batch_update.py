@@ -0,0 +1,123 @@
+"""
+对话批量更新基准
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_batch_update --dialogues 10000
+
+对比 PUT /api/dialogues/batch/update（集合式 UPDATE）与逐条加载ORM对象再修改的旧做法，
+输出两者的SQL语句数和耗时，并校验更新数与实际数据一致
+"""
+import argparse
+import json
+import sys
+
+from benchmarks.common import use_sqlite, QueryCounter, timer
+
+use_sqlite("batch_update")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import select, func  # noqa: E402
+
+from main import app  # noqa: E402
+from app.core.database import SessionLocal, engine, async_engine  # noqa: E402
+from app.models import Project, Chapter, Character, Dialogue, DialogueType, DialogueStatus  # noqa: E402
+
+
+def seed(dialogue_count: int) -> dict:
+    """构造一个章节、两个角色和指定数量的已生成对话"""
+    db = SessionLocal()
+    try:
+        project = Project(name="bench")
+        db.add(project)
+        db.flush()
+        chapter = Chapter(project_id=project.id, title="第一章", order_index=0, content="")
+        old_character = Character(project_id=project.id, name="张三")
+        new_character = Character(project_id=project.id, name="李四")
+        db.add_all([chapter, old_character, new_character])
+        db.flush()
+        db.bulk_insert_mappings(Dialogue, [
+            {
+                "chapter_id": chapter.id,
+                "character_id": old_character.id,
+                "type": DialogueType.DIALOGUE,
+                "content": f"第{i}句台词，" + "内容" * 50,
+                "order_index": i,
+                "status": DialogueStatus.COMPLETED,
+                "audio_path": f"/tmp/audio/dialogue_{i}.mp3",
+                "duration": 1.5,
+            }
+            for i in range(dialogue_count)
+        ])
+        db.commit()
+        ids = [row[0] for row in db.execute(select(Dialogue.id).where(Dialogue.chapter_id == chapter.id))]
+        return {"ids": ids, "old_character_id": old_character.id, "new_character_id": new_character.id}
+    finally:
+        db.close()
+
+
+def legacy_update(ids, character_id: int):
+    """旧做法：加载完整ORM对象后逐个赋值"""
+    db = SessionLocal()
+    try:
+        dialogues = db.execute(select(Dialogue).where(Dialogue.id.in_(ids))).scalars().all()
+        for dialogue in dialogues:
+            dialogue.character_id = character_id
+        db.commit()
+        return len(dialogues)
+    finally:
+        db.close()
+
+
+def count_where(*conditions) -> int:
+    db = SessionLocal()
+    try:
+        return db.scalar(select(func.count(Dialogue.id)).where(*conditions))
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对话批量更新基准")
+    parser.add_argument("--dialogues", type=int, default=10000, help="对话数量")
+    args = parser.parse_args()
+
+    result = {"dialogues": args.dialogues}
+    errors = 0
+    with TestClient(app) as client:
+        seeded = seed(args.dialogues)
+        ids = seeded["ids"]
+
+        with QueryCounter(engine) as counter, timer(result, "legacy_reassign_ms"):
+            legacy_update(ids, seeded["new_character_id"])
+        result["legacy_reassign_queries"] = counter.count
+
+        with QueryCounter(async_engine.sync_engine) as counter, timer(result, "bulk_reassign_ms"):
+            response = client.put("/api/dialogues/batch/update", json={
+                "dialogue_ids": ids + ids[:10],
+                "character_id": seeded["old_character_id"],
+            }).json()
+        result["bulk_reassign_queries"] = counter.count
+        result["bulk_reassign_updated"] = response["data"]["updated_count"]
+        if response["data"]["updated_count"] != len(ids):
+            errors += 1
+        if count_where(Dialogue.character_id == seeded["old_character_id"]) != len(ids):
+            errors += 1
+
+        with QueryCounter(async_engine.sync_engine) as counter, timer(result, "bulk_reset_ms"):
+            response = client.put("/api/dialogues/batch/update", json={
+                "dialogue_ids": ids,
+                "reset_audio": True,
+            }).json()
+        result["bulk_reset_queries"] = counter.count
+        if count_where(Dialogue.status == DialogueStatus.PENDING, Dialogue.audio_path.is_(None)) != len(ids):
+            errors += 1
+
+    result["errors"] = errors
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if errors:
+        print("❌ 批量更新结果与数据不一致")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
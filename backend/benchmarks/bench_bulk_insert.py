@@ -0,0 +1,72 @@
+"""
+章节上传与对话批量创建的写入吞吐基准
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_bulk_insert --chapters 500 --dialogues 3000
+    python -m benchmarks.bench_bulk_insert --no-returning   # 模拟MySQL：按ID范围取回新行ID
+
+输出两个接口的 行/秒 和SQL语句数（JSON）
+"""
+import argparse
+import json
+
+from benchmarks.common import use_sqlite, QueryCounter, timer
+
+use_sqlite("bulk_insert")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from main import app  # noqa: E402
+from app.core.database import async_engine  # noqa: E402
+
+
+def make_novel(chapters: int, lines_per_chapter: int) -> str:
+    """构造指定章节数的文本"""
+    parts = []
+    for i in range(1, chapters + 1):
+        parts.append(f"第{i}章 标题{i}")
+        for j in range(lines_per_chapter):
+            parts.append(f"张三说：“这是第{i}章的第{j}句话。”" if j % 2 else f"旁白第{j}段，风吹过山岗。")
+    return "\n".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量写入基准")
+    parser.add_argument("--chapters", type=int, default=500, help="上传文本的章节数")
+    parser.add_argument("--dialogues", type=int, default=3000, help="单章对话数")
+    parser.add_argument("--no-returning", action="store_true", help="禁用RETURNING，走ID范围取回路径")
+    args = parser.parse_args()
+
+    if args.no_returning:
+        async_engine.dialect.insert_executemany_returning = False
+
+    result = {"chapters": args.chapters, "dialogues": args.dialogues, "returning": not args.no_returning}
+    with TestClient(app) as client:
+        project_id = client.post("/api/projects/", json={"name": "bench"}).json()["data"]["id"]
+
+        text = make_novel(args.chapters, 4)
+        files = {"file": ("novel.txt", text.encode("utf-8"), "text/plain")}
+        with QueryCounter(async_engine.sync_engine) as counter, timer(result, "upload_ms"):
+            data = client.post("/api/chapters/upload", data={"project_id": project_id}, files=files).json()["data"]
+        assert data["chapters_count"] == args.chapters
+        result["upload_queries"] = counter.count
+        result["upload_rows_per_sec"] = round(args.chapters / (result["upload_ms"] / 1000), 1)
+
+        # 单章大量对话
+        big = make_novel(1, args.dialogues)
+        files = {"file": ("big.txt", big.encode("utf-8"), "text/plain")}
+        chapter_id = client.post(
+            "/api/chapters/upload", data={"project_id": project_id}, files=files
+        ).json()["data"]["chapters"][0]["id"]
+        with QueryCounter(async_engine.sync_engine) as counter, timer(result, "dialogue_batch_ms"):
+            data = client.post("/api/dialogues/batch", params={"chapter_id": chapter_id}).json()["data"]
+        assert data["count"] == args.dialogues
+        assert all(d["id"] for d in data["dialogues"])
+        result["dialogue_batch_queries"] = counter.count
+        result["dialogue_rows_per_sec"] = round(args.dialogues / (result["dialogue_batch_ms"] / 1000), 1)
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+并发请求延迟基准
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_concurrency --concurrency 16 --requests 400 --db-latency-ms 2
+
+在同一事件循环中并发发起混合请求（大章节对话列表 + 项目详情 + 健康检查），
+输出各类请求的 p50/p99 延迟和总吞吐。
+--db-latency-ms 为每条SQL语句注入固定等待以模拟数据库网络往返：
+等待发生在执行语句的线程中，同步驱动会阻塞事件循环，异步驱动只占用其工作线程，
+与 PyMySQL / aiomysql 连接远程数据库时的表现一致
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import use_sqlite, latency_summary
+
+use_sqlite("concurrency")
+
+import httpx  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from main import app  # noqa: E402
+from app.core import database  # noqa: E402
+from app.core.database import SessionLocal, init_db  # noqa: E402
+from app.models import Project, Chapter, Dialogue, DialogueType  # noqa: E402
+
+
+def inject_latency(latency_ms: float):
+    """为所有新建连接注册语句级等待（sqlite3 trace 回调在执行语句的线程中调用）"""
+    if latency_ms <= 0:
+        return
+    delay = latency_ms / 1000
+
+    def trace(statement):
+        time.sleep(delay)
+
+    def on_connect(dbapi_connection, connection_record):
+        driver_connection = getattr(dbapi_connection, "driver_connection", None)
+        if driver_connection is not None and driver_connection is not dbapi_connection:
+            # aiosqlite: 在其工作线程中设置回调
+            dbapi_connection.await_(driver_connection.set_trace_callback(trace))
+        else:
+            dbapi_connection.set_trace_callback(trace)
+
+    engines = [database.engine]
+    if hasattr(database, "async_engine"):
+        engines.append(database.async_engine.sync_engine)
+    for engine in engines:
+        engine.pool.dispose()
+        event.listen(engine, "connect", on_connect)
+
+
+def seed(dialogue_count: int) -> dict:
+    """构造一个项目和一个大章节，返回请求所需的ID"""
+    db = SessionLocal()
+    try:
+        project = Project(name="bench")
+        db.add(project)
+        db.flush()
+        chapter = Chapter(project_id=project.id, title="第一章", order_index=0, content="")
+        db.add(chapter)
+        db.flush()
+        db.bulk_insert_mappings(Dialogue, [
+            {
+                "chapter_id": chapter.id,
+                "type": DialogueType.NARRATION,
+                "content": f"第{i}句旁白。",
+                "order_index": i,
+            }
+            for i in range(dialogue_count)
+        ])
+        db.commit()
+        return {"project_id": project.id, "chapter_id": chapter.id}
+    finally:
+        db.close()
+
+
+async def run_load(ids: dict, concurrency: int, total: int, list_ratio: float) -> dict:
+    """并发执行混合请求，返回各类请求的延迟分布"""
+    routes = {
+        "list_dialogues": f"/api/dialogues/?chapter_id={ids['chapter_id']}",
+        "get_project": f"/api/projects/{ids['project_id']}",
+        "health": "/health",
+    }
+    # 按比例生成请求序列：list_ratio 为大列表请求占比，其余在项目详情和健康检查间交替
+    plan = []
+    list_every = max(1, round(1 / list_ratio)) if list_ratio > 0 else 0
+    for i in range(total):
+        if list_every and i % list_every == 0:
+            plan.append("list_dialogues")
+        else:
+            plan.append("get_project" if i % 2 else "health")
+
+    latencies = {name: [] for name in routes}
+    errors = 0
+    queue = asyncio.Queue()
+    for name in plan:
+        queue.put_nowait(name)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                name = queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.get(routes[name])
+                latencies[name].append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    all_latencies = [v for values in latencies.values() for v in values]
+    return {
+        "requests": total,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_sec": round(total / elapsed, 1),
+        "all": latency_summary(all_latencies),
+        **{
+            name: {
+                "count": len(values),
+                **latency_summary(values),
+            }
+            for name, values in latencies.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并发请求延迟基准")
+    parser.add_argument("--dialogues", type=int, default=200, help="大章节的对话数量")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发请求数")
+    parser.add_argument("--requests", type=int, default=400, help="请求总数")
+    parser.add_argument("--list-ratio", type=float, default=0.1, help="大列表请求占比")
+    parser.add_argument("--db-latency-ms", type=float, default=2.0, help="每条SQL语句注入的等待（毫秒）")
+    args = parser.parse_args()
+
+    init_db()
+    ids = seed(args.dialogues)
+    inject_latency(args.db_latency_ms)
+
+    result = {
+        "async_db": hasattr(database, "async_engine"),
+        "dialogues": args.dialogues,
+        "concurrency": args.concurrency,
+        "db_latency_ms": args.db_latency_ms,
+    }
+    result.update(asyncio.run(run_load(ids, args.concurrency, args.requests, args.list_ratio)))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
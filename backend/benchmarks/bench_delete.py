@@ -0,0 +1,290 @@
+"""
+项目/章节删除基准与存储回收回归
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_delete --chapters 40 --dialogues 500
+
+1. 性能: 对比ORM级联删除（逐个加载子对象）与删除接口（集合式 DELETE）的耗时和SQL语句数
+2. 正确性: 删除后项目下不再残留任何行，其余项目的统计与全量重算一致
+3. 存储回收: 删除接口返回后后台任务回收章节音频目录、导出和上传文件；
+   巡检回收孤立文件，保留仍被引用的文件和宽限期内的新文件
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.common import use_sqlite, QueryCounter, timer
+
+use_sqlite("delete")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import select, func, update, bindparam  # noqa: E402
+
+from main import app  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.database import SessionLocal, engine, async_engine  # noqa: E402
+from app.models import (  # noqa: E402
+    Project, Chapter, Character, Dialogue, DialogueType, DialogueStatus,
+    AudioExport, ChapterStats, ProjectStats
+)
+from app.services.statistics import StatsService  # noqa: E402
+from app.services.storage_gc import StorageGC  # noqa: E402
+
+STORAGE = Path(settings.STORAGE_PATH)
+AUDIO_BYTES = b"\xff\xfb" * 512
+
+
+def write_file(path: Path, age: float = 0):
+    """写入文件，age 秒表示把修改时间调到多久以前"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(AUDIO_BYTES)
+    if age:
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+
+
+def seed_project(name: str, chapter_count: int, dialogue_count: int) -> int:
+    """写入一个项目的章节、角色、对话、音频文件和导出记录"""
+    db = SessionLocal()
+    try:
+        project = Project(name=name)
+        db.add(project)
+        db.flush()
+        project_id = project.id
+        db.bulk_insert_mappings(Chapter, [
+            {"project_id": project_id, "title": f"第{i + 1}章", "order_index": i, "content": ""}
+            for i in range(chapter_count)
+        ])
+        db.bulk_insert_mappings(Character, [
+            {"project_id": project_id, "name": speaker} for speaker in ("张三", "李四", "王五")
+        ])
+        chapter_ids = db.execute(select(Chapter.id).where(Chapter.project_id == project_id)).scalars().all()
+        character_ids = db.execute(select(Character.id).where(Character.project_id == project_id)).scalars().all()
+        for chapter_id in chapter_ids:
+            db.bulk_insert_mappings(Dialogue, [
+                {
+                    "chapter_id": chapter_id,
+                    "character_id": character_ids[i % 3] if i % 4 else None,
+                    "type": DialogueType.DIALOGUE if i % 4 else DialogueType.NARRATION,
+                    "content": f"第{i}句",
+                    "order_index": i,
+                    "status": DialogueStatus.COMPLETED if i % 2 else DialogueStatus.PENDING,
+                    "duration": 1.5 if i % 2 else 0.0,
+                }
+                for i in range(dialogue_count)
+            ])
+
+        # 已完成的对话写入音频文件（修改时间早于宽限期）
+        completed = db.execute(
+            select(Dialogue.id, Dialogue.chapter_id).join(Chapter, Chapter.id == Dialogue.chapter_id).where(
+                Chapter.project_id == project_id, Dialogue.status == DialogueStatus.COMPLETED
+            )
+        ).all()
+        paths = []
+        for dialogue_id, chapter_id in completed:
+            path = STORAGE / "audio" / str(chapter_id) / f"dialogue_{dialogue_id}.mp3"
+            write_file(path, age=3600)
+            paths.append({"b_id": dialogue_id, "audio_path": str(path)})
+        dialogues = Dialogue.__table__
+        db.execute(
+            update(dialogues).where(dialogues.c.id == bindparam("b_id")).values(audio_path=bindparam("audio_path")),
+            paths
+        )
+
+        export_path = STORAGE / "audio" / "exports" / f"project_{project_id}.mp3"
+        write_file(export_path, age=3600)
+        write_file(STORAGE / "audio" / "exports" / f"chapter_{chapter_ids[0]}.mp3", age=3600)
+        write_file(STORAGE / "uploads" / str(project_id) / "novel.txt", age=3600)
+        db.add(AudioExport(project_id=project_id, format="mp3", file_path=str(export_path), file_size=len(AUDIO_BYTES)))
+
+        StatsService.rebuild(db, [project_id])
+        db.commit()
+        return project_id
+    finally:
+        db.close()
+
+
+def project_files(project_id: int, chapter_ids: list) -> list:
+    """项目在存储目录中的全部文件"""
+    files = []
+    for chapter_id in chapter_ids:
+        files += list((STORAGE / "audio" / str(chapter_id)).glob("*"))
+        files += list((STORAGE / "audio" / "exports").glob(f"chapter_{chapter_id}.*"))
+    files += list((STORAGE / "uploads" / str(project_id)).glob("*"))
+    files += list((STORAGE / "audio" / "exports").glob(f"project_{project_id}.*"))
+    return files
+
+
+def remaining_rows(project_id: int, chapter_ids: list) -> dict:
+    """项目删除后残留的行数"""
+    db = SessionLocal()
+    try:
+        counts = {
+            "projects": db.scalar(select(func.count()).select_from(Project).where(Project.id == project_id)),
+            "chapters": db.scalar(select(func.count()).select_from(Chapter).where(Chapter.project_id == project_id)),
+            "characters": db.scalar(
+                select(func.count()).select_from(Character).where(Character.project_id == project_id)
+            ),
+            "dialogues": db.scalar(
+                select(func.count()).select_from(Dialogue).where(Dialogue.chapter_id.in_(chapter_ids))
+            ),
+            "audio_exports": db.scalar(
+                select(func.count()).select_from(AudioExport).where(AudioExport.project_id == project_id)
+            ),
+            "chapter_stats": db.scalar(
+                select(func.count()).select_from(ChapterStats).where(ChapterStats.project_id == project_id)
+            ),
+            "project_stats": db.scalar(
+                select(func.count()).select_from(ProjectStats).where(ProjectStats.project_id == project_id)
+            ),
+        }
+        return {table: count for table, count in counts.items() if count}
+    finally:
+        db.close()
+
+
+def chapter_ids_of(project_id: int) -> list:
+    db = SessionLocal()
+    try:
+        return db.execute(select(Chapter.id).where(Chapter.project_id == project_id)).scalars().all()
+    finally:
+        db.close()
+
+
+def stats_snapshot(project_id: int) -> tuple:
+    db = SessionLocal()
+    try:
+        project = db.get(Project, project_id)
+        stats = db.get(ProjectStats, project_id)
+        characters = db.execute(
+            select(Character.id, Character.dialogue_count, Character.total_duration)
+            .where(Character.project_id == project_id).order_by(Character.id)
+        ).all()
+        return (
+            project.chapters_count, round(project.total_duration, 3),
+            stats.dialogue_count, stats.completed_count, round(stats.synthesized_duration, 3),
+            tuple((row.id, row.dialogue_count, round(row.total_duration, 3)) for row in characters),
+        )
+    finally:
+        db.close()
+
+
+def rebuilt_snapshot(project_id: int) -> tuple:
+    db = SessionLocal()
+    try:
+        StatsService.rebuild(db, [project_id])
+        db.commit()
+    finally:
+        db.close()
+    return stats_snapshot(project_id)
+
+
+def wait_until_gone(files: list, timeout: float = 10.0) -> float:
+    """等待后台回收删除文件，返回耗时（毫秒），超时返回 -1"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if not any(path.exists() for path in files):
+            return round((time.perf_counter() - start) * 1000, 3)
+        time.sleep(0.01)
+    return -1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="项目/章节删除基准与存储回收回归")
+    parser.add_argument("--chapters", type=int, default=40, help="每个项目的章节数")
+    parser.add_argument("--dialogues", type=int, default=500, help="每章对话数")
+    args = parser.parse_args()
+
+    result = {"chapters": args.chapters, "dialogues_per_chapter": args.dialogues}
+    errors = 0
+    # 启动时不巡检，由本脚本显式调用
+    settings.STORAGE_GC_INTERVAL = 0
+
+    with TestClient(app) as client:
+        legacy_id = seed_project("legacy", args.chapters, args.dialogues)
+        bulk_id = seed_project("bulk", args.chapters, args.dialogues)
+        kept_id = seed_project("kept", 3, 50)
+
+        # 原实现：ORM 级联删除
+        db = SessionLocal()
+        try:
+            with QueryCounter(engine) as counter, timer(result, "orm_cascade_delete_ms"):
+                db.delete(db.get(Project, legacy_id))
+                db.commit()
+            result["orm_cascade_delete_queries"] = counter.count
+        finally:
+            db.close()
+
+        # 删除接口：集合式删除，文件异步回收
+        bulk_chapters = chapter_ids_of(bulk_id)
+        bulk_files = project_files(bulk_id, bulk_chapters)
+        result["project_files"] = len(bulk_files)
+        with QueryCounter(async_engine.sync_engine) as counter, timer(result, "delete_endpoint_ms"):
+            response = client.delete(f"/api/projects/{bulk_id}")
+        result["delete_endpoint_queries"] = counter.count
+        if response.status_code != 200:
+            print(f"❌ 删除项目失败: {response.text}")
+            errors += 1
+
+        leftovers = remaining_rows(bulk_id, bulk_chapters)
+        if leftovers:
+            print(f"❌ 删除项目后残留数据: {leftovers}")
+            errors += 1
+        result["gc_project_files_ms"] = wait_until_gone(bulk_files)
+        if result["gc_project_files_ms"] < 0:
+            print(f"❌ 删除项目后文件未回收: {sum(path.exists() for path in bulk_files)} 个")
+            errors += 1
+
+        # 删除章节：统计与全量重算一致，音频目录被回收
+        kept_chapters = chapter_ids_of(kept_id)
+        chapter_files = project_files(kept_id, kept_chapters[:1])
+        chapter_files = [path for path in chapter_files if "uploads" not in path.parts and "project_" not in path.name]
+        client.delete(f"/api/chapters/{kept_chapters[0]}")
+        if stats_snapshot(kept_id) != rebuilt_snapshot(kept_id):
+            print("❌ 删除章节后统计与全量重算不一致")
+            errors += 1
+        if wait_until_gone(chapter_files) < 0:
+            print("❌ 删除章节后音频文件未回收")
+            errors += 1
+
+        # 巡检：孤立文件被回收，引用中的文件和宽限期内的新文件保留
+        live_files = project_files(kept_id, kept_chapters[1:])
+        orphans = [
+            STORAGE / "audio" / "999999" / "dialogue_1.mp3",
+            STORAGE / "audio" / str(kept_chapters[1]) / "dialogue_999999.mp3",
+            STORAGE / "audio" / "exports" / "project_999999.mp3",
+            STORAGE / "uploads" / "999999" / "novel.txt",
+            STORAGE / "temp" / "merge.tmp",
+        ]
+        for path in orphans:
+            write_file(path, age=3600)
+        recent = STORAGE / "audio" / str(kept_chapters[1]) / "dialogue_999998.mp3"
+        write_file(recent)
+        unknown = STORAGE / "audio" / "notes.txt"
+        write_file(unknown, age=3600)
+
+        with timer(result, "reconcile_ms"):
+            reconciled = StorageGC.reconcile()
+        result["reconcile"] = reconciled
+        if any(path.exists() for path in orphans):
+            print(f"❌ 巡检未回收孤立文件: {[str(path) for path in orphans if path.exists()]}")
+            errors += 1
+        if not all(path.exists() for path in [*live_files, recent, unknown]):
+            print("❌ 巡检删除了仍被引用、宽限期内或无法识别的文件")
+            errors += 1
+        if (STORAGE / "audio" / "999999").exists():
+            print("❌ 巡检未删除空目录")
+            errors += 1
+
+    result["errors"] = errors
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if errors:
+        print("❌ 删除或存储回收不正确")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
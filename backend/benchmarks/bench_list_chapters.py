@@ -0,0 +1,107 @@
+"""
+章节列表延迟加载回归与耗时基准
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_list_chapters --chapters 1000 --chapter-chars 20000
+    CHAPTER_CONTENT_COMPRESSION=zlib python -m benchmarks.bench_list_chapters
+
+校验 GET /api/chapters/ 的SQL不读取 chapters.content 列，
+并对比列表接口与"读取全文"的查询耗时，以及当前压缩配置下的存储字节数
+"""
+import argparse
+import json
+import sys
+
+from benchmarks.common import use_sqlite, QueryCounter, timer
+
+use_sqlite("list_chapters")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import select, func  # noqa: E402
+from sqlalchemy.orm import undefer  # noqa: E402
+
+from main import app  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.database import SessionLocal, async_engine  # noqa: E402
+from app.models import Project, Chapter  # noqa: E402
+
+
+def make_content(index: int, chars: int) -> str:
+    """构造指定长度的章节正文（带章节序号，避免内容完全相同）"""
+    sentence = f"第{index}章里，张三沿着长街慢慢走着，心里想着昨夜的事情。"
+    return (sentence * (chars // len(sentence) + 1))[:chars]
+
+
+def seed(chapter_count: int, chapter_chars: int) -> int:
+    """构造一个包含指定数量章节的项目，返回项目ID"""
+    db = SessionLocal()
+    try:
+        project = Project(name="bench")
+        db.add(project)
+        db.flush()
+        db.add_all([
+            Chapter(
+                project_id=project.id,
+                title=f"第{i + 1}章",
+                order_index=i,
+                content=make_content(i, chapter_chars),
+                word_count=chapter_chars
+            )
+            for i in range(chapter_count)
+        ])
+        db.commit()
+        return project.id
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="章节列表延迟加载基准")
+    parser.add_argument("--chapters", type=int, default=1000, help="章节数量")
+    parser.add_argument("--chapter-chars", type=int, default=20000, help="每章字数")
+    args = parser.parse_args()
+
+    result = {
+        "chapters": args.chapters,
+        "chapter_chars": args.chapter_chars,
+        "compression": settings.CHAPTER_CONTENT_COMPRESSION,
+    }
+    with TestClient(app) as client:
+        project_id = seed(args.chapters, args.chapter_chars)
+
+        with QueryCounter(async_engine.sync_engine) as counter, timer(result, "list_ms"):
+            response = client.get(f"/api/chapters/?project_id={project_id}")
+        assert response.status_code == 200, response.text
+        result["list_items"] = len(response.json()["data"]["items"])
+        content_selected = any(
+            "chapters.content" in statement
+            for statement in counter.statements
+            if statement.lstrip().upper().startswith("SELECT")
+        )
+        result["list_selects_content"] = content_selected
+
+        # 对照：一次性读出全部章节全文（列表接口延迟加载之前的行为）
+        db = SessionLocal()
+        try:
+            with timer(result, "full_content_load_ms"):
+                db.execute(
+                    select(Chapter).options(undefer(Chapter.content)).where(
+                        Chapter.project_id == project_id
+                    )
+                ).scalars().all()
+            result["stored_content_bytes"] = db.execute(
+                select(func.sum(func.length(Chapter.__table__.c.content)))
+            ).scalar()
+        finally:
+            db.close()
+
+    result["raw_content_bytes"] = args.chapters * len(make_content(0, args.chapter_chars).encode("utf-8"))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if content_selected:
+        print("❌ 章节列表查询读取了 content 列")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
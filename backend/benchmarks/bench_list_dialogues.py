@@ -0,0 +1,102 @@
+"""
+对话列表查询数回归与耗时基准
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_list_dialogues --dialogues 2000
+
+校验 GET /api/dialogues/ 无论对话多少都只执行固定数量的SQL语句（无N+1），
+并输出全量加载和游标分页的耗时
+"""
+import argparse
+import json
+import sys
+
+from benchmarks.common import use_sqlite, QueryCounter, timer
+
+use_sqlite("list_dialogues")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from main import app  # noqa: E402
+from app.core.database import SessionLocal, async_engine  # noqa: E402
+from app.models import Project, Chapter, Character, Dialogue, DialogueType  # noqa: E402
+
+# 列表接口允许的最大SQL语句数（对话查询1条）
+MAX_QUERIES = 1
+
+
+def seed(dialogue_count: int, character_count: int) -> int:
+    """构造一个包含指定数量对话的章节，返回章节ID"""
+    db = SessionLocal()
+    try:
+        project = Project(name="bench")
+        db.add(project)
+        db.flush()
+        chapter = Chapter(project_id=project.id, title="第一章", order_index=0, content="")
+        characters = [Character(project_id=project.id, name=f"角色{i}") for i in range(character_count)]
+        db.add(chapter)
+        db.add_all(characters)
+        db.flush()
+        db.bulk_insert_mappings(Dialogue, [
+            {
+                "chapter_id": chapter.id,
+                "character_id": characters[i % character_count].id if i % 3 else None,
+                "type": DialogueType.DIALOGUE if i % 3 else DialogueType.NARRATION,
+                "content": f"第{i}句台词。",
+                "order_index": i,
+            }
+            for i in range(dialogue_count)
+        ])
+        db.commit()
+        return chapter.id
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对话列表查询基准")
+    parser.add_argument("--dialogues", type=int, default=2000, help="对话数量")
+    parser.add_argument("--characters", type=int, default=20, help="角色数量")
+    parser.add_argument("--page-size", type=int, default=200, help="分页大小")
+    args = parser.parse_args()
+
+    result = {"dialogues": args.dialogues}
+    with TestClient(app) as client:
+        chapter_id = seed(args.dialogues, args.characters)
+
+        with QueryCounter(async_engine.sync_engine) as counter, timer(result, "full_load_ms"):
+            items = client.get("/api/dialogues/", params={"chapter_id": chapter_id}).json()["data"]["items"]
+        result["full_load_queries"] = counter.count
+        result["items"] = len(items)
+
+        # 游标分页遍历全部对话
+        params = {"chapter_id": chapter_id, "limit": args.page_size}
+        pages = 0
+        seen = 0
+        with QueryCounter(async_engine.sync_engine) as counter, timer(result, "paged_load_ms"):
+            while True:
+                data = client.get("/api/dialogues/", params=params).json()["data"]
+                pages += 1
+                seen += len(data["items"])
+                if not data["next_cursor"]:
+                    break
+                params.update(data["next_cursor"])
+        result["pages"] = pages
+        result["paged_items"] = seen
+        result["paged_queries_per_page"] = counter.count / pages
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    failed = (
+        result["full_load_queries"] > MAX_QUERIES
+        or result["paged_queries_per_page"] > MAX_QUERIES
+        or result["items"] != args.dialogues
+        or result["paged_items"] != args.dialogues
+    )
+    if failed:
+        print(f"❌ 对话列表查询回归：期望每次请求不超过 {MAX_QUERIES} 条SQL且返回全部对话")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
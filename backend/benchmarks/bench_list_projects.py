@@ -0,0 +1,130 @@
+"""
+项目列表分页基准与游标正确性回归
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_list_projects --projects 200000
+
+1. 正确性: 沿 next_cursor 翻完全部项目，校验每个项目恰好出现一次且顺序为 (updated_at, id) 倒序
+   （种子数据每3个项目共用同一更新时间，覆盖时间相同时的翻页边界）
+2. 性能: 对比首页、深分页 OFFSET 与同一位置的游标翻页耗时，以及总数缓存命中前后的耗时
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from benchmarks.common import use_sqlite
+
+use_sqlite("list_projects")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from main import app  # noqa: E402
+from app.core.database import engine  # noqa: E402
+
+SEED_SQL = text("""
+    WITH RECURSIVE seq(n) AS (
+        SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :count
+    )
+    INSERT INTO projects (
+        name, description, status, chapters_count, characters_count, total_duration,
+        created_at, updated_at
+    )
+    SELECT
+        '项目' || n, '第' || n || '部小说的有声书', 'DRAFT', 0, 0, 0,
+        datetime('now', '-' || (n / 3) || ' seconds'),
+        datetime('now', '-' || (n / 3) || ' seconds')
+    FROM seq
+""")
+
+
+def seed(project_count: int):
+    """批量写入项目（更新时间以服务端格式写入，与正常创建的数据一致）"""
+    with engine.begin() as conn:
+        conn.execute(SEED_SQL, {"count": project_count})
+
+
+def verify_cursor_walk(client: TestClient, project_count: int, page_size: int) -> int:
+    """沿游标翻完全部项目，返回错误数"""
+    seen = []
+    last_key = None
+    errors = 0
+    params = {"page_size": page_size, "with_total": "false"}
+    while True:
+        data = client.get("/api/projects/", params=params).json()["data"]
+        for item in data["items"]:
+            key = (item["updated_at"], item["id"])
+            if last_key is not None and key >= last_key:
+                errors += 1
+            last_key = key
+            seen.append(item["id"])
+        if not data["next_cursor"]:
+            break
+        params = {"page_size": page_size, "with_total": "false", **data["next_cursor"]}
+
+    if len(seen) != project_count or len(set(seen)) != project_count:
+        print(f"❌ 游标翻页共返回 {len(seen)} 条（去重后 {len(set(seen))}），应为 {project_count}")
+        errors += 1
+    if errors:
+        print(f"❌ 游标翻页顺序错误 {errors} 处")
+    return errors
+
+
+def median_request_ms(client: TestClient, params: dict, repeat: int = 5):
+    """重复请求，返回耗时中位数（毫秒）和最后一次的响应数据"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = client.get("/api/projects/", params=params).json()["data"]
+        durations.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(durations), 3), data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="项目列表分页基准")
+    parser.add_argument("--projects", type=int, default=200000, help="项目数量")
+    parser.add_argument("--verify-projects", type=int, default=1000, help="用于游标正确性校验的项目数量")
+    parser.add_argument("--page-size", type=int, default=20, help="分页大小")
+    args = parser.parse_args()
+
+    result = {"projects": args.projects, "page_size": args.page_size}
+    with TestClient(app) as client:
+        seed(args.verify_projects)
+        errors = verify_cursor_walk(client, args.verify_projects, 37)
+        result["cursor_walk_errors"] = errors
+
+        seed(args.projects - args.verify_projects)
+
+        # 首次请求需执行 COUNT，之后命中总数缓存
+        start = time.perf_counter()
+        first = client.get("/api/projects/", params={"page_size": args.page_size}).json()["data"]
+        result["first_page_uncached_total_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        result["first_page_cached_total_ms"], _ = median_request_ms(client, {"page_size": args.page_size})
+        result["total"] = first["total"]
+
+        # 深分页：90% 位置的 OFFSET 翻页与同一位置的游标翻页（以上一页最后一条为游标）
+        deep_page = max(2, int(args.projects * 0.9) // args.page_size)
+        page_params = {"page_size": args.page_size, "with_total": "false"}
+        result["deep_offset_page_ms"], offset_data = median_request_ms(
+            client, {**page_params, "page": deep_page}
+        )
+        previous = client.get("/api/projects/", params={**page_params, "page": deep_page - 1}).json()["data"]
+        result["deep_cursor_page_ms"], cursor_data = median_request_ms(
+            client, {**page_params, **previous["next_cursor"]}
+        )
+        if [i["id"] for i in offset_data["items"]] != [i["id"] for i in cursor_data["items"]]:
+            print("❌ 游标翻页与OFFSET翻页结果不一致")
+            errors += 1
+
+        result["keyword_search_ms"], found = median_request_ms(client, {"keyword": "第12345部"})
+        result["keyword_hits"] = found["total"]
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
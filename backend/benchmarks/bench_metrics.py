@@ -0,0 +1,72 @@
+"""
+运行指标开销基准
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_metrics --requests 2000
+
+对比开启和关闭 METRICS_ENABLED 时对话列表（命中缓存）请求的耗时中位数，
+并测量单次直方图记录和 /metrics 导出的耗时
+"""
+import argparse
+import json
+import statistics
+import time
+
+from benchmarks.common import use_sqlite
+
+use_sqlite("metrics")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from main import app  # noqa: E402
+from app.core import metrics  # noqa: E402
+from app.core.config import settings  # noqa: E402
+
+
+def median_us(fn, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1_000_000)
+    return round(statistics.median(durations), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="运行指标开销基准")
+    parser.add_argument("--requests", type=int, default=2000, help="每种配置的请求数")
+    args = parser.parse_args()
+
+    result = {"requests": args.requests}
+    with TestClient(app) as client:
+        project_id = client.post("/api/projects/", json={"name": "metrics"}).json()["data"]["id"]
+        client.post(
+            "/api/chapters/upload",
+            data={"project_id": project_id},
+            files={"file": ("novel.txt", "第一章 开始\n张三说：“你好。”\n天色已晚。".encode(), "text/plain")}
+        )
+        chapter_id = client.get("/api/chapters/", params={"project_id": project_id}).json()["data"]["items"][0]["id"]
+        client.post("/api/dialogues/batch", params={"chapter_id": chapter_id})
+
+        def request():
+            client.get("/api/dialogues/", params={"chapter_id": chapter_id})
+
+        for enabled in (False, True, False, True):
+            settings.METRICS_ENABLED = enabled
+            key = "request_with_metrics_us" if enabled else "request_without_metrics_us"
+            result[key] = median_us(request, args.requests)
+        result["middleware_overhead_us"] = round(
+            result["request_with_metrics_us"] - result["request_without_metrics_us"], 3
+        )
+        result["metrics_render_us"] = median_us(lambda: client.get("/metrics"), 50)
+
+    histogram = metrics.TTS_LATENCY.labels("bench", "voice", "success")
+    result["histogram_observe_us"] = median_us(lambda: histogram.observe(0.123), 10000)
+    result["labelled_observe_us"] = median_us(
+        lambda: metrics.TTS_LATENCY.labels("bench", "voice", "success").observe(0.123), 10000
+    )
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+端到端流水线基准
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_pipeline --chapters 10 --paragraphs 40 --dialogue-ratio 0.5 --cast 12
+    python -m benchmarks.bench_pipeline --output results/pipeline.json
+
+用合成小说（benchmarks.novel_generator）在临时 SQLite 库上依次执行完整流程:
+    parse             TextParser 分章并提取对话（不经过接口）
+    upload            上传文本：导入、分章、写入章节
+    extract_characters 提取角色
+    assign_voices     为角色分配 Mock 音色
+    create_dialogues  按章节创建对话
+    generate          按章节批量生成音频（MockTTSProvider）
+    export_chapter    逐章导出音频
+    export_project    导出项目音频
+每个阶段输出处理量、吞吐、单项耗时的 p50/p99 和阶段结束时的进程峰值内存（RSS 高水位），
+结果为 JSON，便于按版本对比。Mock 生成 mp3 需要 ffmpeg，默认使用 wav
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from benchmarks.common import use_sqlite, latency_summary
+
+use_sqlite("pipeline")
+
+import sqlalchemy  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import select, func  # noqa: E402
+
+from main import app  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.database import SessionLocal  # noqa: E402
+from app.models import Dialogue, DialogueStatus, Chapter  # noqa: E402
+from app.services.text_parser import TextParser  # noqa: E402
+from benchmarks.novel_generator import generate_novel  # noqa: E402
+
+MOCK_VOICES = ["mock_male_1", "mock_female_1"]
+
+
+def peak_rss_mb() -> float:
+    """进程的 RSS 高水位（MB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+class Stage:
+    """一个阶段的单项耗时和处理量"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.durations = []
+        self.counts = {}
+        self.elapsed = 0.0
+
+    @contextmanager
+    def item(self):
+        """计时一个处理单元（如一个章节）"""
+        start = time.perf_counter()
+        yield
+        self.durations.append((time.perf_counter() - start) * 1000)
+
+    def count(self, unit: str, amount: int):
+        self.counts[unit] = self.counts.get(unit, 0) + amount
+
+    def report(self) -> dict:
+        seconds = max(self.elapsed, 1e-9)
+        return {
+            "items": len(self.durations),
+            "total_ms": round(self.elapsed * 1000, 3),
+            "throughput_per_s": {unit: round(amount / seconds, 3) for unit, amount in self.counts.items()},
+            "counts": self.counts,
+            **latency_summary(self.durations),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+class Pipeline:
+    """按顺序执行各阶段并汇总结果"""
+
+    def __init__(self):
+        self.stages = {}
+        self.errors = []
+
+    @contextmanager
+    def stage(self, name: str):
+        stage = Stage(name)
+        start = time.perf_counter()
+        yield stage
+        stage.elapsed = time.perf_counter() - start
+        self.stages[name] = stage.report()
+
+    def check(self, ok: bool, message: str):
+        if not ok:
+            print(f"❌ {message}")
+            self.errors.append(message)
+
+
+def dialogue_status_counts(chapter_ids: list) -> dict:
+    db = SessionLocal()
+    try:
+        return {
+            status.value: count for status, count in db.execute(
+                select(Dialogue.status, func.count(Dialogue.id))
+                .where(Dialogue.chapter_id.in_(chapter_ids)).group_by(Dialogue.status)
+            )
+        }
+    finally:
+        db.close()
+
+
+def run(args) -> dict:
+    text = generate_novel(args.chapters, args.paragraphs, args.dialogue_ratio, args.cast, args.seed)
+    pipeline = Pipeline()
+
+    with pipeline.stage("parse") as stage:
+        chapters = TextParser.split_chapters(text)
+        for chapter in chapters:
+            with stage.item():
+                dialogues = TextParser.extract_dialogues(chapter["content"])
+            stage.count("chapters", 1)
+            stage.count("dialogues", len(dialogues))
+            stage.count("chars", len(chapter["content"]))
+    pipeline.check(len(chapters) == args.chapters, f"分章结果 {len(chapters)} 章，应为 {args.chapters} 章")
+
+    with TestClient(app) as client:
+        project_id = client.post("/api/projects/", json={"name": "pipeline"}).json()["data"]["id"]
+
+        with pipeline.stage("upload") as stage:
+            with stage.item():
+                response = client.post(
+                    "/api/chapters/upload",
+                    data={"project_id": project_id},
+                    files={"file": ("novel.txt", text.encode("utf-8"), "text/plain")}
+                )
+            stage.count("chars", len(text))
+            stage.count("chapters", args.chapters)
+        pipeline.check(response.status_code == 200, f"上传失败: {response.text[:200]}")
+
+        chapter_ids = [
+            item["id"] for item in
+            client.get("/api/chapters/", params={"project_id": project_id}).json()["data"]["items"]
+        ]
+
+        with pipeline.stage("extract_characters") as stage:
+            with stage.item():
+                response = client.post("/api/characters/extract", params={"project_id": project_id})
+            extracted = response.json()["data"]["extracted_count"] if response.status_code == 200 else 0
+            stage.count("characters", extracted)
+        pipeline.check(extracted > 0, "未提取到角色")
+
+        # 提取的角色默认使用尚未接入的引擎，改为 Mock 音色（与用户在界面上分配音色相同）
+        with pipeline.stage("assign_voices") as stage:
+            characters = client.get("/api/characters/", params={"project_id": project_id}).json()["data"]["items"]
+            for index, character in enumerate(characters):
+                with stage.item():
+                    response = client.put(f"/api/characters/{character['id']}", json={"voice_config": {
+                        "engine": "mock",
+                        "voice_id": MOCK_VOICES[index % len(MOCK_VOICES)],
+                        "speed": 1.0 + (index % 3) * 0.1,
+                        "pitch": 1.0,
+                        "volume": 1.0,
+                    }})
+                pipeline.check(response.status_code == 200, f"角色 {character['id']} 分配音色失败")
+                stage.count("characters", 1)
+
+        with pipeline.stage("create_dialogues") as stage:
+            for chapter_id in chapter_ids:
+                with stage.item():
+                    response = client.post("/api/dialogues/batch", params={"chapter_id": chapter_id})
+                pipeline.check(response.status_code == 200, f"章节 {chapter_id} 创建对话失败")
+                stage.count("chapters", 1)
+            stage.count("dialogues", sum(dialogue_status_counts(chapter_ids).values()))
+
+        tts_chapters = chapter_ids[:args.tts_chapters] if args.tts_chapters else chapter_ids
+        with pipeline.stage("generate") as stage:
+            for chapter_id in tts_chapters:
+                ids = [
+                    item["id"] for item in
+                    client.get("/api/dialogues/", params={"chapter_id": chapter_id}).json()["data"]["items"]
+                ]
+                # 批量生成在后台任务中执行，TestClient 在后台任务完成后才返回
+                with stage.item():
+                    client.post("/api/audio/batch-generate", json={"dialogue_ids": ids})
+                stage.count("chapters", 1)
+                stage.count("dialogues", len(ids))
+            statuses = dialogue_status_counts(tts_chapters)
+            stage.count("audio_seconds", round(_synthesized_seconds(tts_chapters)))
+        failed = sum(count for status, count in statuses.items() if status != DialogueStatus.COMPLETED.value)
+        pipeline.check(not failed, f"{failed} 条对话生成失败（{statuses}）")
+
+        with pipeline.stage("export_chapter") as stage:
+            for chapter_id in tts_chapters:
+                with stage.item():
+                    response = client.post(
+                        "/api/audio/export/chapter", params={"chapter_id": chapter_id, "format": args.export_format}
+                    )
+                ok = response.json().get("code") == 200
+                pipeline.check(ok, f"章节 {chapter_id} 导出失败: {response.json().get('message')}")
+                if ok:
+                    stage.count("chapters", 1)
+                    stage.count("bytes", os.path.getsize(response.json()["data"]["file_path"]))
+
+        with pipeline.stage("export_project") as stage:
+            with stage.item():
+                response = client.post("/api/audio/export/project", json={
+                    "project_id": project_id, "chapter_ids": tts_chapters, "format": args.export_format
+                })
+            ok = response.json().get("code") == 200
+            pipeline.check(ok, f"项目导出失败: {response.json().get('message')}")
+            if ok:
+                stage.count("chapters", len(tts_chapters))
+                stage.count("bytes", response.json()["data"]["file_size"])
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "chapters": args.chapters,
+            "paragraphs": args.paragraphs,
+            "dialogue_ratio": args.dialogue_ratio,
+            "cast": args.cast,
+            "seed": args.seed,
+            "tts_chapters": len(tts_chapters),
+            "audio_format": settings.TTS_AUDIO_FORMAT,
+            "export_format": args.export_format,
+            "text_chars": len(text),
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "database": "sqlite",
+        },
+        "stages": pipeline.stages,
+        "peak_rss_mb": peak_rss_mb(),
+        "errors": pipeline.errors,
+    }
+
+
+def _synthesized_seconds(chapter_ids: list) -> float:
+    db = SessionLocal()
+    try:
+        return db.scalar(
+            select(func.coalesce(func.sum(Dialogue.duration), 0)).join(Chapter, Chapter.id == Dialogue.chapter_id)
+            .where(Chapter.id.in_(chapter_ids), Dialogue.status == DialogueStatus.COMPLETED)
+        )
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端流水线基准")
+    parser.add_argument("--chapters", type=int, default=10, help="章节数")
+    parser.add_argument("--paragraphs", type=int, default=40, help="每章段落数")
+    parser.add_argument("--dialogue-ratio", type=float, default=0.5, help="对话段落比例（0-1）")
+    parser.add_argument("--cast", type=int, default=12, help="角色数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--tts-chapters", type=int, default=0, help="生成和导出音频的章节数（0表示全部）")
+    parser.add_argument("--audio-format", default="wav", help="Mock 生成的音频格式（mp3 需要 ffmpeg）")
+    parser.add_argument("--export-format", default="wav", help="导出格式（mp3 需要 ffmpeg）")
+    parser.add_argument("--output", help="结果另存为 JSON 文件")
+    args = parser.parse_args()
+
+    settings.TTS_AUDIO_FORMAT = args.audio_format
+    # 基准过程中不巡检存储目录
+    settings.STORAGE_GC_INTERVAL = 0
+
+    result = run(args)
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    if result["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
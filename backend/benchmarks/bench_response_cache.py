@@ -0,0 +1,170 @@
+"""
+列表响应缓存基准与失效回归
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_response_cache --dialogues 5000
+
+1. 正确性: 依次执行批量/单条修改、删除、章节内容修改、角色增删、后台ORM写入等操作，
+   每次写入后校验缓存返回的章节/对话/角色列表与不走缓存的查询结果一致，且旧 ETag 不再返回 304
+2. 性能: 对比未命中、命中缓存和 ETag 304 三种情况下对话列表的请求耗时
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from benchmarks.common import use_sqlite
+
+use_sqlite("response_cache")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+from main import app  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.database import SessionLocal  # noqa: E402
+from app.models import Dialogue, DialogueStatus  # noqa: E402
+
+SPEAKERS = ["张三", "李四", "王五"]
+
+
+def build_text(dialogue_count: int) -> str:
+    lines = ["第一章 开始"]
+    for i in range(dialogue_count):
+        if i % 3 == 0:
+            lines.append(f"天色渐晚，这是第{i}段旁白。")
+        else:
+            lines.append(f"{SPEAKERS[i % len(SPEAKERS)]}说：“第{i}句台词。”")
+    lines += ["第二章 继续", "无事发生。"]
+    return "\n".join(lines)
+
+
+def uncached(client: TestClient, url: str, params: dict):
+    """关闭缓存取一次结果作为对照"""
+    backend = settings.RESPONSE_CACHE_BACKEND
+    settings.RESPONSE_CACHE_BACKEND = "none"
+    try:
+        return client.get(url, params=params).json()
+    finally:
+        settings.RESPONSE_CACHE_BACKEND = backend
+
+
+def check_lists(client: TestClient, lists: dict, etags: dict, step: str) -> int:
+    """校验每个列表的缓存结果与对照一致，返回错误数；etags 记录上一次的 ETag"""
+    errors = 0
+    for name, (url, params) in lists.items():
+        response = client.get(url, params=params)
+        if response.json() != uncached(client, url, params):
+            print(f"❌ {step}: {name} 缓存内容与数据库不一致")
+            errors += 1
+        etag = response.headers.get("etag")
+        previous = etags.get(name)
+        if previous and previous != etag:
+            # 列表已变化，旧 ETag 必须不再命中
+            if client.get(url, params=params, headers={"If-None-Match": previous}).status_code == 304:
+                print(f"❌ {step}: {name} 旧 ETag 仍返回 304")
+                errors += 1
+        if client.get(url, params=params, headers={"If-None-Match": etag}).status_code != 304:
+            print(f"❌ {step}: {name} 当前 ETag 未返回 304")
+            errors += 1
+        etags[name] = etag
+    return errors
+
+
+def complete_dialogues_in_background(chapter_id: int, count: int):
+    """模拟音频生成：用独立会话以ORM方式写入状态和时长"""
+    db = SessionLocal()
+    try:
+        dialogues = db.execute(
+            select(Dialogue).where(Dialogue.chapter_id == chapter_id).order_by(Dialogue.order_index).limit(count)
+        ).scalars().all()
+        for dialogue in dialogues:
+            dialogue.status = DialogueStatus.COMPLETED
+            dialogue.duration = 1.25
+        db.commit()
+    finally:
+        db.close()
+
+
+def median_ms(client: TestClient, url: str, params: dict, headers: dict = None, repeat: int = 20) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        client.get(url, params=params, headers=headers or {})
+        durations.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(durations), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列表响应缓存基准与失效回归")
+    parser.add_argument("--dialogues", type=int, default=5000, help="第一章对话数量")
+    args = parser.parse_args()
+
+    result = {"dialogues": args.dialogues}
+    errors = 0
+    with TestClient(app) as client:
+        project_id = client.post("/api/projects/", json={"name": "bench"}).json()["data"]["id"]
+        client.post(
+            "/api/chapters/upload",
+            data={"project_id": project_id},
+            files={"file": ("novel.txt", build_text(args.dialogues).encode(), "text/plain")}
+        )
+        lists = {
+            "chapters": ("/api/chapters/", {"project_id": project_id}),
+            "characters": ("/api/characters/", {"project_id": project_id}),
+        }
+        etags = {}
+        errors += check_lists(client, lists, etags, "上传")
+
+        client.post(f"/api/characters/extract?project_id={project_id}")
+        chapter_ids = [c["id"] for c in client.get("/api/chapters/", params={"project_id": project_id}).json()["data"]["items"]]
+        chapter_id = chapter_ids[0]
+        lists["dialogues"] = ("/api/dialogues/", {"chapter_id": chapter_id})
+        lists["dialogues_page"] = ("/api/dialogues/", {"chapter_id": chapter_id, "limit": 100})
+        errors += check_lists(client, lists, etags, "提取角色")
+
+        client.post(f"/api/dialogues/batch?chapter_id={chapter_id}")
+        errors += check_lists(client, lists, etags, "批量创建对话")
+
+        ids = [d["id"] for d in client.get("/api/dialogues/", params={"chapter_id": chapter_id}).json()["data"]["items"]]
+        characters = client.get("/api/characters/", params={"project_id": project_id}).json()["data"]["items"]
+
+        steps = [
+            ("批量改派角色", lambda: client.put(
+                "/api/dialogues/batch/update", json={"dialogue_ids": ids[:50], "character_id": characters[0]["id"]}
+            )),
+            ("后台生成音频", lambda: complete_dialogues_in_background(chapter_id, 30)),
+            ("批量重置音频", lambda: client.put(
+                "/api/dialogues/batch/update", json={"dialogue_ids": ids[:10], "reset_audio": True}
+            )),
+            ("修改单条对话", lambda: client.put(f"/api/dialogues/{ids[1]}", json={"content": "改过的台词。"})),
+            ("删除对话", lambda: client.delete(f"/api/dialogues/{ids[2]}")),
+            ("修改章节", lambda: client.put(f"/api/chapters/{chapter_ids[1]}", json={"title": "新标题"})),
+            ("新建角色", lambda: client.post("/api/characters/", json={"project_id": project_id, "name": "新角色"})),
+            ("删除角色", lambda: client.delete(f"/api/characters/{characters[1]['id']}")),
+            ("删除章节", lambda: client.delete(f"/api/chapters/{chapter_ids[1]}")),
+        ]
+        for step, action in steps:
+            action()
+            errors += check_lists(client, lists, etags, step)
+
+        url, params = lists["dialogues"]
+        uncached_ms = []
+        for _ in range(10):
+            start = time.perf_counter()
+            uncached(client, url, params)
+            uncached_ms.append((time.perf_counter() - start) * 1000)
+        result["dialogue_list_uncached_ms"] = round(statistics.median(uncached_ms), 3)
+        result["dialogue_list_cached_ms"] = median_ms(client, url, params)
+        result["dialogue_list_304_ms"] = median_ms(client, url, params, {"If-None-Match": etags["dialogues"]})
+
+    result["errors"] = errors
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if errors:
+        print("❌ 列表缓存失效不正确")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
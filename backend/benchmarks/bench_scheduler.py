@@ -0,0 +1,205 @@
+"""
+TTS 调度公平性与交互优先校验
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_scheduler --dialogues 60 --latency-ms 100 --tts-concurrency 8
+
+项目 A 同时提交 --a-batches 个批量任务、项目 B 提交 1 个（AudioService.batch_generate，各自并发），
+批量生成期间每隔 --interactive-interval 秒单条生成（interactive 优先级）另一章节的一条对话。
+合成使用 mock 引擎并在每次合成前等待 --latency-ms（模拟云端引擎耗时）。
+在两个项目都有批量请求排队期间采样调度器状态，校验:
+    - 项目 B 占用的批量名额比例接近 1/2（而非按任务数的 1/(a_batches+1)）
+    - 批量任务同时占用的名额不超过 TTS_MAX_CONCURRENCY - TTS_INTERACTIVE_RESERVED
+    - 交互请求的平均排队时间不超过一次合成的耗时
+校验失败时以非零状态退出
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from benchmarks.common import use_sqlite, histogram_mean_ms
+
+use_sqlite("scheduler")
+
+from app.core import metrics  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.database import SessionLocal, AsyncSessionLocal, init_db  # noqa: E402
+from app.models import Project, Chapter, Dialogue, DialogueType  # noqa: E402
+from app.services.audio_service import AudioService  # noqa: E402
+from app.services.tts_base import MockTTSProvider  # noqa: E402
+from app.services.tts_factory import TTSFactory  # noqa: E402
+from app.services.tts_scheduler import TTSScheduler, BATCH, INTERACTIVE, SPECULATIVE, PRIORITIES  # noqa: E402
+
+
+class DelayedMockProvider(MockTTSProvider):
+    """每次合成前等待固定时长的 mock 引擎"""
+
+    latency = 0.1
+
+    async def synthesize(self, text, config, output_path):
+        await asyncio.sleep(self.latency)
+        return await super().synthesize(text, config, output_path)
+
+
+def seed(name: str, chapters: int, dialogues: int) -> dict:
+    """构造一个项目及其章节，返回项目ID和各章节的对话ID"""
+    db = SessionLocal()
+    try:
+        project = Project(name=name)
+        db.add(project)
+        db.flush()
+        batches = []
+        for index in range(chapters):
+            chapter = Chapter(project_id=project.id, title=f"第{index + 1}章", order_index=index, content="")
+            db.add(chapter)
+            db.flush()
+            items = [
+                Dialogue(
+                    chapter_id=chapter.id,
+                    type=DialogueType.NARRATION,
+                    content=f"{name}第{index + 1}章第{i}句。",
+                    order_index=i,
+                )
+                for i in range(dialogues)
+            ]
+            db.add_all(items)
+            db.flush()
+            batches.append([item.id for item in items])
+        db.commit()
+        return {"project_id": project.id, "batches": batches}
+    finally:
+        db.close()
+
+
+def mean(values: list) -> float:
+    return round(sum(values) / len(values), 3) if values else 0.0
+
+
+async def run(args, a: dict, b: dict, probe_ids: list) -> dict:
+    service = AudioService(storage_path=settings.STORAGE_PATH)
+    project_a, project_b = a["project_id"], b["project_id"]
+    samples = {"a": [], "b": [], "batch": []}
+    stop = asyncio.Event()
+
+    async def sample():
+        """两个项目都有批量请求排队时记录各自正在合成的数量"""
+        while not stop.is_set():
+            queued = TTSScheduler._queues[BATCH]
+            if queued.get(project_a) and queued.get(project_b):
+                samples["a"].append(TTSScheduler._project_active.get(project_a, 0))
+                samples["b"].append(TTSScheduler._project_active.get(project_b, 0))
+            samples["batch"].append(TTSScheduler._active[BATCH] + TTSScheduler._active[SPECULATIVE])
+            await asyncio.sleep(0.005)
+
+    probe_ms, probe_errors = [], 0
+
+    async def probe():
+        nonlocal probe_errors
+        # 等批量任务占满名额后再开始
+        await asyncio.sleep(args.interactive_interval)
+        for dialogue_id in probe_ids:
+            async with AsyncSessionLocal() as db:
+                dialogue = await db.get(Dialogue, dialogue_id)
+                began = time.perf_counter()
+                result = await service.generate_dialogue_audio(dialogue, None, db, priority=INTERACTIVE)
+                probe_ms.append((time.perf_counter() - began) * 1000)
+                if not result.success:
+                    probe_errors += 1
+            await asyncio.sleep(args.interactive_interval)
+
+    sampler = asyncio.create_task(sample())
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(service.batch_generate(ids) for ids in a["batches"] + b["batches"]),
+        probe()
+    )
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await sampler
+
+    jobs = results[:-1]
+    completed = sum(job["success"] for job in jobs)
+    contended = sum(samples["a"]) + sum(samples["b"])
+    return {
+        "dialogues": sum(job["total"] for job in jobs),
+        "completed": completed,
+        "failed": sum(job["failed"] for job in jobs),
+        "elapsed_s": round(elapsed, 3),
+        "completed_per_s": round(completed / max(elapsed, 1e-9), 3),
+        "contended_samples": len(samples["a"]),
+        "active_mean": {"a": mean(samples["a"]), "b": mean(samples["b"])},
+        "b_share": round(sum(samples["b"]) / contended, 3) if contended else None,
+        "batch_active_max": max(samples["batch"], default=0),
+        "interactive": {
+            "requests": len(probe_ms),
+            "errors": probe_errors,
+            "mean_ms": mean(probe_ms),
+            "max_ms": round(max(probe_ms), 3) if probe_ms else 0.0,
+        },
+        "queue_wait_mean_ms": {
+            priority: histogram_mean_ms(metrics.TTS_QUEUE_WAIT.labels(priority)) for priority in PRIORITIES
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS 调度公平性与交互优先校验")
+    parser.add_argument("--dialogues", type=int, default=60, help="每个批量任务的对话数")
+    parser.add_argument("--a-batches", type=int, default=2, help="项目 A 同时提交的批量任务数")
+    parser.add_argument("--latency-ms", type=float, default=100, help="每次合成的耗时（毫秒）")
+    parser.add_argument("--tts-concurrency", type=int, default=8, help="同时进行的合成数（TTS_MAX_CONCURRENCY）")
+    parser.add_argument("--interactive", type=int, default=10, help="批量生成期间单条生成的对话数")
+    parser.add_argument("--interactive-interval", type=float, default=0.2, help="单条生成的间隔秒数")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="项目 B 名额比例与 1/2 的允许偏差")
+    args = parser.parse_args()
+
+    settings.TTS_AUDIO_FORMAT = "wav"
+    settings.TTS_MAX_CONCURRENCY = args.tts_concurrency
+    settings.SYNTHESIS_LEASE_ENABLED = False
+    TTSScheduler.reset()
+    DelayedMockProvider.latency = args.latency_ms / 1000
+    TTSFactory.register_provider("delayed_mock", DelayedMockProvider)
+    AudioService.DEFAULT_VOICE_CONFIG = {**AudioService.DEFAULT_VOICE_CONFIG, "engine": "delayed_mock"}
+
+    init_db()
+    a = seed("A", args.a_batches, args.dialogues)
+    b = seed("B", 2, args.dialogues)
+    # B 的第二章留给单条生成
+    probe_ids = b["batches"].pop()[:args.interactive]
+
+    result = {
+        "config": {
+            "dialogues": args.dialogues,
+            "a_batches": args.a_batches,
+            "latency_ms": args.latency_ms,
+            "tts_concurrency": settings.TTS_MAX_CONCURRENCY,
+            "interactive_reserved": settings.TTS_INTERACTIVE_RESERVED,
+        },
+    }
+    result.update(asyncio.run(run(args, a, b, probe_ids)))
+
+    errors = []
+    if result["failed"] or result["interactive"]["errors"]:
+        errors.append("合成失败")
+    if result["b_share"] is None:
+        errors.append("两个项目没有同时排队（增加 --dialogues）")
+    elif abs(result["b_share"] - 0.5) > args.tolerance:
+        errors.append(f"项目 B 的名额比例 {result['b_share']} 偏离 1/2")
+    batch_capacity = settings.TTS_MAX_CONCURRENCY - min(settings.TTS_INTERACTIVE_RESERVED, settings.TTS_MAX_CONCURRENCY - 1)
+    if result["batch_active_max"] > batch_capacity:
+        errors.append(f"批量任务同时占用 {result['batch_active_max']} 个名额，超过 {batch_capacity}")
+    if result["queue_wait_mean_ms"][INTERACTIVE] > args.latency_ms:
+        errors.append("交互请求排队时间超过一次合成的耗时")
+    result["errors"] = errors
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if errors:
+        for error in errors:
+            print(f"❌ {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
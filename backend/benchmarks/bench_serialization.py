@@ -0,0 +1,141 @@
+"""
+列表响应序列化微基准
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_serialization --dialogues 5000
+
+对比对话列表的两种响应构造方式，并校验两者输出的 JSON 一致:
+- legacy: 查询ORM对象 -> DialogueListItem.model_validate -> model_dump -> success_response
+          -> jsonable_encoder -> json.dumps（FastAPI 默认 JSONResponse 的编码）
+- fast:   按列表项字段直接查询行元组 -> 字典 -> 预先序列化的响应外层 + orjson
+分别给出“查询+序列化”和“仅序列化”的耗时中位数
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from benchmarks.common import use_sqlite
+
+use_sqlite("serialization")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+from app.core.database import SessionLocal, init_db  # noqa: E402
+from app.core.response import success_response, render_success, list_columns, rows_to_dicts, orjson  # noqa: E402
+from app.models import Project, Chapter, Character, Dialogue, DialogueType, DialogueStatus  # noqa: E402
+from app.schemas.dialogue import DialogueListItem  # noqa: E402
+
+MESSAGE = "获取对话列表成功"
+
+
+def seed(dialogue_count: int) -> int:
+    db = SessionLocal()
+    try:
+        project = Project(name="bench")
+        db.add(project)
+        db.flush()
+        chapter = Chapter(project_id=project.id, title="第一章", order_index=0, content="")
+        characters = [Character(project_id=project.id, name=name) for name in ("张三", "李四", "王五")]
+        db.add_all([chapter, *characters])
+        db.flush()
+        statuses = list(DialogueStatus)
+        db.bulk_insert_mappings(Dialogue, [
+            {
+                "chapter_id": chapter.id,
+                "character_id": characters[i % 3].id if i % 4 else None,
+                "type": DialogueType.DIALOGUE if i % 4 else DialogueType.NARRATION,
+                "content": f"第{i}句台词，“引号”与换行\n" + "内容" * 20,
+                "order_index": i,
+                "status": statuses[i % len(statuses)],
+                "audio_path": f"/storage/audio/1/dialogue_{i}.mp3" if i % 2 else None,
+                "duration": round(i * 0.137, 3),
+            }
+            for i in range(dialogue_count)
+        ])
+        db.commit()
+        return chapter.id
+    finally:
+        db.close()
+
+
+def legacy_query(db, chapter_id: int):
+    return db.execute(
+        select(Dialogue, Character.name).outerjoin(
+            Character, Character.id == Dialogue.character_id
+        ).where(Dialogue.chapter_id == chapter_id).order_by(Dialogue.order_index, Dialogue.id)
+    ).all()
+
+
+def legacy_render(rows) -> bytes:
+    items = []
+    for dialogue, character_name in rows:
+        item_dict = DialogueListItem.model_validate(dialogue).model_dump()
+        item_dict["character_name"] = character_name
+        items.append(item_dict)
+    content = jsonable_encoder(success_response(data={"items": items}, message=MESSAGE))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_query(db, chapter_id: int):
+    return db.execute(
+        select(*list_columns(DialogueListItem, Dialogue, character_name=Character.name)).outerjoin(
+            Character, Character.id == Dialogue.character_id
+        ).where(Dialogue.chapter_id == chapter_id).order_by(Dialogue.order_index, Dialogue.id)
+    ).all()
+
+
+def fast_render(rows) -> bytes:
+    return render_success({"items": rows_to_dicts(rows)}, MESSAGE)
+
+
+def median_ms(fn, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(durations), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列表响应序列化微基准")
+    parser.add_argument("--dialogues", type=int, default=5000, help="对话数量")
+    parser.add_argument("--repeat", type=int, default=15, help="重复次数")
+    args = parser.parse_args()
+
+    init_db()
+    chapter_id = seed(args.dialogues)
+    result = {"dialogues": args.dialogues, "encoder": "orjson" if orjson is not None else "json"}
+
+    db = SessionLocal()
+    try:
+        legacy_rows = legacy_query(db, chapter_id)
+        fast_rows = fast_query(db, chapter_id)
+        legacy_body = legacy_render(legacy_rows)
+        fast_body = fast_render(fast_rows)
+        result["body_bytes"] = len(fast_body)
+        identical = json.loads(legacy_body) == json.loads(fast_body)
+        result["identical_json"] = identical
+
+        def legacy_full():
+            db.expunge_all()
+            legacy_render(legacy_query(db, chapter_id))
+
+        result["legacy_query_and_render_ms"] = median_ms(legacy_full, args.repeat)
+        result["fast_query_and_render_ms"] = median_ms(lambda: fast_render(fast_query(db, chapter_id)), args.repeat)
+        result["legacy_render_only_ms"] = median_ms(lambda: legacy_render(legacy_rows), args.repeat)
+        result["fast_render_only_ms"] = median_ms(lambda: fast_render(fast_rows), args.repeat)
+    finally:
+        db.close()
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if not identical:
+        print("❌ 快速路径输出与原有输出不一致")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
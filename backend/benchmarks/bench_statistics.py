@@ -0,0 +1,214 @@
+"""
+统计计数一致性回归与读取基准
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_statistics --chapters 50 --lines 40
+
+1. 一致性: 经由API完成上传、提取角色、创建对话、批量/单条修改、删除等操作后，
+   对比增量维护的计数与 StatsService.rebuild 全量重算的结果
+2. 性能: 对比读取统计行与按对话表实时聚合的耗时，并记录统计接口的SQL语句数
+"""
+import argparse
+import json
+import random
+import sys
+
+from benchmarks.common import use_sqlite, QueryCounter, timer
+
+use_sqlite("statistics")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import select, func  # noqa: E402
+
+from main import app  # noqa: E402
+from app.core.database import SessionLocal, async_engine  # noqa: E402
+from app.models import (  # noqa: E402
+    Project, Chapter, Character, Dialogue, DialogueStatus, ChapterStats, ProjectStats
+)
+from app.services.statistics import StatsService, DIALOGUE_STATS_COLUMNS  # noqa: E402
+
+SPEAKERS = ["张三", "李四", "王五", "赵六"]
+
+
+def build_text(chapter_count: int, line_count: int) -> str:
+    """生成包含多个章节和角色对话的文本"""
+    lines = []
+    for c in range(chapter_count):
+        lines.append(f"第{c + 1}章 测试")
+        for i in range(line_count):
+            if i % 3 == 0:
+                lines.append(f"天色渐晚，这是本章的第{i}段旁白。")
+            else:
+                lines.append(f"{SPEAKERS[i % len(SPEAKERS)]}说：“第{i}句台词。”")
+    return "\n".join(lines)
+
+
+def snapshot(project_id: int) -> dict:
+    """读取当前的全部计数"""
+    db = SessionLocal()
+    try:
+        project = db.get(Project, project_id)
+        stats = db.get(ProjectStats, project_id)
+        result = {
+            "project": (
+                project.chapters_count, project.characters_count, round(project.total_duration, 3),
+                *[round(getattr(stats, column), 3) for column in DIALOGUE_STATS_COLUMNS]
+            ),
+            "chapters": {
+                row.chapter_id: tuple(round(getattr(row, column), 3) for column in DIALOGUE_STATS_COLUMNS)
+                for row in db.execute(
+                    select(ChapterStats).where(ChapterStats.project_id == project_id)
+                ).scalars()
+            },
+            "characters": {
+                row.id: (row.dialogue_count, round(row.total_duration, 3))
+                for row in db.execute(
+                    select(Character).where(Character.project_id == project_id)
+                ).scalars()
+            },
+        }
+        return result
+    finally:
+        db.close()
+
+
+def rebuild(project_id: int):
+    db = SessionLocal()
+    try:
+        StatsService.rebuild(db, [project_id])
+        db.commit()
+    finally:
+        db.close()
+
+
+def complete_some(chapter_ids, rng: random.Random) -> int:
+    """以ORM方式把部分对话标记为已生成（模拟音频生成写入时长）"""
+    db = SessionLocal()
+    try:
+        dialogues = db.execute(
+            select(Dialogue).where(Dialogue.chapter_id.in_(chapter_ids))
+        ).scalars().all()
+        completed = 0
+        for dialogue in dialogues:
+            if rng.random() < 0.4:
+                dialogue.status = DialogueStatus.COMPLETED
+                dialogue.duration = round(rng.uniform(0.5, 5.0), 3)
+                completed += 1
+        db.commit()
+        return completed
+    finally:
+        db.close()
+
+
+def run_operations(client: TestClient, project_id: int, rng: random.Random):
+    """经由API执行一组会改变计数的操作"""
+    client.post(f"/api/characters/extract?project_id={project_id}")
+    chapters = client.get("/api/chapters/", params={"project_id": project_id, "page_size": 100}).json()["data"]["items"]
+    chapter_ids = [c["id"] for c in chapters]
+    for chapter_id in chapter_ids:
+        client.post(f"/api/dialogues/batch?chapter_id={chapter_id}")
+
+    complete_some(chapter_ids, rng)
+
+    ids = [row["id"] for row in client.get(
+        "/api/dialogues/", params={"chapter_id": chapter_ids[0], "page_size": 100}
+    ).json()["data"]["items"]]
+    characters = client.get("/api/characters/", params={"project_id": project_id}).json()["data"]["items"]
+
+    # 批量改派角色、批量改状态、批量重置音频
+    client.put("/api/dialogues/batch/update", json={"dialogue_ids": ids[::2], "character_id": characters[0]["id"]})
+    client.put("/api/dialogues/batch/update", json={"dialogue_ids": ids[1::3], "status": "error"})
+    client.put("/api/dialogues/batch/update", json={"dialogue_ids": ids[::5], "reset_audio": True})
+
+    # 单条修改与删除
+    client.put(f"/api/dialogues/{ids[1]}", json={"status": "generating"})
+    client.put(f"/api/dialogues/{ids[2]}", json={"character_id": characters[-1]["id"]})
+    client.delete(f"/api/dialogues/{ids[3]}")
+
+    # 修改章节内容触发对话增量同步，删除章节和角色
+    client.put(f"/api/chapters/{chapter_ids[1]}", json={"content": "新的旁白。\n张三说：“改过的台词。”"})
+    client.delete(f"/api/chapters/{chapter_ids[-1]}")
+    client.delete(f"/api/characters/{characters[1]['id']}")
+    client.post("/api/characters/", json={"project_id": project_id, "name": "新角色"})
+    return chapter_ids
+
+
+def stored_project_statistics(project_id: int) -> dict:
+    """新做法：按主键读取统计行"""
+    db = SessionLocal()
+    try:
+        stats = db.get(ProjectStats, project_id)
+        return {column: getattr(stats, column) for column in DIALOGUE_STATS_COLUMNS}
+    finally:
+        db.close()
+
+
+def live_project_statistics(project_id: int) -> dict:
+    """旧做法：按对话表实时聚合"""
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(Dialogue.status, func.count(Dialogue.id), func.sum(Dialogue.duration))
+            .join(Chapter, Chapter.id == Dialogue.chapter_id)
+            .where(Chapter.project_id == project_id)
+            .group_by(Dialogue.status)
+        ).all()
+        return {str(status): (count, duration) for status, count, duration in rows}
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="统计计数一致性回归与读取基准")
+    parser.add_argument("--chapters", type=int, default=50, help="章节数量")
+    parser.add_argument("--lines", type=int, default=40, help="每章段落数")
+    parser.add_argument("--repeat", type=int, default=20, help="统计读取重复次数")
+    parser.add_argument("--seed", type=int, default=7, help="随机种子")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    result = {"chapters": args.chapters, "lines": args.lines}
+    errors = 0
+    with TestClient(app) as client:
+        project_id = client.post("/api/projects/", json={"name": "bench"}).json()["data"]["id"]
+        text = build_text(args.chapters, args.lines)
+        client.post(
+            "/api/chapters/upload",
+            data={"project_id": project_id},
+            files={"file": ("novel.txt", text.encode(), "text/plain")}
+        )
+        run_operations(client, project_id, rng)
+
+        incremental = snapshot(project_id)
+        rebuild(project_id)
+        expected = snapshot(project_id)
+        for key in ("project", "chapters", "characters"):
+            if incremental[key] != expected[key]:
+                errors += 1
+                print(f"❌ {key} 计数不一致:\n  增量: {incremental[key]}\n  重算: {expected[key]}")
+        result["project_counts"] = dict(zip(
+            ["chapters_count", "characters_count", "total_duration", *DIALOGUE_STATS_COLUMNS],
+            expected["project"]
+        ))
+
+        with QueryCounter(async_engine.sync_engine) as counter:
+            client.get(f"/api/projects/{project_id}/statistics")
+        result["stats_endpoint_queries"] = counter.count
+
+        with timer(result, "stored_stats_ms"):
+            for _ in range(args.repeat):
+                stored_project_statistics(project_id)
+
+        with timer(result, "live_aggregate_ms"):
+            for _ in range(args.repeat):
+                live_project_statistics(project_id)
+
+    result["errors"] = errors
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if errors:
+        print("❌ 增量统计与全量重算结果不一致")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+对话提取基准测试与正确性回归
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_text_parser
+    python -m benchmarks.bench_text_parser --update-corpus   # 以当前实现重写期望结果
+
+1. 正确性: 用 text_parser_corpus.json 中的期望片段校验 TextParser.extract_dialogues，
+   并与旧版正则实现对比，确认旧版识别出的每条对话在新实现中依然存在
+2. 性能: 在不同长度的段落上对比新旧实现的耗时，结果以JSON输出
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict
+
+from app.services.text_parser import TextParser
+from benchmarks import legacy_text_parser
+
+CORPUS_PATH = Path(__file__).parent / "text_parser_corpus.json"
+
+
+def simplify(dialogues: List[Dict]) -> List[List]:
+    """只保留参与比较的字段"""
+    return [[d['type'], d['character'], d['content']] for d in dialogues]
+
+
+def check_corpus(update: bool = False) -> int:
+    """校验语料库，返回失败用例数"""
+    corpus = json.loads(CORPUS_PATH.read_text(encoding="utf-8"))
+    failures = 0
+
+    for case in corpus:
+        actual = simplify(TextParser.extract_dialogues(case['text']))
+        if update:
+            case['expected'] = actual
+            continue
+
+        if actual != case['expected']:
+            failures += 1
+            print(f"❌ [{case['name']}] 输出与期望不一致")
+            print(f"   期望: {case['expected']}")
+            print(f"   实际: {actual}")
+
+        # 旧版识别出的对话必须在新实现中保留
+        # （旧版按长度猜测哪组是角色名，短对话时会把两者颠倒，因此两种顺序都算保留）
+        for d in legacy_text_parser.extract_dialogues(case['text']):
+            if d['type'] != 'dialogue':
+                continue
+            if (['dialogue', d['character'], d['content']] not in actual
+                    and ['dialogue', d['content'], d['character']] not in actual):
+                failures += 1
+                print(f"❌ [{case['name']}] 丢失旧版识别的对话: {d['character']}: {d['content']}")
+
+    if update:
+        CORPUS_PATH.write_text(
+            json.dumps(corpus, ensure_ascii=False, indent=2) + "\n",
+            encoding="utf-8"
+        )
+        print(f"已更新 {len(corpus)} 条用例的期望结果")
+    else:
+        print(f"语料库校验: 共 {len(corpus)} 条用例，{failures} 处失败")
+    return failures
+
+
+def make_paragraph(length: int, closed: bool) -> str:
+    """构造指定长度的段落；closed=False 时引号不闭合，触发旧版正则的回溯"""
+    filler = "他沿着长街慢慢走着，心里想着昨夜的事情，"
+    body = (filler * (length // len(filler) + 1))[:length]
+    if closed:
+        return f'张三说："{body}"'
+    return f'张三说："{body}'
+
+
+def time_call(func, text: str, repeat: int) -> float:
+    """返回单次调用的平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(text)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def run_benchmark(sizes: List[int], repeat: int) -> List[Dict]:
+    """对比新旧实现在不同段落长度下的耗时"""
+    results = []
+    for size in sizes:
+        for closed in (True, False):
+            text = make_paragraph(size, closed)
+            results.append({
+                "paragraph_chars": size,
+                "quote_closed": closed,
+                "legacy_ms": round(time_call(legacy_text_parser.extract_dialogues, text, repeat), 3),
+                "tokenizer_ms": round(time_call(TextParser.extract_dialogues, text, repeat), 3),
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对话提取基准测试")
+    parser.add_argument("--update-corpus", action="store_true", help="以当前实现重写期望结果")
+    parser.add_argument("--sizes", default="500,2000,8000", help="段落长度列表（逗号分隔）")
+    parser.add_argument("--repeat", type=int, default=3, help="每组重复次数")
+    args = parser.parse_args()
+
+    failures = check_corpus(update=args.update_corpus)
+    if args.update_corpus:
+        return
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    print(json.dumps(run_benchmark(sizes, args.repeat), ensure_ascii=False, indent=2))
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
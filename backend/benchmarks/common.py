@@ -0,0 +1,69 @@
+"""基准测试公共工具"""
+import math
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+
+def use_sqlite(name: str = "bench") -> str:
+    """
+    在导入 app 之前调用：将数据库和存储目录指向临时的 SQLite 环境
+
+    Returns:
+        临时目录路径
+    """
+    work_dir = tempfile.mkdtemp(prefix=f"asr_{name}_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(work_dir, 'bench.db')}")
+    os.environ.setdefault("STORAGE_PATH", os.path.join(work_dir, "storage"))
+    os.environ.setdefault("DEBUG", "false")
+    return work_dir
+
+
+class QueryCounter:
+    """统计引擎上执行的SQL语句数"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self.statements = []
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
+
+    def __enter__(self):
+        from sqlalchemy import event
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+@contextmanager
+def timer(result: dict, key: str):
+    """把代码块耗时（毫秒）写入 result[key]"""
+    start = time.perf_counter()
+    yield
+    result[key] = round((time.perf_counter() - start) * 1000, 3)
+
+
+def percentile(values: list, q: float) -> float:
+    """最近秩百分位数（保留3位小数，无数据时为0）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return round(ordered[rank - 1], 3)
+
+
+def latency_summary(values: list, prefix: str = "") -> dict:
+    """耗时分布摘要（毫秒）：{prefix}p50_ms、{prefix}p99_ms"""
+    return {f"{prefix}p50_ms": percentile(values, 50), f"{prefix}p99_ms": percentile(values, 99)}
+
+
+def histogram_mean_ms(histogram) -> float:
+    """运行指标直方图（秒）的平均值，单位毫秒"""
+    return round(histogram.sum / histogram.count * 1000, 3) if histogram.count else 0.0
@@ -0,0 +1,184 @@
+"""
+热点查询执行计划回归
+
+用法（在 backend 目录下）:
+    python -m benchmarks.explain_hot_queries
+    DATABASE_URL=mysql+pymysql://... python -m benchmarks.explain_hot_queries --no-seed
+
+对列表、导出、统计等热点查询执行 EXPLAIN，出现全表扫描、全索引扫描或额外排序
+（SQLite: SCAN / USE TEMP B-TREE；MySQL: type=ALL/index、Using filesort/Using temporary）时
+输出执行计划并以非零状态退出。未指定 DATABASE_URL 时在临时 SQLite 库中写入样本数据并 ANALYZE，
+指定时使用已有数据库，请在有代表性数据量的库上执行（MySQL 对小表可能直接选择全表扫描）
+"""
+import argparse
+import json
+import os
+import sys
+
+_use_existing_database = "DATABASE_URL" in os.environ
+
+from benchmarks.common import use_sqlite  # noqa: E402
+
+use_sqlite("explain")
+
+from sqlalchemy import select, func, text, tuple_  # noqa: E402
+
+from app.core.database import engine, SessionLocal, init_db  # noqa: E402
+from app.models import (  # noqa: E402
+    Project, Chapter, Character, Dialogue, DialogueType, DialogueStatus
+)
+
+CHAPTER_ID = 1
+PROJECT_ID = 1
+
+
+def hot_queries() -> dict:
+    """与接口和服务中相同形态的热点查询"""
+    return {
+        # GET /api/dialogues/ 首页及游标翻页
+        "dialogue_list": select(Dialogue, Character.name).outerjoin(
+            Character, Character.id == Dialogue.character_id
+        ).where(Dialogue.chapter_id == CHAPTER_ID).order_by(Dialogue.order_index, Dialogue.id).limit(101),
+        "dialogue_list_cursor": select(Dialogue, Character.name).outerjoin(
+            Character, Character.id == Dialogue.character_id
+        ).where(
+            Dialogue.chapter_id == CHAPTER_ID,
+            tuple_(Dialogue.order_index, Dialogue.id) > tuple_(100, 100)
+        ).order_by(Dialogue.order_index, Dialogue.id).limit(101),
+        # 章节内容修改后的对话同步
+        "dialogue_sync": select(Dialogue).where(
+            Dialogue.chapter_id == CHAPTER_ID
+        ).order_by(Dialogue.order_index, Dialogue.id),
+        # 导出章节音频：按顺序取已完成的对话
+        "dialogue_export_completed": select(Dialogue.audio_path).where(
+            Dialogue.chapter_id == CHAPTER_ID,
+            Dialogue.status == DialogueStatus.COMPLETED
+        ).order_by(Dialogue.order_index),
+        # 按状态取待生成对话
+        "dialogue_pending": select(Dialogue.id).where(
+            Dialogue.chapter_id == CHAPTER_ID,
+            Dialogue.status == DialogueStatus.PENDING
+        ).order_by(Dialogue.order_index).limit(50),
+        # 统计重建：章节内按状态计数
+        "dialogue_status_counts": select(
+            Dialogue.status, func.count(Dialogue.id)
+        ).where(Dialogue.chapter_id == CHAPTER_ID).group_by(Dialogue.status),
+        # 角色统计
+        "character_dialogue_count": select(func.count(Dialogue.id)).where(Dialogue.character_id == 1),
+        # GET /api/characters/ 及提取角色时的已有角色
+        "character_list": select(Character).where(Character.project_id == PROJECT_ID),
+        # 按名称匹配说话人
+        "character_by_name": select(Character.id).where(
+            Character.project_id == PROJECT_ID,
+            Character.name == "张三"
+        ),
+        # GET /api/chapters/
+        "chapter_list": select(Chapter.id, Chapter.title).where(
+            Chapter.project_id == PROJECT_ID
+        ).order_by(Chapter.order_index),
+    }
+
+
+def seed(project_count: int, chapter_count: int, dialogue_count: int):
+    """写入样本数据并收集统计信息"""
+    db = SessionLocal()
+    try:
+        # 其它项目只写入章节和角色，使过滤条件具有代表性的选择度
+        projects = [Project(name=f"explain{i}") for i in range(project_count)]
+        db.add_all(projects)
+        db.flush()
+        for project in projects:
+            db.bulk_insert_mappings(Chapter, [
+                {"project_id": project.id, "title": f"第{i + 1}章", "order_index": i}
+                for i in range(chapter_count)
+            ])
+            db.bulk_insert_mappings(Character, [
+                {"project_id": project.id, "name": name} for name in ("张三", "李四", "王五", "赵六")
+            ])
+        db.commit()
+        project = projects[0]
+        chapter_ids = db.execute(
+            select(Chapter.id).where(Chapter.project_id == project.id)
+        ).scalars().all()
+        character_ids = db.execute(
+            select(Character.id).where(Character.project_id == project.id)
+        ).scalars().all()
+        statuses = list(DialogueStatus)
+        for chapter_id in chapter_ids:
+            db.bulk_insert_mappings(Dialogue, [
+                {
+                    "chapter_id": chapter_id,
+                    "character_id": character_ids[i % len(character_ids)] if i % 3 else None,
+                    "type": DialogueType.DIALOGUE if i % 3 else DialogueType.NARRATION,
+                    "content": f"第{i}段",
+                    "order_index": i,
+                    "status": statuses[i % len(statuses)],
+                }
+                for i in range(dialogue_count)
+            ])
+        db.commit()
+    finally:
+        db.close()
+
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            conn.execute(text("ANALYZE"))
+        elif engine.dialect.name == "mysql":
+            conn.execute(text("ANALYZE TABLE projects, chapters, characters, dialogues"))
+
+
+def explain(conn, stmt) -> list:
+    """返回执行计划的各行（字典）"""
+    sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    return [dict(row._mapping) for row in conn.exec_driver_sql(prefix + sql)]
+
+
+def plan_problems(plan: list) -> list:
+    """从执行计划中找出全表扫描和额外排序"""
+    problems = []
+    for row in plan:
+        if engine.dialect.name == "sqlite":
+            detail = row["detail"]
+            if detail.startswith("SCAN "):
+                problems.append(f"全表/全索引扫描: {detail}")
+            if "USE TEMP B-TREE" in detail:
+                problems.append(f"额外排序: {detail}")
+        else:
+            extra = row.get("Extra") or ""
+            if row.get("type") in ("ALL", "index"):
+                problems.append(f"全表/全索引扫描: {row.get('table')} type={row.get('type')}")
+            if "Using filesort" in extra or "Using temporary" in extra:
+                problems.append(f"额外排序: {row.get('table')} {extra}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="热点查询执行计划回归")
+    parser.add_argument("--projects", type=int, default=50, help="样本项目数")
+    parser.add_argument("--chapters", type=int, default=20, help="每个项目的样本章节数")
+    parser.add_argument("--dialogues", type=int, default=500, help="第一个项目每章的样本对话数")
+    parser.add_argument("--no-seed", action="store_true", help="不写入样本数据（使用已有数据库时）")
+    args = parser.parse_args()
+
+    init_db()
+    if not (args.no_seed or _use_existing_database):
+        seed(args.projects, args.chapters, args.dialogues)
+
+    failures = {}
+    with engine.connect() as conn:
+        for name, stmt in hot_queries().items():
+            plan = explain(conn, stmt)
+            problems = plan_problems(plan)
+            status = "❌" if problems else "✅"
+            print(f"{status} {name}")
+            if problems:
+                failures[name] = {"problems": problems, "plan": plan}
+
+    if failures:
+        print(json.dumps(failures, ensure_ascii=False, indent=2, default=str))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""旧版正则对话提取实现（仅用于基准对比和正确性回归）"""
+import re
+from typing import List, Dict
+
+
+# 旧版对话标记识别模式
+DIALOGUE_PATTERNS = [
+    r'(.+?)说：["""](.+?)["""]',
+    r'(.+?)道：["""](.+?)["""]',
+    r'(.+?)：["""](.+?)["""]',
+    r'"(.+?)"，(.+?)说',
+]
+
+
+def extract_dialogues(text: str) -> List[Dict[str, any]]:
+    """逐段落尝试正则模式，只保留第一个匹配"""
+    dialogues = []
+    paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
+    
+    for idx, para in enumerate(paragraphs):
+        character_name = None
+        dialogue_content = None
+        
+        for pattern in DIALOGUE_PATTERNS:
+            match = re.search(pattern, para)
+            if match:
+                groups = match.groups()
+                if len(groups) >= 2:
+                    if len(groups[0]) < len(groups[1]):
+                        character_name = groups[0].strip()
+                        dialogue_content = groups[1].strip()
+                    else:
+                        character_name = groups[1].strip()
+                        dialogue_content = groups[0].strip()
+                break
+        
+        if character_name and dialogue_content:
+            dialogues.append({
+                'type': 'dialogue',
+                'character': character_name,
+                'content': dialogue_content,
+                'order_index': idx
+            })
+        else:
+            dialogues.append({
+                'type': 'narration',
+                'character': None,
+                'content': para,
+                'order_index': idx
+            })
+    
+    return dialogues
@@ -0,0 +1,342 @@
+"""
+TTS 负载测试
+
+用法（在 backend 目录下）:
+    python -m benchmarks.load_tts --chapters 4 --paragraphs 50 --latency-ms 300 --rate-limit 20 --error-rate 0.02
+    python -m benchmarks.load_tts --interactive 20 --output results/load_tts.json
+    python -m benchmarks.load_tts --alternate-mock --hedge --interactive 20 --error-rate 0.2
+
+在子进程中启动 TTS 替身服务（benchmarks.tts_standin，参数同该脚本），
+在本进程中用 uvicorn 启动应用（临时 SQLite 库），所有角色和旁白使用 http 引擎
+（--alternate-mock 时另以 mock 引擎为等效音色，测试失败切换和对冲），然后通过接口:
+    generate     同时对每个章节发起 /api/audio/batch-generate，轮询直到全部对话生成完成或失败，
+                 --interactive 时在批量生成期间对预留章节逐条调用 /api/audio/generate，记录单条延迟
+    export       按 --export-concurrency 并发导出各章节，再导出项目
+输出完成/失败数、吞吐、耗时分位数和替身服务的统计（各状态码次数、峰值并发、实际QPS），结果为 JSON。
+用于在没有云端引擎的情况下评估并发、重试和背压相关的改动
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from benchmarks.common import use_sqlite, latency_summary, histogram_mean_ms
+
+use_sqlite("load_tts")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from sqlalchemy import select, func  # noqa: E402
+
+from main import app  # noqa: E402
+from app.core import metrics  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.database import SessionLocal  # noqa: E402
+from app.models import Dialogue, DialogueStatus  # noqa: E402
+from app.services.audio_service import AudioService  # noqa: E402
+from app.services.tts_guard import EngineGuard  # noqa: E402
+from app.services.tts_scheduler import PRIORITIES  # noqa: E402
+from benchmarks.novel_generator import generate_novel  # noqa: E402
+from benchmarks.tts_standin import Behaviour, add_behaviour_arguments, behaviour_from_args  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_standin(port: int, behaviour: Behaviour, seed: int) -> subprocess.Popen:
+    command = [sys.executable, "-m", "benchmarks.tts_standin", "--port", str(port), "--seed", str(seed)]
+    for name, value in vars(behaviour).items():
+        if name != "sample_rate":
+            command += [f"--{name.replace('_', '-')}", str(value)]
+    return subprocess.Popen(command, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def wait_ready(client: httpx.AsyncClient, url: str, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get(url)).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"{url} 未就绪")
+        await asyncio.sleep(0.1)
+
+
+def status_counts(dialogue_ids: list) -> dict:
+    db = SessionLocal()
+    try:
+        return {
+            status.value: count for status, count in db.execute(
+                select(Dialogue.status, func.count(Dialogue.id))
+                .where(Dialogue.id.in_(dialogue_ids)).group_by(Dialogue.status)
+            )
+        }
+    finally:
+        db.close()
+
+
+def alternate_voices(args) -> list:
+    return [{"engine": "mock", "voice_id": "mock_standin"}] if args.alternate_mock else []
+
+
+async def setup(api: httpx.AsyncClient, args, voices: list) -> dict:
+    """创建项目、上传小说、提取角色并分配 http 引擎音色、创建对话，返回各章节的对话ID"""
+    text = generate_novel(args.chapters, args.paragraphs, args.dialogue_ratio, args.cast, args.seed)
+    project_id = (await api.post("/api/projects/", json={"name": "load"})).json()["data"]["id"]
+    response = await api.post(
+        "/api/chapters/upload",
+        data={"project_id": project_id},
+        files={"file": ("novel.txt", text.encode("utf-8"), "text/plain")}
+    )
+    response.raise_for_status()
+    chapters = (await api.get("/api/chapters/", params={"project_id": project_id})).json()["data"]["items"]
+
+    await api.post("/api/characters/extract", params={"project_id": project_id})
+    characters = (await api.get("/api/characters/", params={"project_id": project_id})).json()["data"]["items"]
+    for index, character in enumerate(characters):
+        await api.put(f"/api/characters/{character['id']}", json={"voice_config": {
+            "engine": "http",
+            "voice_id": voices[index % len(voices)]["id"],
+            "speed": 1.0,
+            "pitch": 1.0,
+            "volume": 1.0,
+            "alternates": alternate_voices(args),
+        }})
+
+    dialogues = {}
+    for chapter in chapters:
+        await api.post("/api/dialogues/batch", params={"chapter_id": chapter["id"]})
+        items = (await api.get(
+            "/api/dialogues/", params={"chapter_id": chapter["id"]}
+        )).json()["data"]["items"]
+        dialogues[chapter["id"]] = [item["id"] for item in items]
+    return {"project_id": project_id, "dialogues": dialogues}
+
+
+async def run_generate(api: httpx.AsyncClient, args, batches: dict, probe_ids: list) -> dict:
+    all_ids = [dialogue_id for ids in batches.values() for dialogue_id in ids]
+    start = time.perf_counter()
+
+    accept_ms = []
+
+    async def submit(ids):
+        began = time.perf_counter()
+        response = await api.post("/api/audio/batch-generate", json={"dialogue_ids": ids})
+        accept_ms.append((time.perf_counter() - began) * 1000)
+        response.raise_for_status()
+
+    await asyncio.gather(*(submit(ids) for ids in batches.values()))
+
+    # 批量生成期间逐条生成预留章节的对话（模拟编辑时试听）
+    probe_ms, probe_errors = [], 0
+
+    async def probe():
+        nonlocal probe_errors
+        for dialogue_id in probe_ids:
+            began = time.perf_counter()
+            response = await api.post("/api/audio/generate", json={"dialogue_id": dialogue_id})
+            probe_ms.append((time.perf_counter() - began) * 1000)
+            if response.json().get("code") != 200:
+                probe_errors += 1
+            await asyncio.sleep(args.interactive_interval)
+
+    probe_task = asyncio.create_task(probe()) if probe_ids else None
+
+    deadline = time.monotonic() + args.timeout
+    while True:
+        counts = await asyncio.to_thread(status_counts, all_ids)
+        pending = counts.get(DialogueStatus.PENDING.value, 0) + counts.get(DialogueStatus.GENERATING.value, 0)
+        if not pending or time.monotonic() > deadline:
+            break
+        await asyncio.sleep(args.poll_interval)
+    elapsed = time.perf_counter() - start
+    if probe_task:
+        await probe_task
+
+    completed = counts.get(DialogueStatus.COMPLETED.value, 0)
+    result = {
+        "batches": len(batches),
+        "dialogues": len(all_ids),
+        "completed": completed,
+        "failed": counts.get(DialogueStatus.ERROR.value, 0),
+        "unfinished": pending,
+        "elapsed_s": round(elapsed, 3),
+        "completed_per_s": round(completed / max(elapsed, 1e-9), 3),
+        **latency_summary(accept_ms, "accept_"),
+    }
+    if probe_ids:
+        result["interactive"] = {
+            "requests": len(probe_ms),
+            "errors": probe_errors,
+            **latency_summary(probe_ms),
+            "max_ms": round(max(probe_ms), 3) if probe_ms else 0.0,
+        }
+    return result
+
+
+async def run_export(api: httpx.AsyncClient, args, project_id: int, chapter_ids: list) -> dict:
+    semaphore = asyncio.Semaphore(max(args.export_concurrency, 1))
+    durations, errors = [], 0
+
+    async def export(chapter_id):
+        nonlocal errors
+        async with semaphore:
+            began = time.perf_counter()
+            response = await api.post(
+                "/api/audio/export/chapter", params={"chapter_id": chapter_id, "format": args.export_format}
+            )
+            durations.append((time.perf_counter() - began) * 1000)
+            if response.json().get("code") != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(export(chapter_id) for chapter_id in chapter_ids))
+    chapters_s = time.perf_counter() - start
+
+    began = time.perf_counter()
+    response = await api.post("/api/audio/export/project", json={
+        "project_id": project_id, "chapter_ids": chapter_ids, "format": args.export_format
+    })
+    project_ms = (time.perf_counter() - began) * 1000
+    return {
+        "chapters": len(chapter_ids),
+        "chapter_errors": errors,
+        "chapters_elapsed_s": round(chapters_s, 3),
+        **latency_summary(durations, "chapter_"),
+        "project_ms": round(project_ms, 3),
+        "project_ok": response.json().get("code") == 200,
+    }
+
+
+def engine_guard_state() -> dict:
+    """http 引擎的限速、熔断状态、重试次数，以及切换到 mock 引擎和对冲的次数"""
+    guard = EngineGuard.get("http")
+    return {
+        "rate_limit": round(guard.limiter.rate, 3) if guard.limiter.rate else None,
+        "circuit_state": guard.breaker.state,
+        "retries": {
+            reason: int(metrics.TTS_RETRIES.labels("http", reason).value)
+            for reason in ("rate_limited", "error")
+        },
+        "failovers": int(metrics.TTS_FAILOVERS.labels("http", "mock").value),
+        "queue_wait_mean_ms": {
+            priority: histogram_mean_ms(metrics.TTS_QUEUE_WAIT.labels(priority)) for priority in PRIORITIES
+        },
+        "hedges": {
+            engine: {outcome: int(metrics.TTS_HEDGES.labels(engine, outcome).value) for outcome in ("launched", "won")}
+            for engine in ("http", "mock")
+        },
+    }
+
+
+async def run(args) -> dict:
+    behaviour = behaviour_from_args(args)
+    standin_port, app_port = free_port(), free_port()
+    standin = start_standin(standin_port, behaviour, args.seed)
+
+    settings.TTS_HTTP_URL = f"http://127.0.0.1:{standin_port}"
+    settings.TTS_HTTP_TIMEOUT = args.client_timeout
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=app_port, log_level="warning"))
+    serve = asyncio.create_task(server.serve())
+
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{app_port}", timeout=args.timeout) as api, \
+                httpx.AsyncClient(base_url=settings.TTS_HTTP_URL) as standin_api:
+            await wait_ready(standin_api, "/health")
+            await wait_ready(api, "/health")
+            voices = (await standin_api.get("/voices")).json()
+            # 旁白同样走替身服务
+            AudioService.DEFAULT_VOICE_CONFIG = {
+                **AudioService.DEFAULT_VOICE_CONFIG, "engine": "http", "voice_id": voices[-1]["id"],
+                "alternates": alternate_voices(args),
+            }
+
+            data = await setup(api, args, voices)
+            batches = dict(data["dialogues"])
+            probe_ids = []
+            if args.interactive:
+                # 最后一章预留给逐条生成，不参与批量生成
+                _, reserved = batches.popitem()
+                probe_ids = reserved[:args.interactive]
+
+            await standin_api.post("/stats/reset")
+            generate = await run_generate(api, args, batches, probe_ids)
+            generate["standin"] = (await standin_api.get("/stats")).json()
+            generate["engine_guard"] = engine_guard_state()
+
+            export = await run_export(api, args, data["project_id"], list(batches))
+    finally:
+        server.should_exit = True
+        await serve
+        standin.terminate()
+        standin.wait()
+
+    return {
+        "config": {
+            "chapters": args.chapters,
+            "paragraphs": args.paragraphs,
+            "dialogue_ratio": args.dialogue_ratio,
+            "interactive": args.interactive,
+            "client_timeout": args.client_timeout,
+            "client_rate_limit": args.client_rate_limit,
+            "tts_concurrency": settings.TTS_MAX_CONCURRENCY,
+            "alternate_mock": args.alternate_mock,
+            "hedge": args.hedge,
+            "audio_format": settings.TTS_AUDIO_FORMAT,
+            "standin": vars(behaviour),
+        },
+        "generate": generate,
+        "export": export,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS 负载测试（本地替身服务）")
+    parser.add_argument("--chapters", type=int, default=4, help="章节数（每章一个批量生成任务）")
+    parser.add_argument("--paragraphs", type=int, default=50, help="每章段落数")
+    parser.add_argument("--dialogue-ratio", type=float, default=0.5, help="对话段落比例（0-1）")
+    parser.add_argument("--cast", type=int, default=8, help="角色数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子（小说文本和替身服务）")
+    parser.add_argument("--interactive", type=int, default=0, help="批量生成期间逐条生成的对话数（0表示不测）")
+    parser.add_argument("--interactive-interval", type=float, default=0.2, help="逐条生成的间隔秒数")
+    parser.add_argument("--client-timeout", type=float, default=10.0, help="HTTP TTS 请求超时秒数")
+    parser.add_argument("--timeout", type=float, default=600.0, help="等待批量生成完成的最长秒数")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="轮询生成状态的间隔秒数")
+    parser.add_argument("--export-concurrency", type=int, default=4, help="并发导出的章节数")
+    parser.add_argument("--export-format", default="wav", help="导出格式（mp3 需要 ffmpeg）")
+    parser.add_argument("--client-rate-limit", type=float, default=0, help="http 引擎的初始限速（每秒请求数，0表示收到429后才限速）")
+    parser.add_argument("--tts-concurrency", type=int, default=None, help="同时进行的合成数（TTS_MAX_CONCURRENCY，0表示不限制）")
+    parser.add_argument("--alternate-mock", action="store_true", help="以 mock 引擎为各音色的等效音色（失败切换）")
+    parser.add_argument("--hedge", action="store_true", help="逐条生成时启用对冲请求")
+    parser.add_argument("--output", help="结果另存为 JSON 文件")
+    add_behaviour_arguments(parser)
+    args = parser.parse_args()
+
+    settings.TTS_AUDIO_FORMAT = "wav"
+    settings.STORAGE_GC_INTERVAL = 0
+    settings.TTS_HEDGE_ENABLED = args.hedge
+    if args.tts_concurrency is not None:
+        settings.TTS_MAX_CONCURRENCY = args.tts_concurrency
+    if args.client_rate_limit:
+        settings.TTS_RATE_LIMITS = f"http={args.client_rate_limit}"
+
+    result = asyncio.run(run(args))
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+本地 TTS 替身服务
+
+用法（在 backend 目录下）:
+    python -m benchmarks.tts_standin --port 9880 --latency-ms 300 --jitter 0.4 --rate-limit 20 --error-rate 0.02
+
+实现 HTTPTTSProvider 的接口约定，模拟云端 TTS 引擎的行为:
+    延迟      对数正态分布：中位数 latency-ms，离散度 jitter（对数标准差），另加每字 per-char-ms
+    限流      令牌桶（rate-limit 次/秒，容量 burst），超出返回 429 + Retry-After；
+              并发超过 max-concurrency 同样返回 429
+    失败      按 error-rate 返回 500/503，按 timeout-rate 挂起 hang-seconds 秒（触发客户端超时）
+返回 16 位单声道 WAV 静音，时长按字数和语速估算。
+GET /stats 查看计数（请求数、各状态码、峰值并发、实际QPS），POST /stats/reset 清零；
+PUT /config 可在运行中修改上述参数（如模拟引擎变慢或大面积失败）
+"""
+import argparse
+import asyncio
+import io
+import math
+import random
+import time
+import wave
+from dataclasses import asdict, dataclass, fields
+from typing import Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+# 模拟语速（字/秒，语速倍率为1.0时），与 MockTTSProvider 相同
+CHARS_PER_SECOND = 3.5
+
+VOICES = [
+    {"id": "standin_male_1", "name": "替身男声1", "gender": "male", "language": "zh-CN", "description": "本地替身音色"},
+    {"id": "standin_female_1", "name": "替身女声1", "gender": "female", "language": "zh-CN", "description": "本地替身音色"},
+    {"id": "standin_narrator", "name": "替身旁白", "gender": "male", "language": "zh-CN", "description": "本地替身音色"},
+]
+
+
+@dataclass
+class Behaviour:
+    """替身服务的模拟参数"""
+    latency_ms: float = 300.0
+    jitter: float = 0.4
+    per_char_ms: float = 10.0
+    rate_limit: float = 0.0  # 0 表示不限流
+    burst: float = 0.0  # 令牌桶容量（0 表示等于 rate_limit）
+    max_concurrency: int = 0  # 0 表示不限制
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    hang_seconds: float = 60.0
+    sample_rate: int = 16000
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> Optional[float]:
+        """取一个令牌；不足时返回需要等待的秒数"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return None
+        return (1 - self.tokens) / self.rate
+
+
+class Stats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.status: Dict[str, int] = {}
+        self.hung = 0
+        self.in_flight = 0
+        self.peak_concurrency = 0
+        self.characters = 0
+
+    def snapshot(self) -> dict:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        ok = self.status.get("200", 0)
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "requests": self.requests,
+            "status": dict(self.status),
+            "hung": self.hung,
+            "in_flight": self.in_flight,
+            "peak_concurrency": self.peak_concurrency,
+            "characters": self.characters,
+            "requests_per_s": round(self.requests / elapsed, 3),
+            "ok_per_s": round(ok / elapsed, 3),
+        }
+
+
+def silence_wav(seconds: float, sample_rate: int) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(b"\x00\x00" * int(seconds * sample_rate))
+    return buffer.getvalue()
+
+
+def create_app(behaviour: Behaviour, seed: Optional[int] = None) -> FastAPI:
+    app = FastAPI(title="TTS stand-in")
+    rng = random.Random(seed)
+    stats = Stats()
+    state = {"bucket": None}
+
+    def configure():
+        if behaviour.rate_limit > 0:
+            state["bucket"] = TokenBucket(behaviour.rate_limit, behaviour.burst or behaviour.rate_limit)
+        else:
+            state["bucket"] = None
+
+    configure()
+
+    def count(status: int):
+        key = str(status)
+        stats.status[key] = stats.status.get(key, 0) + 1
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/voices")
+    async def voices():
+        return VOICES
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats.snapshot()
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        stats.reset()
+        return stats.snapshot()
+
+    @app.get("/config")
+    async def get_config():
+        return asdict(behaviour)
+
+    @app.put("/config")
+    async def put_config(request: Request):
+        changes = await request.json()
+        names = {field.name for field in fields(behaviour)}
+        for name, value in changes.items():
+            if name in names:
+                setattr(behaviour, name, type(getattr(behaviour, name))(value))
+        configure()
+        return asdict(behaviour)
+
+    @app.post("/synthesize")
+    async def synthesize(request: Request):
+        payload = await request.json()
+        text = payload.get("text", "")
+        stats.requests += 1
+
+        bucket = state["bucket"]
+        wait = bucket.take() if bucket else None
+        if wait is not None or (behaviour.max_concurrency and stats.in_flight >= behaviour.max_concurrency):
+            count(429)
+            retry_after = max(math.ceil(wait or 1), 1)
+            return JSONResponse({"error": "rate limited"}, status_code=429, headers={"Retry-After": str(retry_after)})
+
+        stats.in_flight += 1
+        stats.peak_concurrency = max(stats.peak_concurrency, stats.in_flight)
+        try:
+            roll = rng.random()
+            if roll < behaviour.timeout_rate:
+                stats.hung += 1
+                await asyncio.sleep(behaviour.hang_seconds)
+                count(504)
+                return JSONResponse({"error": "timeout"}, status_code=504)
+
+            latency = behaviour.latency_ms * math.exp(rng.gauss(0, behaviour.jitter)) if behaviour.jitter > 0 \
+                else behaviour.latency_ms
+            await asyncio.sleep((latency + behaviour.per_char_ms * len(text)) / 1000)
+
+            if roll < behaviour.timeout_rate + behaviour.error_rate:
+                status = rng.choice((500, 503))
+                count(status)
+                return JSONResponse({"error": "engine failure"}, status_code=status)
+
+            speed = float(payload.get("speed") or 1.0)
+            seconds = round(len(text) / (CHARS_PER_SECOND * speed), 3)
+            sample_rate = int(payload.get("sample_rate") or behaviour.sample_rate)
+            stats.characters += len(text)
+            count(200)
+            return Response(
+                silence_wav(seconds, sample_rate),
+                media_type="audio/wav",
+                headers={"X-Audio-Duration": str(seconds)}
+            )
+        finally:
+            stats.in_flight -= 1
+
+    return app
+
+
+def add_behaviour_arguments(parser: argparse.ArgumentParser):
+    """替身服务参数（负载测试脚本复用）"""
+    defaults = Behaviour()
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="延迟中位数（毫秒）")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter, help="延迟的对数标准差（0表示固定延迟）")
+    parser.add_argument("--per-char-ms", type=float, default=defaults.per_char_ms, help="每字增加的延迟（毫秒）")
+    parser.add_argument("--rate-limit", type=float, default=defaults.rate_limit, help="每秒请求上限（0表示不限流）")
+    parser.add_argument("--burst", type=float, default=defaults.burst, help="令牌桶容量（0表示等于每秒上限）")
+    parser.add_argument("--max-concurrency", type=int, default=defaults.max_concurrency, help="并发上限（0表示不限制）")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="返回 500/503 的比例")
+    parser.add_argument("--timeout-rate", type=float, default=defaults.timeout_rate, help="挂起不响应的比例")
+    parser.add_argument("--hang-seconds", type=float, default=defaults.hang_seconds, help="挂起时长（秒）")
+
+
+def behaviour_from_args(args) -> Behaviour:
+    return Behaviour(**{
+        field.name: getattr(args, field.name) for field in fields(Behaviour) if hasattr(args, field.name)
+    })
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="本地 TTS 替身服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9880)
+    parser.add_argument("--seed", type=int, default=None, help="随机种子（固定延迟和失败序列）")
+    add_behaviour_arguments(parser)
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(behaviour_from_args(args), args.seed), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
 """FastAPI主应用入口"""
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import init_db, SessionLocal
 from app.core.exceptions import BaseAPIException
+from app.core.metrics import REGISTRY, CONTENT_TYPE, MetricsMiddleware, EventLoopMonitor
+from app.core.tracing import TracingMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.services.statistics import StatsService
+from app.services.storage_gc import StorageGC
+from app.services.prefetch import PrefetchService
+from app.services.parse_cache import ParseCache
 
 
 @asynccontextmanager
@@ -16,9 +23,27 @@ async def lifespan(app: FastAPI):
     print("🚀 正在初始化数据库...")
     init_db()
     print("✅ 数据库初始化完成")
+    
+    # 为升级前的已有数据补建统计行
+    db = SessionLocal()
+    try:
+        rebuilt = StatsService.ensure_all(db)
+        db.commit()
+        if rebuilt:
+            print(f"📊 已重建 {rebuilt} 个项目的统计数据")
+    finally:
+        db.close()
+    
+    # 启动存储文件回收任务
+    await StorageGC.start()
+    await EventLoopMonitor.start()
     yield
     # 关闭时清理资源
     print("👋 应用正在关闭...")
+    await EventLoopMonitor.stop()
+    await StorageGC.stop()
+    await PrefetchService.stop()
+    ParseCache.shutdown()
 
 
 # 创建FastAPI应用
@@ -38,6 +63,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 按需剖析单个请求（PROFILING_ENABLED 时生效）
+app.add_middleware(ProfilingMiddleware)
+
+# 链路追踪（响应头返回 traceparent）
+app.add_middleware(TracingMiddleware)
+
+# 请求指标（最外层，耗时包含其它中间件）
+app.add_middleware(MetricsMiddleware)
+
 
 # 全局异常处理器
 @app.exception_handler(BaseAPIException)
@@ -84,6 +118,12 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """运行指标（Prometheus 文本格式）"""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 # 注册API路由
 from app.api import projects, chapters, characters, dialogues, audio
 app.include_router(projects.router, prefix="/api/projects", tags=["项目管理"])
@@ -21,7 +21,10 @@ CREATE TABLE IF NOT EXISTS `projects` (
   `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   INDEX `idx_status` (`status`),
-  INDEX `idx_created_at` (`created_at`)
+  INDEX `idx_created_at` (`created_at`),
+  INDEX `idx_projects_updated_at_id` (`updated_at`, `id`),
+  INDEX `idx_projects_status_updated_at_id` (`status`, `updated_at`, `id`),
+  FULLTEXT INDEX `ft_projects_name_description` (`name`, `description`) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='项目表';
 
 -- ==========================================
@@ -32,15 +35,14 @@ CREATE TABLE IF NOT EXISTS `chapters` (
   `project_id` INT NOT NULL COMMENT '所属项目ID',
   `title` VARCHAR(255) NOT NULL COMMENT '章节标题',
   `order_index` INT NOT NULL DEFAULT 0 COMMENT '排序序号',
-  `content` LONGTEXT COMMENT '原始文本内容',
+  `content` LONGBLOB COMMENT '原始文本内容（UTF-8，可按配置压缩存储）',
   `word_count` INT DEFAULT 0 COMMENT '字数',
   `status` VARCHAR(50) DEFAULT 'pending' COMMENT '状态: pending, processing, completed, failed',
   `duration` FLOAT DEFAULT 0 COMMENT '音频时长（秒）',
   `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   FOREIGN KEY (`project_id`) REFERENCES `projects`(`id`) ON DELETE CASCADE,
-  INDEX `idx_project_id` (`project_id`),
-  INDEX `idx_order_index` (`order_index`),
+  INDEX `idx_chapters_project_order` (`project_id`, `order_index`),
   INDEX `idx_status` (`status`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='章节表';
 
@@ -59,7 +61,7 @@ CREATE TABLE IF NOT EXISTS `characters` (
   `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   FOREIGN KEY (`project_id`) REFERENCES `projects`(`id`) ON DELETE CASCADE,
-  INDEX `idx_project_id` (`project_id`),
+  INDEX `idx_characters_project_name` (`project_id`, `name`),
   INDEX `idx_name` (`name`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='角色表';
 
@@ -75,6 +77,7 @@ CREATE TABLE IF NOT EXISTS `dialogues` (
   `character_id` INT COMMENT '角色ID（旁白时为NULL）',
   `start_time` FLOAT COMMENT '开始时间（秒）',
   `end_time` FLOAT COMMENT '结束时间（秒）',
+  `duration` DOUBLE DEFAULT 0 COMMENT '音频时长（秒，毫秒精度）',
   `audio_path` VARCHAR(512) COMMENT '音频文件路径',
   `status` VARCHAR(50) DEFAULT 'pending' COMMENT '状态: pending, generating, generated, failed',
   `voice_config` JSON COMMENT '独立声音配置（可选）',
@@ -83,9 +86,9 @@ CREATE TABLE IF NOT EXISTS `dialogues` (
   `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   FOREIGN KEY (`chapter_id`) REFERENCES `chapters`(`id`) ON DELETE CASCADE,
   FOREIGN KEY (`character_id`) REFERENCES `characters`(`id`) ON DELETE SET NULL,
-  INDEX `idx_chapter_id` (`chapter_id`),
-  INDEX `idx_character_id` (`character_id`),
-  INDEX `idx_order_index` (`order_index`),
+  INDEX `idx_dialogues_chapter_order` (`chapter_id`, `order_index`),
+  INDEX `idx_dialogues_chapter_status_order` (`chapter_id`, `status`, `order_index`),
+  INDEX `idx_dialogues_character_id` (`character_id`),
   INDEX `idx_status` (`status`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='对话旁白表';
 
@@ -106,6 +109,76 @@ CREATE TABLE IF NOT EXISTS `audio_exports` (
   INDEX `idx_created_at` (`created_at`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='导出记录表';
 
+-- ==========================================
+-- 文本解析结果缓存表
+-- ==========================================
+CREATE TABLE IF NOT EXISTS `parse_results` (
+  `id` INT AUTO_INCREMENT PRIMARY KEY,
+  `content_hash` CHAR(64) NOT NULL COMMENT '内容SHA-256哈希',
+  `parser_version` INT NOT NULL COMMENT '解析器版本',
+  `dialogues` JSON NOT NULL COMMENT '解析出的对话/旁白片段列表',
+  `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  UNIQUE KEY `uq_parse_results_hash_version` (`content_hash`, `parser_version`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='文本解析结果缓存表';
+
+-- ==========================================
+-- 音色语速统计表
+-- ==========================================
+CREATE TABLE IF NOT EXISTS `speech_rates` (
+  `id` INT AUTO_INCREMENT PRIMARY KEY,
+  `engine` VARCHAR(50) NOT NULL COMMENT 'TTS引擎',
+  `voice_id` VARCHAR(255) NOT NULL COMMENT '音色ID',
+  `speed` DECIMAL(4,2) NOT NULL COMMENT '语速倍率',
+  `sample_count` INT NOT NULL DEFAULT 0 COMMENT '样本数',
+  `total_chars` BIGINT NOT NULL DEFAULT 0 COMMENT '累计字数',
+  `total_seconds` DOUBLE NOT NULL DEFAULT 0 COMMENT '累计时长（秒）',
+  `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  UNIQUE KEY `uq_speech_rates_voice` (`engine`, `voice_id`, `speed`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='音色语速统计表';
+
+-- ==========================================
+-- 对话合成租约表（多进程间避免重复合成同一对话）
+-- ==========================================
+CREATE TABLE IF NOT EXISTS `synthesis_leases` (
+  `dialogue_id` INT PRIMARY KEY COMMENT '对话ID',
+  `fingerprint` VARCHAR(64) NOT NULL COMMENT '合成内容指纹（文本+音色配置）',
+  `owner` VARCHAR(128) NOT NULL COMMENT '持有者（主机:进程:随机串）',
+  `expires_at` DOUBLE NOT NULL COMMENT '过期时间（Unix时间戳，秒）'
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='对话合成租约表';
+
+-- ==========================================
+-- 章节统计表（由统计服务增量维护）
+-- ==========================================
+CREATE TABLE IF NOT EXISTS `chapter_stats` (
+  `chapter_id` INT PRIMARY KEY COMMENT '章节ID',
+  `project_id` INT NOT NULL COMMENT '所属项目ID',
+  `dialogue_count` INT NOT NULL DEFAULT 0 COMMENT '对话总数',
+  `pending_count` INT NOT NULL DEFAULT 0 COMMENT '待生成数',
+  `generating_count` INT NOT NULL DEFAULT 0 COMMENT '生成中数',
+  `completed_count` INT NOT NULL DEFAULT 0 COMMENT '已完成数',
+  `error_count` INT NOT NULL DEFAULT 0 COMMENT '生成出错数',
+  `synthesized_duration` DOUBLE NOT NULL DEFAULT 0 COMMENT '已生成音频总时长（秒）',
+  `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  FOREIGN KEY (`chapter_id`) REFERENCES `chapters`(`id`) ON DELETE CASCADE,
+  FOREIGN KEY (`project_id`) REFERENCES `projects`(`id`) ON DELETE CASCADE,
+  INDEX `idx_project_id` (`project_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='章节统计表';
+
+-- ==========================================
+-- 项目统计表（由统计服务增量维护）
+-- ==========================================
+CREATE TABLE IF NOT EXISTS `project_stats` (
+  `project_id` INT PRIMARY KEY COMMENT '项目ID',
+  `dialogue_count` INT NOT NULL DEFAULT 0 COMMENT '对话总数',
+  `pending_count` INT NOT NULL DEFAULT 0 COMMENT '待生成数',
+  `generating_count` INT NOT NULL DEFAULT 0 COMMENT '生成中数',
+  `completed_count` INT NOT NULL DEFAULT 0 COMMENT '已完成数',
+  `error_count` INT NOT NULL DEFAULT 0 COMMENT '生成出错数',
+  `synthesized_duration` DOUBLE NOT NULL DEFAULT 0 COMMENT '已生成音频总时长（秒）',
+  `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  FOREIGN KEY (`project_id`) REFERENCES `projects`(`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='项目统计表';
+
 -- ==========================================
 -- 插入示例数据（可选）
 -- ==========================================
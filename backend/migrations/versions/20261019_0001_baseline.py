@@ -0,0 +1,22 @@
+"""基线：引入迁移之前的旧版 init.sql / init_db 建立的表结构
+
+章节内容为 LONGTEXT、对话没有 duration 列、项目列表只有 status 和 created_at 索引、
+统计列为整数秒；这些差异由 0001a 补齐。本版本不做改动，只作为已有数据库的起点
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 10:00:00
+"""
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    pass
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,114 @@
+"""补齐已有数据库缺少的列、列类型和项目列表索引
+
+create_all 只创建缺少的表，不会给已有表添加列或修改列类型，按旧版 init.sql / 模型建立的库需要:
+- dialogues.duration：实际合成时长（秒，毫秒精度）
+- projects / characters 的统计列（chapters_count、characters_count、dialogue_count、total_duration），
+  total_duration 由整数秒改为浮点秒
+- chapters.content：MySQL 下由 LONGTEXT 改为 LONGBLOB（可压缩存储，UTF-8 原文按字节保留）
+- projects (updated_at, id)、(status, updated_at, id)：项目列表游标分页
+- ft_projects_name_description：项目名称/描述的 ngram 全文索引（仅 MySQL）
+
+每一步先检查是否已存在，新库（已由 init.sql / create_all 建好）执行时不做改动
+SQLite 不区分列的数值类型和文本/二进制存储，只补齐列和索引
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-19 10:15:00
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+revision = "0001a"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (表, 列)
+COLUMNS = [
+    ("dialogues", sa.Column("duration", sa.Float(), server_default="0", comment="音频时长(秒，毫秒精度)")),
+    ("projects", sa.Column("chapters_count", sa.Integer(), server_default="0", comment="章节数量(由统计服务维护)")),
+    ("projects", sa.Column("characters_count", sa.Integer(), server_default="0", comment="角色数量(由统计服务维护)")),
+    ("projects", sa.Column(
+        "total_duration", sa.Float(), server_default="0", comment="已生成音频总时长(秒，由统计服务维护)"
+    )),
+    ("characters", sa.Column("dialogue_count", sa.Integer(), server_default="0", comment="对话数量(由统计服务维护)")),
+    ("characters", sa.Column(
+        "total_duration", sa.Float(), server_default="0", comment="已生成音频总时长(秒，由统计服务维护)"
+    )),
+]
+
+# 由整数秒改为浮点秒的列：(表, 列, 注释)
+FLOAT_COLUMNS = [
+    ("projects", "total_duration", "已生成音频总时长(秒，由统计服务维护)"),
+    ("characters", "total_duration", "已生成音频总时长(秒，由统计服务维护)"),
+]
+
+# (表, 索引名, 列)
+INDEXES = [
+    ("projects", "idx_projects_updated_at_id", ["updated_at", "id"]),
+    ("projects", "idx_projects_status_updated_at_id", ["status", "updated_at", "id"]),
+]
+
+FULLTEXT_INDEX = "ft_projects_name_description"
+
+
+def _columns(table: str) -> dict:
+    inspector = sa.inspect(op.get_bind())
+    return {column["name"]: column for column in inspector.get_columns(table)}
+
+
+def _existing_indexes(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {index["name"] for index in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    is_mysql = op.get_bind().dialect.name == "mysql"
+
+    for table, column in COLUMNS:
+        if column.name not in _columns(table):
+            op.add_column(table, column)
+
+    if is_mysql:
+        for table, name, comment in FLOAT_COLUMNS:
+            if not isinstance(_columns(table)[name]["type"], sa.Float):
+                op.alter_column(
+                    table, name,
+                    type_=sa.Float(), existing_nullable=True, server_default="0", comment=comment
+                )
+        if not isinstance(_columns("chapters")["content"]["type"], mysql.LONGBLOB):
+            op.alter_column(
+                "chapters", "content",
+                type_=mysql.LONGBLOB(), existing_nullable=True, comment="原始文本内容（UTF-8，可按配置压缩存储）"
+            )
+
+    for table, name, columns in INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+
+    if is_mysql and FULLTEXT_INDEX not in _existing_indexes("projects"):
+        op.execute(
+            f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX} ON projects (name, description) WITH PARSER ngram"
+        )
+
+
+def downgrade() -> None:
+    is_mysql = op.get_bind().dialect.name == "mysql"
+
+    if is_mysql and FULLTEXT_INDEX in _existing_indexes("projects"):
+        op.drop_index(FULLTEXT_INDEX, table_name="projects")
+    for table, name, _ in reversed(INDEXES):
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
+
+    if is_mysql:
+        # LONGBLOB 改回 LONGTEXT 前须确认没有压缩存储的章节内容
+        op.alter_column(
+            "chapters", "content",
+            type_=mysql.LONGTEXT(), existing_nullable=True, comment="原始文本内容"
+        )
+
+    # 统计列在旧版中已存在，只删除本版本新增的对话时长列
+    if "duration" in _columns("dialogues"):
+        op.drop_column("dialogues", "duration")
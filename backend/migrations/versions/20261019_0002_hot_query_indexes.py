@@ -0,0 +1,69 @@
+"""热点查询复合索引
+
+- dialogues (chapter_id, order_index)：章节对话列表及游标分页
+- dialogues (chapter_id, status, order_index)：按状态取章节对话并按顺序返回
+- dialogues (character_id)：角色统计及删除角色时置空外键
+- characters (project_id, name)：项目角色列表及按名称匹配说话人
+- chapters (project_id, order_index)：项目章节列表
+
+新库由 init.sql / create_all 直接建立这些索引，因此每个索引先检查是否已存在；
+被复合索引最左前缀覆盖的旧单列索引，以及不带章节/项目条件从不单独使用的 order_index 索引一并删除
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-19 10:30:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001a"
+branch_labels = None
+depends_on = None
+
+# (表, 索引名, 列)
+INDEXES = [
+    ("dialogues", "idx_dialogues_chapter_order", ["chapter_id", "order_index"]),
+    ("dialogues", "idx_dialogues_chapter_status_order", ["chapter_id", "status", "order_index"]),
+    ("dialogues", "idx_dialogues_character_id", ["character_id"]),
+    ("characters", "idx_characters_project_name", ["project_id", "name"]),
+    ("chapters", "idx_chapters_project_order", ["project_id", "order_index"]),
+]
+
+# init.sql 旧版建立的单列索引：(表, 索引名, 列)
+REDUNDANT_INDEXES = [
+    ("dialogues", "idx_chapter_id", ["chapter_id"]),
+    ("dialogues", "idx_character_id", ["character_id"]),
+    ("dialogues", "idx_order_index", ["order_index"]),
+    ("characters", "idx_project_id", ["project_id"]),
+    ("chapters", "idx_project_id", ["project_id"]),
+    ("chapters", "idx_order_index", ["order_index"]),
+]
+
+
+def _existing_indexes(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {index["name"] for index in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    for table, name, columns in INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+
+    # 新的复合索引建好后再删除旧索引（MySQL 外键列需始终有可用索引）
+    for table, name, _ in REDUNDANT_INDEXES:
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
+
+
+def downgrade() -> None:
+    # 旧单列索引只存在于按 init.sql 建立的 MySQL 库（SQLite 索引名全库唯一，无法同名重建）
+    if op.get_bind().dialect.name == "mysql":
+        for table, name, columns in REDUNDANT_INDEXES:
+            if name not in _existing_indexes(table):
+                op.create_index(name, table, columns)
+
+    for table, name, _ in reversed(INDEXES):
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
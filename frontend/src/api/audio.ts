@@ -11,6 +11,20 @@ export const batchGenerateAudio = (dialogueIds: number[]) => {
   return request.post(`/audio/batch-generate`, { dialogue_ids: dialogueIds })
 }
 
+// 预生成当前对话之后的待生成对话（sessionId 标识当前打开的页面）
+export const prefetchAudio = (sessionId: string, chapterId: number, dialogueId?: number) => {
+  return request.post<{ dialogue_ids: number[] }>(`/audio/prefetch`, {
+    session_id: sessionId,
+    chapter_id: chapterId,
+    dialogue_id: dialogueId,
+  })
+}
+
+// 取消预生成（离开页面时）
+export const cancelPrefetch = (sessionId: string) => {
+  return request.delete(`/audio/prefetch/${sessionId}`)
+}
+
 // 生成章节音频
 export const generateChapterAudio = (chapterId: number) => {
   return request.post(`/audio/generate-chapter`, { chapter_id: chapterId })
@@ -36,3 +50,7 @@ export const getAudioUrl = (path: string) => {
   return `/api/audio/files/${encodeURIComponent(path)}`
 }
 
+// 预生成会话ID（每个页面实例一个）
+export const createPrefetchSession = () => {
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`
+}
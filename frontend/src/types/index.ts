@@ -76,6 +76,7 @@ export interface Dialogue {
   character?: Character
   start_time?: number
   end_time?: number
+  duration?: number
   audio_path?: string
   status?: 'pending' | 'generating' | 'completed' | 'failed'
   voice_config?: Partial<VoiceConfig>